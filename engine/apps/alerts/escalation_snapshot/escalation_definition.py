@@ -0,0 +1,70 @@
+import hashlib
+import json
+import threading
+import typing
+from collections import OrderedDict
+
+from django.apps import apps
+from django.core.serializers.json import DjangoJSONEncoder
+
+# number of escalation snapshot definitions kept in memory per process
+ESCALATION_DEFINITION_CACHE_SIZE = 1000
+
+_cached_definitions: OrderedDict[str, dict] = OrderedDict()
+_cached_definitions_lock = threading.Lock()
+
+
+def _cache_definition(version: str, raw_definition: dict) -> None:
+    with _cached_definitions_lock:
+        _cached_definitions[version] = raw_definition
+        _cached_definitions.move_to_end(version)
+        while len(_cached_definitions) > ESCALATION_DEFINITION_CACHE_SIZE:
+            _cached_definitions.popitem(last=False)
+
+
+def _get_cached_definition(version: str) -> typing.Optional[dict]:
+    with _cached_definitions_lock:
+        raw_definition = _cached_definitions.get(version)
+        if raw_definition is not None:
+            _cached_definitions.move_to_end(version)
+        return raw_definition
+
+
+def clear_escalation_definition_cache():
+    with _cached_definitions_lock:
+        _cached_definitions.clear()
+
+
+def get_escalation_definition_version(raw_definition: dict) -> str:
+    content = json.dumps(raw_definition, sort_keys=True, separators=(",", ":"), cls=DjangoJSONEncoder)
+    return hashlib.sha256(content.encode()).hexdigest()
+
+
+def save_escalation_definition(raw_definition: dict) -> str:
+    """
+    Store raw escalation snapshot as a shared definition unless it's stored already, return its version.
+    Alert groups escalated by the same escalation chain share one definition until the chain is changed.
+    """
+    EscalationSnapshotDefinition = apps.get_model("alerts", "EscalationSnapshotDefinition")
+
+    version = get_escalation_definition_version(raw_definition)
+    if _get_cached_definition(version) is None:
+        EscalationSnapshotDefinition.objects.get_or_create(version=version, defaults={"raw_definition": raw_definition})
+        _cache_definition(version, raw_definition)
+    return version
+
+
+def get_escalation_definition(version: str) -> typing.Optional[dict]:
+    """Return raw escalation snapshot by its version, shared by all callers within the process. Don't modify it."""
+    EscalationSnapshotDefinition = apps.get_model("alerts", "EscalationSnapshotDefinition")
+
+    raw_definition = _get_cached_definition(version)
+    if raw_definition is None:
+        raw_definition = (
+            EscalationSnapshotDefinition.objects.filter(version=version)
+            .values_list("raw_definition", flat=True)
+            .first()
+        )
+        if raw_definition is not None:
+            _cache_definition(version, raw_definition)
+    return raw_definition
@@ -10,6 +10,11 @@ from django.utils.functional import cached_property
 from rest_framework.exceptions import ValidationError
 
 from apps.alerts.constants import NEXT_ESCALATION_DELAY
+from apps.alerts.escalation_snapshot.escalation_definition import (
+    get_escalation_definition,
+    save_escalation_definition,
+)
+from apps.alerts.escalation_snapshot.escalation_state import ESCALATION_STATE_VERSION, apply_escalation_state
 from apps.alerts.escalation_snapshot.snapshot_classes import (
     ChannelFilterSnapshot,
     EscalationChainSnapshot,
@@ -17,7 +22,7 @@ from apps.alerts.escalation_snapshot.snapshot_classes import (
     EscalationSnapshot,
 )
 from apps.alerts.escalation_snapshot.utils import eta_for_escalation_step_notify_if_time
-from apps.alerts.tasks import calculate_escalation_finish_time, escalate_alert_group
+from apps.alerts.tasks import calculate_escalation_finish_time, schedule_escalate_alert_group
 
 logger = logging.getLogger(__name__)
 
@@ -168,7 +173,7 @@ class EscalationSnapshotMixin:
     def channel_filter_snapshot(self) -> Optional[ChannelFilterSnapshot]:
         # in some cases we need only channel filter and don't want to serialize whole escalation
         channel_filter_snapshot_object = None
-        escalation_snapshot = self.raw_escalation_snapshot
+        escalation_snapshot = self.get_raw_escalation_snapshot()
         if escalation_snapshot is not None:
             channel_filter_snapshot = ChannelFilterSnapshot.serializer().to_internal_value(
                 escalation_snapshot["channel_filter_snapshot"]
@@ -180,7 +185,7 @@ class EscalationSnapshotMixin:
     def escalation_chain_snapshot(self) -> Optional[EscalationChainSnapshot]:
         # in some cases we need only escalation chain and don't want to serialize whole escalation
         escalation_chain_snapshot_object = None
-        escalation_snapshot = self.raw_escalation_snapshot
+        escalation_snapshot = self.get_raw_escalation_snapshot()
         if escalation_snapshot is not None:
             escalation_chain_snapshot = EscalationChainSnapshot.serializer().to_internal_value(
                 escalation_snapshot["escalation_chain_snapshot"]
@@ -191,14 +196,27 @@ class EscalationSnapshotMixin:
     @cached_property
     def escalation_snapshot(self) -> Optional[EscalationSnapshot]:
         escalation_snapshot_object = None
-        raw_escalation_snapshot = self.raw_escalation_snapshot
+        raw_escalation_snapshot = self.get_raw_escalation_snapshot()
         if raw_escalation_snapshot is not None:
             try:
                 escalation_snapshot_object = self._deserialize_escalation_snapshot(raw_escalation_snapshot)
+                # runtime state is deserialized on its own instead of being merged into the raw snapshot
+                apply_escalation_state(escalation_snapshot_object, self.raw_escalation_state)
             except ValidationError as e:
                 logger.error(f"Error trying to deserialize raw escalation snapshot: {e}")
         return escalation_snapshot_object
 
+    def get_raw_escalation_snapshot(self) -> Optional[dict]:
+        """
+        Return raw escalation snapshot without runtime state: the one saved to the alert group if any, otherwise
+        the shared escalation definition the alert group refers to. Don't modify the result, it can be shared.
+        """
+        if self.raw_escalation_snapshot is not None:
+            return self.raw_escalation_snapshot
+        if self.escalation_definition_version is not None:
+            return get_escalation_definition(self.escalation_definition_version)
+        return None
+
     def _deserialize_escalation_snapshot(self, raw_escalation_snapshot) -> EscalationSnapshot:
         """
         Deserializes raw escalation snapshot to EscalationSnapshot object with channel_filter_snapshot as
@@ -228,17 +246,21 @@ class EscalationSnapshotMixin:
     def escalation_chain_exists(self):
         return not self.pause_escalation and self.channel_filter and self.channel_filter.escalation_chain
 
+    def _get_raw_escalation_snapshot_field(self, field):
+        # get field of escalation snapshot or its runtime state directly to avoid serialization overhead
+        raw_escalation_state = self.raw_escalation_state
+        if raw_escalation_state is not None and raw_escalation_state.get("version") == ESCALATION_STATE_VERSION:
+            return raw_escalation_state.get(field)
+        raw_escalation_snapshot = self.get_raw_escalation_snapshot()
+        return raw_escalation_snapshot.get(field) if raw_escalation_snapshot is not None else None
+
     @property
     def pause_escalation(self):
-        # get pause_escalation field directly to avoid serialization overhead
-        return self.raw_escalation_snapshot is not None and self.raw_escalation_snapshot.get("pause_escalation", False)
+        return bool(self._get_raw_escalation_snapshot_field("pause_escalation"))
 
     @property
     def next_step_eta(self):
-        # get next_step_eta field directly to avoid serialization overhead
-        raw_next_step_eta = (
-            self.raw_escalation_snapshot.get("next_step_eta") if self.raw_escalation_snapshot is not None else None
-        )
+        raw_next_step_eta = self._get_raw_escalation_snapshot_field("next_step_eta")
         if raw_next_step_eta:
             return parse(raw_next_step_eta).replace(tzinfo=pytz.UTC)
 
@@ -263,18 +285,24 @@ class EscalationSnapshotMixin:
 
         # take raw escalation snapshot from db if escalation is paused
         raw_escalation_snapshot = (
-            self.build_raw_escalation_snapshot() if not self.pause_escalation else self.raw_escalation_snapshot
+            self.build_raw_escalation_snapshot() if not self.pause_escalation else self.get_raw_escalation_snapshot()
+        )
+        # alert groups escalated by the same escalation chain share the stored escalation definition
+        escalation_definition_version = (
+            save_escalation_definition(raw_escalation_snapshot) if raw_escalation_snapshot is not None else None
         )
         task_id = celery_uuid()
 
         AlertGroup.all_objects.filter(pk=self.pk,).update(
             active_escalation_id=task_id,
             is_escalation_finished=False,
-            raw_escalation_snapshot=raw_escalation_snapshot,
+            raw_escalation_snapshot=None,
+            escalation_definition_version=escalation_definition_version,
+            raw_escalation_state=None,
         )
         if not self.pause_escalation:
             calculate_escalation_finish_time.apply_async((self.pk,), immutable=True)
-        escalate_alert_group.apply_async((self.pk,), countdown=countdown, immutable=True, eta=eta, task_id=task_id)
+        schedule_escalate_alert_group(self.pk, task_id, eta=eta, countdown=countdown)
 
     def stop_escalation(self):
         self.is_escalation_finished = True
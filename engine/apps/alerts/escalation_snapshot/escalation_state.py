@@ -0,0 +1,67 @@
+import typing
+
+from rest_framework.exceptions import ValidationError
+
+from apps.alerts.escalation_snapshot.serializers import EscalationPolicyStateSerializer, EscalationStateSerializer
+
+# bump on incompatible changes of the state format, states of other versions are not applied
+ESCALATION_STATE_VERSION = 1
+
+# fields of raw escalation snapshot changed by escalation steps
+ESCALATION_STATE_FIELDS = ("last_active_escalation_policy_order", "pause_escalation", "next_step_eta")
+
+
+def serialize_escalation_state(escalation_snapshot) -> dict:
+    """
+    Return runtime state of escalation: fields changed by escalation steps, serialized without the rest of the snapshot.
+    Policies are keyed by their position, only policies passed at least once are included, since steps don't
+    change other ones.
+
+    Example result:
+    {
+        'version': 1,
+        'last_active_escalation_policy_order': 0,
+        'pause_escalation': False,
+        'next_step_eta': '2021-10-18T10:28:28.890369Z',
+        'policies': {
+            '0': {
+                'escalation_counter': 0,
+                'passed_last_time': '2021-10-18T10:23:28.890369Z',
+                'last_notified_user': None,
+                'notify_to_users_queue': [1, 2],
+                'pause_escalation': False,
+            },
+        },
+    }
+    """
+    return {
+        "version": ESCALATION_STATE_VERSION,
+        **EscalationStateSerializer(escalation_snapshot).data,
+        "policies": {
+            str(idx): EscalationPolicyStateSerializer(policy_snapshot).data
+            for idx, policy_snapshot in enumerate(escalation_snapshot.escalation_policies_snapshots)
+            if policy_snapshot.passed_last_time is not None
+        },
+    }
+
+
+def apply_escalation_state(escalation_snapshot, raw_escalation_state: typing.Optional[dict]) -> None:
+    """Deserialize runtime state of escalation saved separately and set it on the escalation snapshot"""
+    if raw_escalation_state is None:
+        return
+    if raw_escalation_state.get("version") != ESCALATION_STATE_VERSION:
+        raise ValidationError(f"Unsupported escalation state version: {raw_escalation_state.get('version')}")
+
+    state = EscalationStateSerializer().to_internal_value(
+        {field: raw_escalation_state[field] for field in ESCALATION_STATE_FIELDS}
+    )
+    for field, value in state.items():
+        setattr(escalation_snapshot, field, value)
+
+    escalation_policies_snapshots = escalation_snapshot.escalation_policies_snapshots
+    for idx, raw_policy_state in raw_escalation_state["policies"].items():
+        idx = int(idx)
+        if idx < len(escalation_policies_snapshots):
+            policy_state = EscalationPolicyStateSerializer().to_internal_value(raw_policy_state)
+            for field, value in policy_state.items():
+                setattr(escalation_policies_snapshots[idx], field, value)
@@ -2,3 +2,4 @@ from .channel_filter_snapshot import ChannelFilterSnapshotSerializer  # noqa: F4
 from .escalation_chain_snapshot import EscalationChainSnapshotSerializer  # noqa: F401
 from .escalation_policy_snapshot import EscalationPolicySnapshotSerializer  # noqa: F401
 from .escalation_snapshot import EscalationSnapshotSerializer  # noqa: F401
+from .escalation_state import EscalationPolicyStateSerializer, EscalationStateSerializer  # noqa: F401
@@ -0,0 +1,27 @@
+from rest_framework import serializers
+
+from apps.alerts.escalation_snapshot.serializers.escalation_policy_snapshot import (
+    ManyRelatedFieldWithNoneCleanup,
+    PrimaryKeyRelatedFieldWithNoneValue,
+)
+from apps.user_management.models import User
+
+
+class EscalationPolicyStateSerializer(serializers.Serializer):
+    """Fields of EscalationPolicySnapshotSerializer changed by escalation steps, serialized the same way"""
+
+    escalation_counter = serializers.IntegerField(default=0)
+    passed_last_time = serializers.DateTimeField(allow_null=True, default=None)
+    last_notified_user = serializers.PrimaryKeyRelatedField(allow_null=True, queryset=User.objects, required=False)
+    notify_to_users_queue = ManyRelatedFieldWithNoneCleanup(
+        child_relation=PrimaryKeyRelatedFieldWithNoneValue(allow_null=True, queryset=User.objects)
+    )
+    pause_escalation = serializers.BooleanField(default=False)
+
+
+class EscalationStateSerializer(serializers.Serializer):
+    """Fields of EscalationSnapshotSerializer changed by escalation steps, serialized the same way"""
+
+    last_active_escalation_policy_order = serializers.IntegerField(allow_null=True, default=None)
+    pause_escalation = serializers.BooleanField(allow_null=True, default=False)
+    next_step_eta = serializers.DateTimeField(allow_null=True, default=None)
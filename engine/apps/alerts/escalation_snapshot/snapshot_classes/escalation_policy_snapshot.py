@@ -13,6 +13,7 @@ from apps.alerts.tasks import (
     notify_all_task,
     notify_group_task,
     notify_user_task,
+    notify_users_task,
     resolve_by_last_step_task,
 )
 from apps.schedules.ical_utils import list_users_to_notify_from_ical
@@ -217,29 +218,32 @@ class EscalationPolicySnapshot:
                 escalation_policy_step=self.step,
             )
 
-            for user in self.notify_to_users_queue:
-                notify_task = notify_user_task.signature(
-                    (
-                        user.pk,
-                        alert_group.pk,
-                    ),
-                    {
-                        "reason": reason,
-                        "important": self.step == EscalationPolicy.STEP_NOTIFY_MULTIPLE_USERS_IMPORTANT,
-                    },
-                    immutable=True,
-                )
-
-                tasks.append(notify_task)
+            notify_task = notify_users_task.signature(
+                (
+                    [user.pk for user in self.notify_to_users_queue],
+                    alert_group.pk,
+                ),
+                {
+                    "reason": reason,
+                    "important": self.step == EscalationPolicy.STEP_NOTIFY_MULTIPLE_USERS_IMPORTANT,
+                },
+                immutable=True,
+            )
+            tasks.append(notify_task)
 
-                AlertGroupLogRecord(
-                    type=AlertGroupLogRecord.TYPE_ESCALATION_TRIGGERED,
-                    author=user,
-                    alert_group=alert_group,
-                    reason=reason,
-                    escalation_policy=escalation_policy,
-                    escalation_policy_step=self.step,
-                ).save()
+            AlertGroupLogRecord.objects.bulk_create(
+                [
+                    AlertGroupLogRecord(
+                        type=AlertGroupLogRecord.TYPE_ESCALATION_TRIGGERED,
+                        author=user,
+                        alert_group=alert_group,
+                        reason=reason,
+                        escalation_policy=escalation_policy,
+                        escalation_policy_step=self.step,
+                    )
+                    for user in self.notify_to_users_queue
+                ]
+            )
         else:
             log_record = AlertGroupLogRecord(
                 type=AlertGroupLogRecord.TYPE_ESCALATION_FAILED,
@@ -297,30 +301,33 @@ class EscalationPolicySnapshot:
                 )
                 self.notify_to_users_queue = notify_to_users_list
 
-                for notify_to_user in notify_to_users_list:
-                    reason = "user is on duty by schedule ({}) defined in iCal".format(on_call_schedule.name)
-                    notify_task = notify_user_task.signature(
-                        (
-                            notify_to_user.pk,
-                            alert_group.pk,
-                        ),
-                        {
-                            "reason": reason,
-                            "important": self.step == EscalationPolicy.STEP_NOTIFY_SCHEDULE_IMPORTANT,
-                        },
-                        immutable=True,
-                    )
-
-                    tasks.append(notify_task)
+                reason = "user is on duty by schedule ({}) defined in iCal".format(on_call_schedule.name)
+                notify_task = notify_users_task.signature(
+                    (
+                        [notify_to_user.pk for notify_to_user in notify_to_users_list],
+                        alert_group.pk,
+                    ),
+                    {
+                        "reason": reason,
+                        "important": self.step == EscalationPolicy.STEP_NOTIFY_SCHEDULE_IMPORTANT,
+                    },
+                    immutable=True,
+                )
+                tasks.append(notify_task)
 
-                    AlertGroupLogRecord(
-                        type=AlertGroupLogRecord.TYPE_ESCALATION_TRIGGERED,
-                        author=notify_to_user,
-                        alert_group=alert_group,
-                        reason=reason,
-                        escalation_policy=escalation_policy,
-                        escalation_policy_step=self.step,
-                    ).save()
+                AlertGroupLogRecord.objects.bulk_create(
+                    [
+                        AlertGroupLogRecord(
+                            type=AlertGroupLogRecord.TYPE_ESCALATION_TRIGGERED,
+                            author=notify_to_user,
+                            alert_group=alert_group,
+                            reason=reason,
+                            escalation_policy=escalation_policy,
+                            escalation_policy_step=self.step,
+                        )
+                        for notify_to_user in notify_to_users_list
+                    ]
+                )
         log_record.save()
         self._execute_tasks(tasks)
 
@@ -3,6 +3,7 @@ from typing import Optional
 
 from celery.utils.log import get_task_logger
 
+from apps.alerts.escalation_snapshot.escalation_state import serialize_escalation_state
 from apps.alerts.escalation_snapshot.serializers import EscalationSnapshotSerializer
 from apps.alerts.escalation_snapshot.snapshot_classes.escalation_policy_snapshot import EscalationPolicySnapshot
 from apps.alerts.models.alert_group_log_record import AlertGroupLogRecord
@@ -73,11 +74,21 @@ class EscalationSnapshot:
 
     def save_to_alert_group(self) -> None:
         self.alert_group.raw_escalation_snapshot = self.convert_to_dict()
-        self.alert_group.save(update_fields=["raw_escalation_snapshot"])
+        # the whole snapshot includes the runtime state
+        self.alert_group.raw_escalation_state = None
+        self.alert_group.save(update_fields=["raw_escalation_snapshot", "raw_escalation_state"])
+
+    def save_state_to_alert_group(self, update_fields=()) -> None:
+        """Save only runtime state of escalation instead of rewriting the whole snapshot after an escalation step"""
+        self.alert_group.raw_escalation_state = self.convert_state_to_dict()
+        self.alert_group.save(update_fields=["raw_escalation_state", *update_fields])
 
     def convert_to_dict(self) -> dict:
         return self.serializer(self).data
 
+    def convert_state_to_dict(self) -> dict:
+        return serialize_escalation_state(self)
+
     def execute_actual_escalation_step(self) -> None:
         """
         Executes actual escalation step and saves result of execution like stop_escalation param and eta,
@@ -1,5 +1,6 @@
 from .alert_templater import TemplateLoader  # noqa: F401
 from .classic_markdown_templater import AlertClassicMarkdownTemplater  # noqa: F401
+from .group_data_templater import get_group_data_templater  # noqa: F401
 from .phone_call_templater import AlertPhoneCallTemplater  # noqa: F401
 from .slack_templater import AlertSlackTemplater  # noqa: F401
 from .sms_templater import AlertSmsTemplater  # noqa: F401
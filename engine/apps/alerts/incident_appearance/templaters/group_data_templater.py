@@ -0,0 +1,165 @@
+import hashlib
+import logging
+import threading
+import typing
+from collections import OrderedDict
+
+from django.apps import apps
+
+from common.jinja_templater.apply_jinja_template import (
+    JinjaTemplateError,
+    JinjaTemplateWarning,
+    compile_jinja_template,
+    render_compiled_jinja_template,
+)
+
+from .alert_templater import TemplateLoader
+
+logger = logging.getLogger(__name__)
+
+GROUP_DATA_TEMPLATERS_MAX_SIZE = 1000
+
+
+class CompiledAttrTemplate(typing.NamedTuple):
+    template: str
+    compiled_template: typing.Any
+    # compilation error, raised anew on each render to keep apply_jinja_template behaviour.
+    # The exception itself isn't kept, its traceback would keep the frames of the compilation alive.
+    error_class: typing.Optional[typing.Type[Exception]]
+    error_args: tuple
+
+    @classmethod
+    def compile(cls, template: typing.Optional[str]) -> typing.Optional["CompiledAttrTemplate"]:
+        if template is None:
+            return None
+        try:
+            return cls(template, compile_jinja_template(template), None, ())
+        except (JinjaTemplateError, JinjaTemplateWarning) as e:
+            return cls(template, None, type(e), e.args)
+
+    def render(self, payload):
+        if self.error_class is not None:
+            raise self.error_class(*self.error_args)
+        return render_compiled_jinja_template(self.compiled_template, self.template, payload=payload)
+
+
+class GroupDataTemplater:
+    """
+    Templates used by Alert.render_group_data for a single AlertReceiveChannel, resolved and compiled once.
+    get_group_data_templater keeps one per integration and rebuilds it when any of its templates is changed.
+    """
+
+    def __init__(self, alert_receive_channel, version):
+        template_manager = TemplateLoader()
+
+        self.version = version
+        self.alert_receive_channel_public_primary_key = alert_receive_channel.public_primary_key
+        # empty web title is not rendered, web_title_cache is None then
+        self.web_title_template = CompiledAttrTemplate.compile(
+            template_manager.get_attr_template("title", alert_receive_channel, render_for="web") or None
+        )
+        self.grouping_id_template = CompiledAttrTemplate.compile(
+            template_manager.get_attr_template("grouping_id", alert_receive_channel)
+        )
+        self.resolve_condition_template = CompiledAttrTemplate.compile(
+            template_manager.get_attr_template("resolve_condition", alert_receive_channel)
+        )
+        self.acknowledge_condition_template = CompiledAttrTemplate.compile(
+            template_manager.get_attr_template("acknowledge_condition", alert_receive_channel)
+        )
+
+    @staticmethod
+    def get_version(alert_receive_channel) -> tuple:
+        """
+        Everything the resolved templates depend on. Only web templates have a modification timestamp,
+        so the template fields are compared as well.
+        """
+        return (
+            alert_receive_channel.integration,
+            alert_receive_channel.web_templates_modified_at,
+            alert_receive_channel.web_title_template,
+            alert_receive_channel.get_template_attribute("web", "title"),
+            alert_receive_channel.grouping_id_template,
+            alert_receive_channel.resolve_condition_template,
+            alert_receive_channel.acknowledge_condition_template,
+        )
+
+    def _render_condition(self, attr_template, name, raw_request_data):
+        if attr_template is None:
+            return False
+        try:
+            is_condition_met = attr_template.render(raw_request_data)
+        except (JinjaTemplateError, JinjaTemplateWarning) as e:
+            logger.warning(
+                f"{name} error on channel={self.alert_receive_channel_public_primary_key}: {e.fallback_message}"
+            )
+            return False
+        return is_condition_met.strip().lower() in ["1", "true", "ok"]
+
+    def render(self, raw_request_data, is_demo=False):
+        AlertGroup = apps.get_model("alerts", "AlertGroup")
+        Alert = apps.get_model("alerts", "Alert")
+
+        # set web_title_cache to web title to allow alert group searching based on web_title_cache
+        web_title_cache = None
+        if self.web_title_template:
+            try:
+                web_title_cache = self.web_title_template.render(raw_request_data)
+            except (JinjaTemplateError, JinjaTemplateWarning) as e:
+                web_title_cache = e.fallback_message
+                logger.warning(
+                    f"web_title_cache error on channel={self.alert_receive_channel_public_primary_key}: "
+                    f"{e.fallback_message}"
+                )
+
+        group_distinction = None
+        if self.grouping_id_template is not None:
+            try:
+                group_distinction = self.grouping_id_template.render(raw_request_data)
+            except (JinjaTemplateError, JinjaTemplateWarning) as e:
+                logger.warning(
+                    f"grouping_id_template error on channel={self.alert_receive_channel_public_primary_key}: "
+                    f"{e.fallback_message}"
+                )
+
+        # Insert random uuid to prevent grouping of demo alerts or alerts with group_distinction=None
+        if is_demo or not group_distinction:
+            group_distinction = Alert.insert_random_uuid(group_distinction)
+
+        if group_distinction is not None:
+            group_distinction = hashlib.md5(str(group_distinction).encode()).hexdigest()
+
+        return AlertGroup.GroupData(
+            is_resolve_signal=self._render_condition(
+                self.resolve_condition_template, "resolve_condition_template", raw_request_data
+            ),
+            is_acknowledge_signal=self._render_condition(
+                self.acknowledge_condition_template, "acknowledge_condition_template", raw_request_data
+            ),
+            group_distinction=group_distinction,
+            web_title_cache=web_title_cache,
+        )
+
+
+_group_data_templaters: OrderedDict[int, GroupDataTemplater] = OrderedDict()
+_group_data_templaters_lock = threading.Lock()
+
+
+def get_group_data_templater(alert_receive_channel) -> GroupDataTemplater:
+    version = GroupDataTemplater.get_version(alert_receive_channel)
+
+    with _group_data_templaters_lock:
+        templater = _group_data_templaters.get(alert_receive_channel.pk)
+        if templater is not None and templater.version == version:
+            _group_data_templaters.move_to_end(alert_receive_channel.pk)
+            return templater
+
+    templater = GroupDataTemplater(alert_receive_channel, version)
+
+    with _group_data_templaters_lock:
+        _group_data_templaters[alert_receive_channel.pk] = templater
+        _group_data_templaters.move_to_end(alert_receive_channel.pk)
+        while len(_group_data_templaters) > GROUP_DATA_TEMPLATERS_MAX_SIZE:
+            _group_data_templaters.popitem(last=False)
+
+    return templater
@@ -656,9 +656,9 @@ class IncidentLogBuilder:
                     # last passed step order + 1
                     notification_policy_order = last_user_log.notification_policy.order + 1
 
-        notification_policies = UserNotificationPolicy.objects.filter(user=user_to_notify, important=important)
+        notification_plan = UserNotificationPolicy.get_notification_plan(user_to_notify.pk, important)
 
-        for notification_policy in notification_policies:
+        for notification_policy in notification_plan:
             future_notification = notification_policy.order >= notification_policy_order
             if notification_policy.step == UserNotificationPolicy.Step.WAIT:
                 wait_delay = notification_policy.wait_delay
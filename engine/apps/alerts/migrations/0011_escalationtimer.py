@@ -0,0 +1,23 @@
+# Generated by Django 3.2.17 on 2023-03-20 10:00
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('alerts', '0010_channelfilter_filtering_term_type'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EscalationTimer',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('escalation_id', models.CharField(max_length=100)),
+                ('eta', models.DateTimeField(db_index=True)),
+                ('alert_group', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='escalation_timer', to='alerts.alertgroup')),
+            ],
+        ),
+    ]
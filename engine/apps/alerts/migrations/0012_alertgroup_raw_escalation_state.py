@@ -0,0 +1,18 @@
+# Generated by Django 3.2.17 on 2023-03-21 10:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('alerts', '0011_escalationtimer'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='alertgroup',
+            name='raw_escalation_state',
+            field=models.JSONField(default=None, null=True),
+        ),
+    ]
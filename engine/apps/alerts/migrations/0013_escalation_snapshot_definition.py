@@ -0,0 +1,27 @@
+# Generated by Django 3.2.17 on 2023-03-22 10:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('alerts', '0012_alertgroup_raw_escalation_state'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EscalationSnapshotDefinition',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('version', models.CharField(max_length=64, unique=True)),
+                ('raw_definition', models.JSONField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='alertgroup',
+            name='escalation_definition_version',
+            field=models.CharField(default=None, max_length=64, null=True),
+        ),
+    ]
@@ -4,10 +4,12 @@ from .alert_group_counter import AlertGroupCounter  # noqa: F401
 from .alert_group_log_record import AlertGroupLogRecord, listen_for_alertgrouplogrecord  # noqa: F401
 from .alert_manager_models import AlertForAlertManager, AlertGroupForAlertManager  # noqa: F401
 from .alert_receive_channel import AlertReceiveChannel, listen_for_alertreceivechannel_model_save  # noqa: F401
-from .channel_filter import ChannelFilter  # noqa: F401
+from .channel_filter import ChannelFilter, listen_for_channel_filter_model_change  # noqa: F401
 from .custom_button import CustomButton  # noqa: F401
 from .escalation_chain import EscalationChain  # noqa: F401
 from .escalation_policy import EscalationPolicy  # noqa: F401
+from .escalation_snapshot_definition import EscalationSnapshotDefinition  # noqa: F401
+from .escalation_timer import EscalationTimer  # noqa: F401
 from .grafana_alerting_contact_point import GrafanaAlertingContactPoint  # noqa: F401
 from .invitation import Invitation  # noqa: F401
 from .maintainable_object import MaintainableObject  # noqa: F401
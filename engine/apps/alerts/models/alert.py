@@ -1,4 +1,3 @@
-import hashlib
 import logging
 from uuid import uuid4
 
@@ -10,10 +9,8 @@ from django.db.models import JSONField
 from django.db.models.signals import post_save
 
 from apps.alerts.constants import TASK_DELAY_SECONDS
-from apps.alerts.incident_appearance.templaters import TemplateLoader
-from apps.alerts.tasks import distribute_alert, send_alert_group_signal
-from common.jinja_templater import apply_jinja_template
-from common.jinja_templater.apply_jinja_template import JinjaTemplateError, JinjaTemplateWarning
+from apps.alerts.incident_appearance.templaters import get_group_data_templater
+from apps.alerts.tasks import distribute_alert, schedule_grouped_alerts_distribution, send_alert_group_signal
 from common.public_primary_keys import generate_public_primary_key, increase_public_primary_key_length
 
 logger = logging.getLogger(__name__)
@@ -34,6 +31,28 @@ def generate_public_primary_key_for_alert():
     return new_public_primary_key
 
 
+def generate_public_primary_keys_for_alerts(count):
+    """
+    Generate public primary keys for alerts created in bulk, checking them for collisions with a single query.
+    """
+    prefix = "A"
+    new_public_primary_keys = set()
+    while len(new_public_primary_keys) < count:
+        new_public_primary_keys.add(generate_public_primary_key(prefix))
+
+    existing_public_primary_keys = set(
+        Alert.objects.filter(public_primary_key__in=new_public_primary_keys).values_list(
+            "public_primary_key", flat=True
+        )
+    )
+    new_public_primary_keys -= existing_public_primary_keys
+    # collisions are rare, resolve them one by one
+    while len(new_public_primary_keys) < count:
+        new_public_primary_keys.add(generate_public_primary_key_for_alert())
+
+    return list(new_public_primary_keys)
+
+
 class Alert(models.Model):
     public_primary_key = models.CharField(
         max_length=20,
@@ -81,13 +100,15 @@ class Alert(models.Model):
         is_demo=False,
         channel_filter=None,
         force_route_id=None,
+        group_data=None,
     ):
         ChannelFilter = apps.get_model("alerts", "ChannelFilter")
         AlertGroup = apps.get_model("alerts", "AlertGroup")
         AlertReceiveChannel = apps.get_model("alerts", "AlertReceiveChannel")
         AlertGroupLogRecord = apps.get_model("alerts", "AlertGroupLogRecord")
 
-        group_data = Alert.render_group_data(alert_receive_channel, raw_request_data, is_demo)
+        if group_data is None:
+            group_data = Alert.render_group_data(alert_receive_channel, raw_request_data, is_demo)
         if channel_filter is None:
             channel_filter = ChannelFilter.select_filter(alert_receive_channel, raw_request_data, force_route_id)
 
@@ -153,6 +174,31 @@ class Alert(models.Model):
 
         return alert
 
+    @classmethod
+    def bulk_create_for_group(cls, alert_group, alerts_data):
+        """
+        Create alerts which join an already existing alert group with a single INSERT.
+        alerts_data is a list of (raw_request_data, group_data) of alerts without title, message, image and link.
+        Unlike Alert.create it doesn't change the alert group state, so it's only meant for alerts which wouldn't
+        change it in Alert.create either. post_save is not sent for the created alerts, distribution of the whole
+        batch is scheduled once instead.
+        """
+        public_primary_keys = generate_public_primary_keys_for_alerts(len(alerts_data))
+        alerts = cls.objects.bulk_create(
+            [
+                cls(
+                    public_primary_key=public_primary_key,
+                    is_resolve_signal=group_data.is_resolve_signal,
+                    group=alert_group,
+                    raw_request_data=raw_request_data,
+                    is_the_first_alert_in_group=False,
+                )
+                for public_primary_key, (raw_request_data, group_data) in zip(public_primary_keys, alerts_data)
+            ]
+        )
+        schedule_grouped_alerts_distribution(alert_group.pk)
+        return alerts
+
     def wipe(self, wiped_by, wiped_at):
         wiped_by_user_verbal = "by " + wiped_by.username
 
@@ -175,79 +221,7 @@ class Alert(models.Model):
 
     @classmethod
     def render_group_data(cls, alert_receive_channel, raw_request_data, is_demo=False):
-        AlertGroup = apps.get_model("alerts", "AlertGroup")
-
-        template_manager = TemplateLoader()
-
-        is_resolve_signal = False
-        is_acknowledge_signal = False
-        group_distinction = None
-
-        acknowledge_condition_template = template_manager.get_attr_template(
-            "acknowledge_condition", alert_receive_channel
-        )
-        resolve_condition_template = template_manager.get_attr_template("resolve_condition", alert_receive_channel)
-        grouping_id_template = template_manager.get_attr_template("grouping_id", alert_receive_channel)
-
-        # set web_title_cache to web title to allow alert group searching based on web_title_cache
-        web_title_template = template_manager.get_attr_template("title", alert_receive_channel, render_for="web")
-        if web_title_template:
-            try:
-                web_title_cache = apply_jinja_template(web_title_template, raw_request_data)
-            except (JinjaTemplateError, JinjaTemplateWarning) as e:
-                web_title_cache = e.fallback_message
-                logger.warning(
-                    f"web_title_cache error on channel={alert_receive_channel.public_primary_key}: {e.fallback_message}"
-                )
-        else:
-            web_title_cache = None
-
-        if grouping_id_template is not None:
-            try:
-                group_distinction = apply_jinja_template(grouping_id_template, raw_request_data)
-            except (JinjaTemplateError, JinjaTemplateWarning) as e:
-                logger.warning(
-                    f"grouping_id_template error on channel={alert_receive_channel.public_primary_key}: {e.fallback_message}"
-                )
-
-        # Insert random uuid to prevent grouping of demo alerts or alerts with group_distinction=None
-        if is_demo or not group_distinction:
-            group_distinction = cls.insert_random_uuid(group_distinction)
-
-        if group_distinction is not None:
-            group_distinction = hashlib.md5(str(group_distinction).encode()).hexdigest()
-
-        if resolve_condition_template is not None:
-            try:
-                is_resolve_signal = apply_jinja_template(resolve_condition_template, payload=raw_request_data)
-            except (JinjaTemplateError, JinjaTemplateWarning) as e:
-                logger.warning(
-                    f"resolve_condition_template error on channel={alert_receive_channel.public_primary_key}: {e.fallback_message}"
-                )
-
-            if isinstance(is_resolve_signal, str):
-                is_resolve_signal = is_resolve_signal.strip().lower() in ["1", "true", "ok"]
-            else:
-                is_resolve_signal = False
-        if acknowledge_condition_template is not None:
-            try:
-                is_acknowledge_signal = apply_jinja_template(acknowledge_condition_template, payload=raw_request_data)
-            except (JinjaTemplateError, JinjaTemplateWarning) as e:
-                logger.warning(
-                    f"acknowledge_condition_template error on channel={alert_receive_channel.public_primary_key}: {e.fallback_message}"
-                )
-
-            if isinstance(is_acknowledge_signal, str):
-                is_acknowledge_signal = is_acknowledge_signal.strip().lower() in ["1", "true", "ok"]
-            else:
-                is_acknowledge_signal = False
-
-        return AlertGroup.GroupData(
-            is_resolve_signal=is_resolve_signal,
-            is_acknowledge_signal=is_acknowledge_signal,
-            group_distinction=group_distinction,
-            web_title_cache=web_title_cache,
-        )
+        return get_group_data_templater(alert_receive_channel).render(raw_request_data, is_demo)
 
     @staticmethod
     def insert_random_uuid(distinction):
@@ -265,16 +239,15 @@ def listen_for_alert_model_save(sender, instance, created, *args, **kwargs):
     Here we invoke AlertShootingStep by model saving action.
     """
     if created:
-        # RFCT - why additinal save ?
-        instance.save()
-
         group = instance.group
         # Store exact alert which resolved group.
         if group.resolved_by == AlertGroup.SOURCE and group.resolved_by_alert is None:
             group.resolved_by_alert = instance
             group.save(update_fields=["resolved_by_alert"])
 
-        if settings.DEBUG:
+        if not instance.is_the_first_alert_in_group:
+            schedule_grouped_alerts_distribution(group.pk)
+        elif settings.DEBUG:
             distribute_alert(instance.pk)
         else:
             distribute_alert.apply_async((instance.pk,), countdown=TASK_DELAY_SECONDS)
@@ -55,15 +55,15 @@ class AlertGroupQuerySet(models.QuerySet):
     def create(self, **kwargs):
         organization = kwargs["channel"].organization
 
-        inside_organization_number = AlertGroupCounter.objects.get_value(organization=organization) + 1
+        inside_organization_number = AlertGroupCounter.objects.get_value(organization=organization)
         return super().create(**kwargs, inside_organization_number=inside_organization_number)
 
     def get_or_create_grouping(self, channel, channel_filter, group_data):
         """
         This method is similar to default Django QuerySet.get_or_create(), please see the original get_or_create method.
         The difference is that this method is trying to get an object using multiple queries with different filters.
-        Also, "create" is invoked without transaction.atomic to reduce number of ConcurrentUpdateError's which can be
-        raised in AlertGroupQuerySet.create() due to optimistic locking of AlertGroupCounter model.
+        Also, "create" is invoked without transaction.atomic to keep the AlertGroupCounter row lock taken in
+        AlertGroupQuerySet.create() as short as possible.
         """
         search_params = {
             "channel": channel,
@@ -336,6 +336,10 @@ class AlertGroup(AlertGroupSlackRenderingMixin, EscalationSnapshotMixin, models.
     maintenance_uuid = models.CharField(max_length=100, unique=True, null=True, default=None)
 
     raw_escalation_snapshot = JSONField(null=True, default=None)
+    # version of EscalationSnapshotDefinition used instead of raw_escalation_snapshot if it's not set
+    escalation_definition_version = models.CharField(max_length=64, null=True, default=None)
+    # escalation steps save their changes of raw_escalation_snapshot here instead of rewriting it
+    raw_escalation_state = JSONField(null=True, default=None)
     estimate_escalation_finish_time = models.DateTimeField(null=True, default=None)
 
     # This field is used for constraints so we can use get_or_create() in concurrent calls
@@ -1,27 +1,104 @@
-from django.db import models
+import threading
+import time
 
-
-class ConcurrentUpdateError(Exception):
-    pass
+from django.conf import settings
+from django.db import models, transaction
+from django.db.models import F
 
 
 class AlertGroupCounterQuerySet(models.QuerySet):
     def get_value(self, organization):
-        counter, _ = self.get_or_create(organization=organization)
+        """
+        Return next inside_organization_number for the organization.
+        """
+        return alert_group_number_allocator.allocate(organization.pk)
+
+    def reserve_block(self, organization_id, size):
+        """
+        Reserve `size` consecutive values for the organization and return the last one.
+        The increment is a single UPDATE, so concurrent reservations wait for each other instead of failing.
+        """
+        self.get_or_create(organization_id=organization_id)
+        with transaction.atomic():
+            self.filter(organization_id=organization_id).update(value=F("value") + size)
+            # the row is locked by the UPDATE above until commit, so the value read here is the one just reserved
+            return self.filter(organization_id=organization_id).values_list("value", flat=True).get()
+
+
+class AlertGroupNumberAllocator:
+    """
+    Per-process allocator of inside_organization_number's.
+    Values are reserved from AlertGroupCounter in blocks. A block is a single value while alert groups are created
+    at a normal pace, so numbers stay sequential. When an organization runs out of its block within BURST_WINDOW
+    seconds the next block is doubled (up to max_block_size), so alert storms take one DB round trip per block.
+    Unused values of a block are lost when the process exits.
+    Values reserved inside an outer transaction are not kept in a block, since a rollback would hand them out again.
+    """
+
+    BURST_WINDOW = 1
+
+    def __init__(self, max_block_size):
+        self.max_block_size = max_block_size
+        # guards _blocks and _organization_locks only, it's never held during DB queries
+        self._lock = threading.Lock()
+        # reservations of the same organization wait for each other, other organizations are not blocked
+        self._organization_locks = {}
+        # {organization_id: [next_value, last_value, block_size, reserved_at]}
+        self._blocks = {}
+
+    def allocate(self, organization_id):
+        value = self._take_from_block(organization_id)
+        if value is not None:
+            return value
+
+        with self._get_organization_lock(organization_id):
+            # another thread may have reserved a block while this one was waiting
+            value = self._take_from_block(organization_id)
+            if value is not None:
+                return value
+
+            with self._lock:
+                block = self._blocks.get(organization_id)
+            now = time.monotonic()
+            block_size = 1
+            if block is not None and now - block[3] < self.BURST_WINDOW:
+                block_size = min(block[2] * 2, self.max_block_size)
+            if transaction.get_connection().in_atomic_block:
+                block_size = 1
+
+            last_value = AlertGroupCounter.objects.reserve_block(organization_id, block_size)
+            first_value = last_value - block_size + 1
+            with self._lock:
+                self._blocks[organization_id] = [first_value + 1, last_value, block_size, now]
+            return first_value
+
+    def _take_from_block(self, organization_id):
+        with self._lock:
+            block = self._blocks.get(organization_id)
+            if block is None or block[0] > block[1]:
+                return None
+            value = block[0]
+            block[0] += 1
+            return value
+
+    def _get_organization_lock(self, organization_id):
+        with self._lock:
+            return self._organization_locks.setdefault(organization_id, threading.Lock())
+
+    def reset(self):
+        with self._lock:
+            self._blocks.clear()
+            self._organization_locks.clear()
 
-        num_updated_rows = self.filter(organization=organization, value=counter.value).update(value=counter.value + 1)
-        if num_updated_rows == 0:
-            raise ConcurrentUpdateError()
 
-        return counter.value
+alert_group_number_allocator = AlertGroupNumberAllocator(max_block_size=settings.ALERT_GROUP_COUNTER_MAX_BLOCK_SIZE)
 
 
 class AlertGroupCounter(models.Model):
     """
     This model is used to assign unique, increasing inside_organization_number's for alert groups.
-    It uses optimistic locking to get values and raises ConcurrentUpdateError exception in case of concurrent updates.
-    This is used on alert group creation in order to not block Celery workers with select_for_update and give space
-    to other tasks to run in case of high load on alert group creation.
+    Values are handed out in blocks by AlertGroupNumberAllocator, so alert group creation doesn't contend on this row
+    during alert storms.
     """
 
     objects = models.Manager.from_queryset(AlertGroupCounterQuerySet)()
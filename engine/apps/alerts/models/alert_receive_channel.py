@@ -20,8 +20,9 @@ from apps.alerts.integration_options_mixin import IntegrationOptionsMixin
 from apps.alerts.models.maintainable_object import MaintainableObject
 from apps.alerts.tasks import disable_maintenance, sync_grafana_alerting_contact_points
 from apps.base.messaging import get_messaging_backend_from_id
+from apps.integrations.channel_resolver import invalidate_channel_record
 from apps.integrations.metadata import heartbeat
-from apps.integrations.tasks import create_alert, create_alertmanager_alerts
+from apps.integrations.tasks import create_alert, create_alertmanager_alerts_batch
 from apps.slack.constants import SLACK_RATE_LIMIT_DELAY, SLACK_RATE_LIMIT_TIMEOUT
 from apps.slack.tasks import post_slack_rate_limit_message
 from apps.slack.utils import post_message_to_channel
@@ -544,16 +545,15 @@ class AlertReceiveChannel(IntegrationOptionsMixin, MaintainableObject):
         logger.info(f"send_demo_alert integration={self.pk} force_route_id={force_route_id}")
         if self.is_demo_alert_enabled:
             if self.has_alertmanager_payload_structure:
-                for alert in self.config.example_payload.get("alerts", []):
-                    create_alertmanager_alerts.apply_async(
-                        [],
-                        {
-                            "alert_receive_channel_pk": self.pk,
-                            "alert": alert,
-                            "is_demo": True,
-                            "force_route_id": force_route_id,
-                        },
-                    )
+                create_alertmanager_alerts_batch.apply_async(
+                    [],
+                    {
+                        "alert_receive_channel_pk": self.pk,
+                        "alerts": self.config.example_payload.get("alerts", []),
+                        "is_demo": True,
+                        "force_route_id": force_route_id,
+                    },
+                )
             else:
                 create_alert.apply_async(
                     [],
@@ -633,6 +633,9 @@ def listen_for_alertreceivechannel_model_save(sender, instance, created, *args,
     ChannelFilter = apps.get_model("alerts", "ChannelFilter")
     IntegrationHeartBeat = apps.get_model("heartbeat", "IntegrationHeartBeat")
 
+    # drop cached token resolution, so integration views pick up deletion, maintenance and name changes
+    invalidate_channel_record(instance.token)
+
     if created:
         write_resource_insight_log(instance=instance, author=instance.author, event=EntityEvent.CREATED)
         default_filter = ChannelFilter(alert_receive_channel=instance, filtering_term=None, is_default=True)
@@ -6,8 +6,12 @@ from django.apps import apps
 from django.conf import settings
 from django.core.validators import MinLengthValidator
 from django.db import models
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
 from ordered_model.models import OrderedModel
 
+from apps.alerts.route_matcher import get_route_matcher, invalidate_route_matcher
+
 from common.jinja_templater import apply_jinja_template
 from common.jinja_templater.apply_jinja_template import JinjaTemplateError, JinjaTemplateWarning
 from common.public_primary_keys import generate_public_primary_key, increase_public_primary_key_length
@@ -114,12 +118,16 @@ class ChannelFilter(OrderedModel):
                 )
                 pass
 
-        filters = cls.objects.filter(alert_receive_channel=alert_receive_channel)
+        satisfied_filter_pk = get_route_matcher(alert_receive_channel.pk).match(raw_request_data)
+        if satisfied_filter_pk is None:
+            return None
 
-        satisfied_filter = None
-        for _filter in filters:
-            if satisfied_filter is None and _filter.is_satisfying(raw_request_data):
-                satisfied_filter = _filter
+        satisfied_filter = cls.objects.filter(pk=satisfied_filter_pk).first()
+        if satisfied_filter is None:
+            # Route was deleted after the matcher was built, rebuild it and try again
+            invalidate_route_matcher(alert_receive_channel.pk)
+            satisfied_filter_pk = get_route_matcher(alert_receive_channel.pk).match(raw_request_data)
+            satisfied_filter = cls.objects.filter(pk=satisfied_filter_pk).first()
 
         return satisfied_filter
 
@@ -214,3 +222,9 @@ class ChannelFilter(OrderedModel):
             "integration": self.alert_receive_channel.insight_logs_verbal,
             "integration_id": self.alert_receive_channel.public_primary_key,
         }
+
+
+@receiver(post_save, sender=ChannelFilter)
+@receiver(post_delete, sender=ChannelFilter)
+def listen_for_channel_filter_model_change(sender, instance, *args, **kwargs):
+    invalidate_route_matcher(instance.alert_receive_channel_id)
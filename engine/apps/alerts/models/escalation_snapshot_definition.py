@@ -0,0 +1,13 @@
+from django.db import models
+
+
+class EscalationSnapshotDefinition(models.Model):
+    """
+    Raw escalation snapshot (channel filter, escalation chain and its escalation policies) shared by alert groups
+    escalated by the same version of escalation chain. It's stored once and addressed by hash of its content,
+    alert groups refer to it by AlertGroup.escalation_definition_version. Never modified.
+    """
+
+    version = models.CharField(max_length=64, unique=True)
+    raw_definition = models.JSONField()
+    created_at = models.DateTimeField(auto_now_add=True)
@@ -0,0 +1,18 @@
+from django.db import models
+
+
+class EscalationTimer(models.Model):
+    """
+    Next escalation step of an alert group due later than the next dispatch_escalation_timers run.
+    Stored instead of an escalate_alert_group task with ETA, so workers don't keep ETA messages of all active
+    escalations in memory. escalation_id is the task id escalate_alert_group is started with, so steps are
+    deduplicated by AlertGroup.active_escalation_id the same way as tasks with ETA.
+    """
+
+    alert_group = models.OneToOneField(
+        "alerts.AlertGroup",
+        on_delete=models.CASCADE,
+        related_name="escalation_timer",
+    )
+    escalation_id = models.CharField(max_length=100)  # ID generated by celery
+    eta = models.DateTimeField(db_index=True)
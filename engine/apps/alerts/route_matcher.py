@@ -0,0 +1,262 @@
+import json
+import logging
+import re
+import threading
+import typing
+from collections import OrderedDict
+from uuid import uuid4
+
+from django.apps import apps
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from common.jinja_templater import apply_jinja_template
+from common.jinja_templater.apply_jinja_template import JinjaTemplateError, JinjaTemplateWarning
+
+try:
+    from re import _parser as sre_parse  # Python 3.11+
+except ImportError:
+    import sre_parse
+
+logger = logging.getLogger(__name__)
+
+ROUTE_MATCHER_VERSION_CACHE_KEY = "route_matcher_version_{}"
+# Version keys are re-created on demand, TTL only keeps deleted integrations from piling up in the cache
+ROUTE_MATCHER_VERSION_CACHE_TIMEOUT = 60 * 60 * 24
+ROUTE_MATCHER_MAX_CACHED_CHANNELS = 1000
+
+
+class Route(typing.NamedTuple):
+    pk: int
+    is_default: bool
+    filtering_term: typing.Optional[str]
+    filtering_term_type: int
+    compiled_regex: typing.Optional[typing.Pattern]
+
+
+def _collect_required_literals(sequence) -> typing.List[str]:
+    literals = []
+    current = []
+    for op, av in sequence:
+        if op == sre_parse.LITERAL:
+            current.append(chr(av))
+            continue
+
+        if current:
+            literals.append("".join(current))
+            current = []
+
+        if op == sre_parse.SUBPATTERN:
+            _, add_flags, _, subsequence = av
+            if not add_flags & sre_parse.SRE_FLAG_IGNORECASE:
+                literals.extend(_collect_required_literals(subsequence))
+        elif op in (sre_parse.MAX_REPEAT, sre_parse.MIN_REPEAT):
+            min_repeat, _, subsequence = av
+            if min_repeat >= 1:
+                literals.extend(_collect_required_literals(subsequence))
+
+    if current:
+        literals.append("".join(current))
+    return literals
+
+
+def get_required_literal(pattern: str) -> typing.Optional[str]:
+    """
+    Return the longest literal every match of the regex pattern contains, or None if there is no such literal
+    or it can't be found reliably (e.g. for case-insensitive patterns).
+    """
+    try:
+        parsed = sre_parse.parse(pattern)
+    except re.error:
+        return None
+    if parsed.state.flags & sre_parse.SRE_FLAG_IGNORECASE:
+        return None
+    return max(_collect_required_literals(parsed), key=len, default=None)
+
+
+class RegexRoutePrefilter:
+    """
+    Excludes regex routes which can't match a payload, so only the remaining ones are evaluated in order.
+    Each regex route is represented by a literal which every match of its regex contains (see get_required_literal),
+    all literals are found by a single scan of the serialized payload.
+    Routes without such literal, jinja2 and default routes are always evaluated.
+    """
+
+    def __init__(self, routes: typing.List[Route]):
+        ChannelFilter = apps.get_model("alerts", "ChannelFilter")
+
+        self.routes = routes
+        self._always_evaluated_indexes = []
+        self._literal_route_indexes = {}
+        for index, route in enumerate(routes):
+            if route.is_default or route.filtering_term_type == ChannelFilter.FILTERING_TERM_TYPE_JINJA2:
+                self._always_evaluated_indexes.append(index)
+            elif route.compiled_regex is not None:
+                literal = get_required_literal(route.filtering_term)
+                if literal:
+                    self._literal_route_indexes.setdefault(literal, []).append(index)
+                else:
+                    self._always_evaluated_indexes.append(index)
+            # routes with invalid or empty regex never match
+
+        self._scanner = None
+        if self._literal_route_indexes:
+            # Longer literals go first, so a literal found at some position is the longest one starting there.
+            # Other literals starting at the same position are its prefixes, see _get_route_indexes.
+            literals = sorted(self._literal_route_indexes, key=len, reverse=True)
+            self._scanner = re.compile("(?=(" + "|".join(re.escape(literal) for literal in literals) + "))")
+        self._implied_route_indexes = {}
+
+    def _get_route_indexes(self, literal: str) -> typing.List[int]:
+        """
+        Indexes of routes whose literal is present in a payload containing the given literal.
+        """
+        route_indexes = self._implied_route_indexes.get(literal)
+        if route_indexes is None:
+            route_indexes = [
+                index
+                for other_literal, indexes in self._literal_route_indexes.items()
+                if other_literal in literal
+                for index in indexes
+            ]
+            self._implied_route_indexes[literal] = route_indexes
+        return route_indexes
+
+    def get_candidate_routes(self, serialized_payload: str) -> typing.List[Route]:
+        route_indexes = set(self._always_evaluated_indexes)
+        if self._scanner is not None:
+            found_literals = set()
+            for match in self._scanner.finditer(serialized_payload):
+                literal = match.group(1)
+                if literal not in found_literals:
+                    found_literals.add(literal)
+                    route_indexes.update(self._get_route_indexes(literal))
+        return [self.routes[index] for index in sorted(route_indexes)]
+
+
+class RouteMatcher:
+    """
+    Precompiled routes of a single AlertReceiveChannel, in the same order as ChannelFilter.select_filter evaluates them.
+    Regexes are compiled once on build, the payload is serialized at most once per match call
+    and evaluation stops on the first satisfied route.
+    """
+
+    def __init__(
+        self,
+        alert_receive_channel_pk: int,
+        version: str,
+        routes: typing.List[Route],
+        prefilter: typing.Optional[RegexRoutePrefilter] = None,
+    ):
+        self.alert_receive_channel_pk = alert_receive_channel_pk
+        self.version = version
+        self.routes = routes
+        self.prefilter = prefilter
+
+    @classmethod
+    def build(cls, alert_receive_channel_pk: int, version: str) -> "RouteMatcher":
+        ChannelFilter = apps.get_model("alerts", "ChannelFilter")
+
+        routes = []
+        channel_filters = ChannelFilter.objects.filter(alert_receive_channel_id=alert_receive_channel_pk).values_list(
+            "pk", "is_default", "filtering_term", "filtering_term_type"
+        )
+        for pk, is_default, filtering_term, filtering_term_type in channel_filters:
+            compiled_regex = None
+            if (
+                not is_default
+                and filtering_term is not None
+                and filtering_term_type == ChannelFilter.FILTERING_TERM_TYPE_REGEX
+            ):
+                try:
+                    compiled_regex = re.compile(filtering_term)
+                except re.error:
+                    logger.error(f"channel_filter={pk} failed to parse regex={filtering_term}")
+            routes.append(Route(pk, is_default, filtering_term, filtering_term_type, compiled_regex))
+
+        prefilter = None
+        regex_routes_count = sum(route.compiled_regex is not None for route in routes)
+        if 0 < settings.ROUTE_REGEX_PREFILTER_MIN_ROUTES <= regex_routes_count:
+            prefilter = RegexRoutePrefilter(routes)
+
+        return cls(alert_receive_channel_pk, version, routes, prefilter)
+
+    def match(self, raw_request_data) -> typing.Optional[int]:
+        """
+        Return pk of the first route satisfying raw_request_data, or None.
+        """
+        ChannelFilter = apps.get_model("alerts", "ChannelFilter")
+
+        serialized_payload = None
+        routes = self.routes
+        if self.prefilter is not None:
+            serialized_payload = json.dumps(raw_request_data)
+            routes = self.prefilter.get_candidate_routes(serialized_payload)
+
+        for route in routes:
+            if route.is_default:
+                return route.pk
+
+            if route.filtering_term_type == ChannelFilter.FILTERING_TERM_TYPE_JINJA2:
+                try:
+                    is_matching = apply_jinja_template(route.filtering_term, payload=raw_request_data)
+                    if is_matching.strip().lower() in ["1", "true", "ok"]:
+                        return route.pk
+                except (JinjaTemplateError, JinjaTemplateWarning):
+                    logger.error(f"channel_filter={route.pk} failed to parse jinja2={route.filtering_term}")
+            elif route.compiled_regex is not None:
+                if serialized_payload is None:
+                    serialized_payload = json.dumps(raw_request_data)
+                if route.compiled_regex.search(serialized_payload):
+                    return route.pk
+
+        return None
+
+
+_route_matchers: OrderedDict[int, RouteMatcher] = OrderedDict()
+_route_matchers_lock = threading.Lock()
+
+
+def _get_route_matcher_version(alert_receive_channel_pk: int) -> str:
+    cache_key = ROUTE_MATCHER_VERSION_CACHE_KEY.format(alert_receive_channel_pk)
+    version = cache.get(cache_key)
+    if version is None:
+        cache.add(cache_key, uuid4().hex, timeout=ROUTE_MATCHER_VERSION_CACHE_TIMEOUT)
+        version = cache.get(cache_key)
+    return version
+
+
+def get_route_matcher(alert_receive_channel_pk: int) -> RouteMatcher:
+    """
+    Return route matcher for the integration, rebuilding it only if its routes were changed since the last build.
+    """
+    version = _get_route_matcher_version(alert_receive_channel_pk)
+
+    with _route_matchers_lock:
+        route_matcher = _route_matchers.get(alert_receive_channel_pk)
+        if route_matcher is not None and route_matcher.version == version:
+            _route_matchers.move_to_end(alert_receive_channel_pk)
+            return route_matcher
+
+    route_matcher = RouteMatcher.build(alert_receive_channel_pk, version)
+
+    with _route_matchers_lock:
+        _route_matchers[alert_receive_channel_pk] = route_matcher
+        _route_matchers.move_to_end(alert_receive_channel_pk)
+        while len(_route_matchers) > ROUTE_MATCHER_MAX_CACHED_CHANNELS:
+            _route_matchers.popitem(last=False)
+
+    return route_matcher
+
+
+def invalidate_route_matcher(alert_receive_channel_pk: int) -> None:
+    cache_key = ROUTE_MATCHER_VERSION_CACHE_KEY.format(alert_receive_channel_pk)
+
+    def bump_version():
+        cache.set(cache_key, uuid4().hex, timeout=ROUTE_MATCHER_VERSION_CACHE_TIMEOUT)
+
+    bump_version()
+    # Bump once more after commit, otherwise a matcher built from not yet committed routes
+    # would be stored under the new version and never rebuilt
+    transaction.on_commit(bump_version)
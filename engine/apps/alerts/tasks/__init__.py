@@ -10,14 +10,18 @@ from .create_contact_points_for_datasource import create_contact_points_for_data
 from .create_contact_points_for_datasource import schedule_create_contact_points_for_datasource  # noqa: F401
 from .custom_button_result import custom_button_result  # noqa: F401
 from .delete_alert_group import delete_alert_group  # noqa: F401
-from .distribute_alert import distribute_alert  # noqa: F401
-from .escalate_alert_group import escalate_alert_group  # noqa: F401
+from .distribute_alert import distribute_alert, schedule_grouped_alerts_distribution  # noqa: F401
+from .escalate_alert_group import (  # noqa: F401
+    dispatch_escalation_timers,
+    escalate_alert_group,
+    schedule_escalate_alert_group,
+)
 from .invite_user_to_join_incident import invite_user_to_join_incident  # noqa: F401
 from .maintenance import disable_maintenance  # noqa: F401
 from .notify_all import notify_all_task  # noqa: F401
 from .notify_group import notify_group_task  # noqa: F401
-from .notify_ical_schedule_shift import notify_ical_schedule_shift  # noqa: F401
-from .notify_user import notify_user_task  # noqa: F401
+from .notify_ical_schedule_shift import notify_ical_schedule_shift, schedule_notify_ical_schedule_shift  # noqa: F401
+from .notify_user import notify_user_task, notify_users_task  # noqa: F401
 from .resolve_alert_group_by_source_if_needed import resolve_alert_group_by_source_if_needed  # noqa: F401
 from .resolve_by_last_step import resolve_by_last_step_task  # noqa: F401
 from .send_alert_group_signal import send_alert_group_signal  # noqa: F401
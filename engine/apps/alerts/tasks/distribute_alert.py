@@ -1,5 +1,6 @@
 from django.apps import apps
 from django.conf import settings
+from django.core.cache import cache
 
 from apps.alerts.constants import TASK_DELAY_SECONDS
 from apps.alerts.signals import alert_create_signal
@@ -7,6 +8,8 @@ from common.custom_celery_tasks import shared_dedicated_queue_retry_task
 
 from .task_logger import task_logger
 
+DISTRIBUTE_GROUPED_ALERTS_CACHE_KEY = "distribute_grouped_alerts_{}"
+
 
 @shared_dedicated_queue_retry_task(
     autoretry_for=(Exception,), retry_backoff=True, max_retries=1 if settings.DEBUG else None, default_retry_delay=60
@@ -55,3 +58,42 @@ def send_alert_create_signal(alert_id):
             alert=alert_id,
         )
     task_logger.debug(f"Finished send_alert_create_signal task for alert {alert_id} ")
+
+
+def schedule_grouped_alerts_distribution(alert_group_pk):
+    """
+    Schedule distribution of alerts which joined an existing alert group.
+    alert_create_signal receivers only re-render the alert group for such alerts, so all alerts joining the group
+    within ALERT_DISTRIBUTION_COALESCE_WINDOW are distributed by a single task for the latest of them.
+    """
+    if settings.DEBUG:
+        distribute_grouped_alerts(alert_group_pk)
+        return
+
+    cache_key = DISTRIBUTE_GROUPED_ALERTS_CACHE_KEY.format(alert_group_pk)
+    # the key outlives the window only to let a lost task be rescheduled eventually
+    if cache.add(cache_key, True, timeout=settings.ALERT_DISTRIBUTION_COALESCE_WINDOW * 10):
+        distribute_grouped_alerts.apply_async((alert_group_pk,), countdown=settings.ALERT_DISTRIBUTION_COALESCE_WINDOW)
+
+
+@shared_dedicated_queue_retry_task(
+    autoretry_for=(Exception,), retry_backoff=True, max_retries=1 if settings.DEBUG else None, default_retry_delay=60
+)
+def distribute_grouped_alerts(alert_group_pk):
+    Alert = apps.get_model("alerts", "Alert")
+
+    # alerts created from now on schedule another task
+    cache.delete(DISTRIBUTE_GROUPED_ALERTS_CACHE_KEY.format(alert_group_pk))
+
+    alert_id = (
+        Alert.objects.filter(group_id=alert_group_pk, is_the_first_alert_in_group=False)
+        .order_by("-pk")
+        .values_list("pk", flat=True)
+        .first()
+    )
+    if alert_id is None:
+        task_logger.info(f"No alerts to distribute for alert_group {alert_group_pk}")
+        return
+
+    task_logger.debug(f"Distribute alert {alert_id} as the latest alert of alert_group {alert_group_pk}")
+    send_alert_create_signal.apply_async((alert_id,))
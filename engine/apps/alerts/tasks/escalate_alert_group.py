@@ -1,6 +1,9 @@
+import datetime
+
 from django.apps import apps
 from django.conf import settings
 from django.db import transaction
+from django.utils import timezone
 from kombu import uuid as celery_uuid
 
 from common.custom_celery_tasks import shared_dedicated_queue_retry_task
@@ -8,6 +11,39 @@ from common.custom_celery_tasks import shared_dedicated_queue_retry_task
 from .compare_escalations import compare_escalations
 from .task_logger import task_logger
 
+# same as dispatch_escalation_timers period in CELERY_BEAT_SCHEDULE
+ESCALATION_TIMERS_DISPATCH_INTERVAL = datetime.timedelta(seconds=30)
+ESCALATION_TIMERS_DISPATCH_BATCH_SIZE = 1000
+
+
+def is_escalation_step_for_timer(eta, now):
+    """Steps due before the next dispatch_escalation_timers run are sent to Celery with ETA right away"""
+    return (
+        settings.ESCALATION_TIMER_WHEEL_ENABLED and eta is not None and eta > now + ESCALATION_TIMERS_DISPATCH_INTERVAL
+    )
+
+
+def schedule_escalate_alert_group(alert_group_pk, task_id, eta=None, countdown=None):
+    """
+    Start escalate_alert_group task with task_id for the alert group at eta (or after countdown seconds).
+    Later steps are stored as EscalationTimer in the current transaction and sent by dispatch_escalation_timers,
+    sooner ones are sent with ETA on commit.
+    """
+    EscalationTimer = apps.get_model("alerts", "EscalationTimer")
+
+    now = timezone.now()
+    if countdown is not None:
+        eta = now + datetime.timedelta(seconds=countdown)
+
+    if is_escalation_step_for_timer(eta, now):
+        EscalationTimer.objects.update_or_create(
+            alert_group_id=alert_group_pk, defaults={"escalation_id": task_id, "eta": eta}
+        )
+    else:
+        transaction.on_commit(
+            lambda: escalate_alert_group.apply_async((alert_group_pk,), immutable=True, eta=eta, task_id=task_id)
+        )
+
 
 @shared_dedicated_queue_retry_task(
     autoretry_for=(Exception,), retry_backoff=True, max_retries=0 if settings.DEBUG else None
@@ -69,26 +105,68 @@ def escalate_alert_group(alert_group_pk):
 
         escalation_snapshot.execute_actual_escalation_step()
 
-        alert_group.raw_escalation_snapshot = escalation_snapshot.convert_to_dict()
-
         if escalation_snapshot.stop_escalation:
             alert_group.is_escalation_finished = True
-            alert_group.save(update_fields=["is_escalation_finished", "raw_escalation_snapshot"])
+            escalation_snapshot.save_state_to_alert_group(update_fields=["is_escalation_finished"])
             log_message += "Alert lifecycle finished. OnCall will be silent about this incident from now. "
         elif escalation_snapshot.pause_escalation:
-            alert_group.save(update_fields=["raw_escalation_snapshot"])
+            escalation_snapshot.save_state_to_alert_group()
             log_message += "Escalation is paused. "
         else:
             eta = escalation_snapshot.next_step_eta
 
             task_id = celery_uuid()
             alert_group.active_escalation_id = task_id
-            transaction.on_commit(
-                lambda: escalate_alert_group.apply_async((alert_group.pk,), immutable=True, eta=eta, task_id=task_id)
-            )
-            alert_group.save(update_fields=["active_escalation_id", "raw_escalation_snapshot"])
+            schedule_escalate_alert_group(alert_group.pk, task_id, eta=eta)
+            escalation_snapshot.save_state_to_alert_group(update_fields=["active_escalation_id"])
             log_message += "Next escalation poked, id: {} ".format(task_id)
 
         task_logger.debug(f"end of transaction in escalate_alert_group for alert_group {alert_group_pk}")
     task_logger.debug(f"Finish escalate_alert_group for alert_group {alert_group_pk}")
     return log_message + "Escalation executed."
+
+
+@shared_dedicated_queue_retry_task(
+    autoretry_for=(Exception,), retry_backoff=True, max_retries=1 if settings.DEBUG else None
+)
+def dispatch_escalation_timers():
+    """
+    Send escalate_alert_group tasks for escalation timers due before the next run of this task.
+    Timers are deleted and committed before tasks are sent, so a step is never sent twice: a re-sent task would have
+    the same id as active_escalation_id and escalate the alert group again. If sending fails, timers not sent yet are
+    restored and the task is retried.
+    """
+    EscalationTimer = apps.get_model("alerts", "EscalationTimer")
+
+    dispatch_until = timezone.now() + ESCALATION_TIMERS_DISPATCH_INTERVAL
+    dispatched = 0
+    while True:
+        with transaction.atomic():
+            timers = list(
+                EscalationTimer.objects.filter(eta__lte=dispatch_until)
+                .select_for_update(skip_locked=True)
+                .order_by("eta")
+                .values_list("pk", "alert_group_id", "escalation_id", "eta")[:ESCALATION_TIMERS_DISPATCH_BATCH_SIZE]
+            )
+            EscalationTimer.objects.filter(pk__in=[pk for pk, *_ in timers]).delete()
+
+        for idx, (_, alert_group_pk, escalation_id, eta) in enumerate(timers):
+            try:
+                escalate_alert_group.apply_async((alert_group_pk,), immutable=True, eta=eta, task_id=escalation_id)
+            except Exception:
+                # timers scheduled for the same alert groups in between are newer, they are kept
+                EscalationTimer.objects.bulk_create(
+                    [
+                        EscalationTimer(alert_group_id=alert_group_pk, escalation_id=escalation_id, eta=eta)
+                        for _, alert_group_pk, escalation_id, eta in timers[idx:]
+                    ],
+                    ignore_conflicts=True,
+                )
+                raise
+
+        dispatched += len(timers)
+        if len(timers) < ESCALATION_TIMERS_DISPATCH_BATCH_SIZE:
+            break
+
+    task_logger.debug(f"dispatch_escalation_timers: sent {dispatched} escalation steps due until {dispatch_until}")
+    return dispatched
@@ -5,7 +5,7 @@ from apps.slack.scenarios import scenario_step
 from apps.slack.tasks import check_slack_message_exists_before_post_message_to_thread
 from common.custom_celery_tasks import shared_dedicated_queue_retry_task
 
-from .notify_user import notify_user_task
+from .notify_user import notify_users_task
 from .task_logger import task_logger
 
 
@@ -57,7 +57,9 @@ def notify_group_task(alert_group_pk, escalation_policy_snapshot_order=None):
 
     usergroup_users = []
     if usergroup is not None:
-        usergroup_users = usergroup.get_users_from_members_for_organization(organization)
+        usergroup_users = usergroup.get_users_from_members_for_organization(organization).select_related(
+            "slack_user_identity"
+        )
 
     if len(usergroup_users) == 0:
         log_record = AlertGroupLogRecord(
@@ -73,23 +75,24 @@ def notify_group_task(alert_group_pk, escalation_policy_snapshot_order=None):
             escalation_policy_snapshot.notify_to_users_queue = usergroup_users
             escalation_snapshot.save_to_alert_group()
 
+        important = escalation_policy_step == EscalationPolicy.STEP_NOTIFY_GROUP_IMPORTANT
+        usergroup_users = [user for user in usergroup_users if user.is_notification_allowed]
+        notification_plans = UserNotificationPolicy.get_notification_plans(
+            [user.pk for user in usergroup_users], important
+        )
+
         usergroup_notification_plan = ""
+        reason = f"Membership in <!subteam^{usergroup.slack_id}> User Group"
         for user in usergroup_users:
-            if not user.is_notification_allowed:
-                continue
-
-            notification_policies = UserNotificationPolicy.objects.filter(
-                user=user,
-                important=escalation_policy_step == EscalationPolicy.STEP_NOTIFY_GROUP_IMPORTANT,
-            )
+            notification_policies = notification_plans[user.pk]
 
             if notification_policies:
                 usergroup_notification_plan += "\n_{} (".format(
-                    step.get_user_notification_message_for_thread_for_usergroup(user, notification_policies.first())
+                    step.get_user_notification_message_for_thread_for_usergroup(user, notification_policies[0])
                 )
 
             notification_channels = []
-            if notification_policies.filter(step=UserNotificationPolicy.Step.NOTIFY).count() == 0:
+            if not any(policy.step == UserNotificationPolicy.Step.NOTIFY for policy in notification_policies):
                 usergroup_notification_plan += "Empty notifications"
 
             for notification_policy in notification_policies:
@@ -98,27 +101,32 @@ def notify_group_task(alert_group_pk, escalation_policy_snapshot_order=None):
                         UserNotificationPolicy.NotificationChannel(notification_policy.notify_by).label
                     )
             usergroup_notification_plan += "→".join(notification_channels) + ")_"
-            reason = f"Membership in <!subteam^{usergroup.slack_id}> User Group"
 
-            notify_user_task.apply_async(
+        if usergroup_users:
+            notify_users_task.apply_async(
                 args=(
-                    user.pk,
+                    [user.pk for user in usergroup_users],
                     alert_group.pk,
                 ),
                 kwargs={
                     "reason": reason,
                     "prevent_posting_to_thread": True,
-                    "important": escalation_policy_step == EscalationPolicy.STEP_NOTIFY_GROUP_IMPORTANT,
+                    "important": important,
                 },
             )
-            AlertGroupLogRecord(
-                type=AlertGroupLogRecord.TYPE_ESCALATION_TRIGGERED,
-                author=user,
-                alert_group=alert_group,
-                reason=reason,
-                escalation_policy=escalation_policy,
-                escalation_policy_step=escalation_policy_step,
-            ).save()
+        AlertGroupLogRecord.objects.bulk_create(
+            [
+                AlertGroupLogRecord(
+                    type=AlertGroupLogRecord.TYPE_ESCALATION_TRIGGERED,
+                    author=user,
+                    alert_group=alert_group,
+                    reason=reason,
+                    escalation_policy=escalation_policy,
+                    escalation_policy_step=escalation_policy_step,
+                )
+                for user in usergroup_users
+            ]
+        )
         log_record = AlertGroupLogRecord(
             type=AlertGroupLogRecord.TYPE_ESCALATION_TRIGGERED,
             alert_group=alert_group,
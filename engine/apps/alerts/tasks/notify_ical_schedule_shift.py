@@ -2,19 +2,22 @@ import datetime
 import json
 from copy import copy
 
-import icalendar
+import pytz
 from django.apps import apps
+from django.core.cache import cache
 from django.utils import timezone
 
 from apps.schedules.ical_events import ical_events
+from apps.schedules.ical_events.calendar_cache import get_icalendar
 from apps.schedules.ical_utils import (
+    IcalUsersResolver,
     calculate_shift_diff,
     event_start_end_all_day_with_respect_to_type,
     get_icalendar_tz_or_utc,
     get_usernames_from_ical_event,
     is_icals_equal,
-    memoized_users_in_ical,
 )
+from apps.schedules.oncall_timeline import get_schedule_timeline
 from apps.slack.scenarios import scenario_step
 from apps.slack.slack_client import SlackClientWithErrorHandling
 from apps.slack.slack_client.exceptions import SlackAPIException, SlackAPITokenException
@@ -22,6 +25,10 @@ from common.custom_celery_tasks import shared_dedicated_queue_retry_task
 
 from .task_logger import task_logger
 
+NOTIFY_SHIFT_BOUNDARY_CACHE_KEY = "notify_ical_schedule_shift_boundary_{}_{}"
+# current shifts are the ones strictly overlapping the current moment, so notify right after the boundary
+NOTIFY_SHIFT_BOUNDARY_DELAY = datetime.timedelta(seconds=1)
+
 
 def get_current_shifts_from_ical(calendar, schedule, min_priority=0):
     calendar_tz = get_icalendar_tz_or_utc(calendar)
@@ -29,11 +36,12 @@ def get_current_shifts_from_ical(calendar, schedule, min_priority=0):
     events_from_ical_for_three_days = ical_events.get_events_from_ical_between(
         calendar, now - timezone.timedelta(days=1), now + timezone.timedelta(days=1)
     )
+    users_resolver = IcalUsersResolver(events_from_ical_for_three_days, schedule.organization)
     shifts = {}
     current_users = {}
     for event in events_from_ical_for_three_days:
         usernames, priority = get_usernames_from_ical_event(event)
-        users = memoized_users_in_ical(tuple(usernames), schedule.organization)
+        users = users_resolver.get_users(usernames)
         if len(users) > 0:
             event_start, event_end, all_day_event = event_start_end_all_day_with_respect_to_type(event, calendar_tz)
 
@@ -60,10 +68,11 @@ def get_next_shifts_from_ical(calendar, schedule, min_priority=0, days_to_lookup
     next_events_from_ical = ical_events.get_events_from_ical_between(
         calendar, now - timezone.timedelta(days=1), now + timezone.timedelta(days=days_to_lookup)
     )
+    users_resolver = IcalUsersResolver(next_events_from_ical, schedule.organization)
     shifts = {}
     for event in next_events_from_ical:
         usernames, priority = get_usernames_from_ical_event(event)
-        users = memoized_users_in_ical(tuple(usernames), schedule.organization)
+        users = users_resolver.get_users(usernames)
         if len(users) > 0:
             event_start, event_end, all_day_event = event_start_end_all_day_with_respect_to_type(event, calendar_tz)
 
@@ -172,8 +181,46 @@ def recalculate_shifts_with_respect_to_priority(shifts, users=None):
             shifts.pop(uid)
 
 
+def schedule_notify_ical_schedule_shift(schedule, schedule_changed):
+    """
+    Notify about shift changes right away if the schedule was changed, and once at the next moment on-call users
+    change according to the timeline, so there is no work between shift boundaries.
+    A single task is scheduled per boundary, tasks of boundaries removed by later changes of the schedule are skipped.
+    Without a timeline shifts are compared on every refresh.
+    """
+    now = timezone.now()
+    timeline = get_schedule_timeline(schedule, now, now)
+    if schedule_changed or timeline is None:
+        notify_ical_schedule_shift.apply_async((schedule.pk,))
+    if timeline is None:
+        return
+
+    next_transition = timeline.next_transition(now)
+    if next_transition is None:
+        # no shift boundaries in the horizon, refresh of the timeline will schedule the next one
+        return
+    boundary = next_transition.timestamp()
+    # the task of a boundary isn't replaced by the next one, e.g. when the schedule is refreshed right at the boundary
+    timeout = (next_transition - now).total_seconds() + 60 * 60
+    if not cache.add(NOTIFY_SHIFT_BOUNDARY_CACHE_KEY.format(schedule.pk, boundary), True, timeout=timeout):
+        return
+    notify_ical_schedule_shift.apply_async(
+        (schedule.pk,), {"boundary": boundary}, eta=next_transition + NOTIFY_SHIFT_BOUNDARY_DELAY
+    )
+
+
+def is_shift_boundary(schedule, boundary: float) -> bool:
+    """Check on-call users still change at the boundary according to the timeline, considered so without a timeline"""
+    boundary_datetime = datetime.datetime.fromtimestamp(boundary, tz=pytz.UTC)
+    before_boundary = boundary_datetime - datetime.timedelta(microseconds=1)
+    timeline = get_schedule_timeline(schedule, before_boundary, boundary_datetime)
+    if timeline is None:
+        return True
+    return timeline.next_transition(before_boundary) == boundary_datetime
+
+
 @shared_dedicated_queue_retry_task()
-def notify_ical_schedule_shift(schedule_pk):
+def notify_ical_schedule_shift(schedule_pk, boundary=None):
     task_logger.info(f"Notify ical schedule shift {schedule_pk}")
     OnCallSchedule = apps.get_model("schedules", "OnCallSchedule")
 
@@ -185,6 +232,10 @@ def notify_ical_schedule_shift(schedule_pk):
         task_logger.info(f"Trying to notify ical schedule shift for non-existing schedule {schedule_pk}")
         return
 
+    if boundary is not None and not is_shift_boundary(schedule, boundary):
+        task_logger.info(f"On-call users don't change at shift boundary {boundary} of schedule {schedule_pk} anymore")
+        return
+
     if schedule.organization.slack_team_identity is None:
         task_logger.info(f"Trying to notify ical schedule shift with no slack team identity {schedule_pk}")
         return
@@ -257,7 +308,7 @@ def notify_ical_schedule_shift(schedule_pk):
         if prev_ical_file and (not current_ical_file or not is_icals_equal(current_ical_file, prev_ical_file)):
             # If icals are not equal then compare current_events from them
             is_prev_ical_diff = True
-            prev_calendar = icalendar.Calendar.from_ical(prev_ical_file)
+            prev_calendar = get_icalendar(prev_ical_file)
 
             prev_shifts_result, prev_users_result = get_current_shifts_from_ical(
                 prev_calendar,
@@ -15,6 +15,100 @@ from common.custom_celery_tasks import shared_dedicated_queue_retry_task
 from .task_logger import task_logger
 
 
+def _get_reason_with_notification_plan(reason, next_notification_policies):
+    """Add a brief overview of further notification steps configured for user to the reason, to send it to thread"""
+    UserNotificationPolicy = apps.get_model("base", "UserNotificationPolicy")
+
+    collected_steps_ids = []
+    for notification_policy in next_notification_policies:
+        if notification_policy.step == UserNotificationPolicy.Step.NOTIFY:
+            if notification_policy.notify_by not in collected_steps_ids:
+                collected_steps_ids.append(notification_policy.notify_by)
+    collected_steps = ", ".join(
+        UserNotificationPolicy.NotificationChannel(step_id).label for step_id in collected_steps_ids
+    )
+    reason = ("Reason: " + reason + "\n") if reason is not None else ""
+    reason += ("Further notification plan: " + collected_steps) if len(collected_steps_ids) > 0 else ""
+    return reason
+
+
+def _build_notification_log_record(user, alert_group, notification_policy, reason, prevent_posting_to_thread):
+    """
+    Return log record for the notification policy (or notification plan step) of the user, None if the step is
+    unspecified, and the delay before the next step in seconds
+    """
+    UserNotificationPolicy = apps.get_model("base", "UserNotificationPolicy")
+    UserNotificationPolicyLogRecord = apps.get_model("base", "UserNotificationPolicyLogRecord")
+
+    countdown = 0
+    log_record = None
+    if notification_policy.step == UserNotificationPolicy.Step.WAIT:
+        if notification_policy.wait_delay is not None:
+            delay_in_seconds = notification_policy.wait_delay.total_seconds()
+        else:
+            delay_in_seconds = 0
+        countdown = delay_in_seconds
+        log_record = UserNotificationPolicyLogRecord(
+            author=user,
+            type=UserNotificationPolicyLogRecord.TYPE_PERSONAL_NOTIFICATION_TRIGGERED,
+            notification_policy_id=notification_policy.pk,
+            alert_group=alert_group,
+            slack_prevent_posting=prevent_posting_to_thread,
+            notification_step=notification_policy.step,
+        )
+        task_logger.info(f"notify_user_task: Waiting {delay_in_seconds} to notify user {user.pk}")
+    elif notification_policy.step == UserNotificationPolicy.Step.NOTIFY:
+        user_to_be_notified_in_slack = notification_policy.notify_by == UserNotificationPolicy.NotificationChannel.SLACK
+        if user_to_be_notified_in_slack and alert_group.notify_in_slack_enabled is False:
+            log_record = UserNotificationPolicyLogRecord(
+                author=user,
+                type=UserNotificationPolicyLogRecord.TYPE_PERSONAL_NOTIFICATION_FAILED,
+                notification_policy_id=notification_policy.pk,
+                alert_group=alert_group,
+                reason=reason,
+                slack_prevent_posting=prevent_posting_to_thread,
+                notification_step=notification_policy.step,
+                notification_channel=notification_policy.notify_by,
+                notification_error_code=UserNotificationPolicyLogRecord.ERROR_NOTIFICATION_POSTING_TO_SLACK_IS_DISABLED,
+            )
+        else:
+            log_record = UserNotificationPolicyLogRecord(
+                author=user,
+                type=UserNotificationPolicyLogRecord.TYPE_PERSONAL_NOTIFICATION_TRIGGERED,
+                notification_policy_id=notification_policy.pk,
+                alert_group=alert_group,
+                reason=reason,
+                slack_prevent_posting=prevent_posting_to_thread,
+                notification_step=notification_policy.step,
+                notification_channel=notification_policy.notify_by,
+            )
+    return log_record, countdown
+
+
+def _get_next_notification_policy(user, previous_notification_policy_pk, important):
+    """
+    Return notification plan step of the user following the previous notification policy, None if it was the last one.
+    Raise UserNotificationPolicy.DoesNotExist if the previous notification policy has been deleted.
+    """
+    UserNotificationPolicy = apps.get_model("base", "UserNotificationPolicy")
+
+    # further notification steps are scheduled without importance, look for the previous step in both plans
+    for plan_important in (important, not important):
+        notification_plan = UserNotificationPolicy.get_notification_plan(user.pk, plan_important)
+        for idx, notification_policy in enumerate(notification_plan):
+            if notification_policy.pk == previous_notification_policy_pk:
+                return notification_plan[idx + 1] if idx + 1 < len(notification_plan) else None
+
+    # the previous notification policy belongs to another user, continue from the step with the same order
+    previous_notification_policy = UserNotificationPolicy.objects.get(pk=previous_notification_policy_pk)
+    notification_plan = UserNotificationPolicy.get_notification_plan(user.pk, important)
+    orders = [notification_policy.order for notification_policy in notification_plan]
+    if previous_notification_policy.order not in orders:
+        raise UserNotificationPolicy.DoesNotExist
+    idx = orders.index(previous_notification_policy.order)
+    return notification_plan[idx + 1] if idx + 1 < len(notification_plan) else None
+
+
 @shared_dedicated_queue_retry_task(
     autoretry_for=(Exception,), retry_backoff=True, max_retries=1 if settings.DEBUG else None
 )
@@ -50,8 +144,6 @@ def notify_user_task(
         except User.DoesNotExist:
             return f"notify_user_task: user {user_pk} doesn't exist"
 
-        organization = alert_group.channel.organization
-
         if not user.is_notification_allowed:
             task_logger.info(f"notify_user_task: user {user.pk} notification is not allowed")
             UserNotificationPolicyLogRecord(
@@ -71,25 +163,14 @@ def notify_user_task(
         user_has_notification = UserHasNotification.objects.filter(pk=user_has_notification.pk).select_for_update()[0]
 
         if previous_notification_policy_pk is None:
-            notification_policy = UserNotificationPolicy.objects.filter(user=user, important=important).first()
-            if notification_policy is None:
+            notification_plan = UserNotificationPolicy.get_notification_plan(user.pk, important)
+            if not notification_plan:
                 task_logger.info(
                     f"notify_user_task: Failed to notify. No notification policies. user_id={user_pk} alert_group_id={alert_group_pk} important={important}"
                 )
                 return
-            # Here we collect a brief overview of notification steps configured for user to send it to thread.
-            collected_steps_ids = []
-            next_notification_policy = notification_policy.next()
-            while next_notification_policy is not None:
-                if next_notification_policy.step == UserNotificationPolicy.Step.NOTIFY:
-                    if next_notification_policy.notify_by not in collected_steps_ids:
-                        collected_steps_ids.append(next_notification_policy.notify_by)
-                next_notification_policy = next_notification_policy.next()
-            collected_steps = ", ".join(
-                UserNotificationPolicy.NotificationChannel(step_id).label for step_id in collected_steps_ids
-            )
-            reason = ("Reason: " + reason + "\n") if reason is not None else ""
-            reason += ("Further notification plan: " + collected_steps) if len(collected_steps_ids) > 0 else ""
+            notification_policy, *next_notification_policies = notification_plan
+            reason = _get_reason_with_notification_plan(reason, next_notification_policies)
         else:
             if notify_user_task.request.id != user_has_notification.active_notification_policy_id:
                 task_logger.info(
@@ -100,12 +181,7 @@ def notify_user_task(
                 return
 
             try:
-                notification_policy = UserNotificationPolicy.objects.get(pk=previous_notification_policy_pk)
-                if notification_policy.user.organization != organization:
-                    notification_policy = UserNotificationPolicy.objects.get(
-                        order=notification_policy.order, user=user, important=important
-                    )
-                notification_policy = notification_policy.next()
+                notification_policy = _get_next_notification_policy(user, previous_notification_policy_pk, important)
             except UserNotificationPolicy.DoesNotExist:
                 task_logger.info(
                     f"notify_user_taskLNotification policy {previous_notification_policy_pk} has been deleted"
@@ -143,48 +219,9 @@ def notify_user_task(
                 task_logger.info(f"notify_user_task: skip notification user {user.pk} invitation exceeded")
                 return
 
-            if notification_policy.step == UserNotificationPolicy.Step.WAIT:
-                if notification_policy.wait_delay is not None:
-                    delay_in_seconds = notification_policy.wait_delay.total_seconds()
-                else:
-                    delay_in_seconds = 0
-                countdown = delay_in_seconds
-                log_record = UserNotificationPolicyLogRecord(
-                    author=user,
-                    type=UserNotificationPolicyLogRecord.TYPE_PERSONAL_NOTIFICATION_TRIGGERED,
-                    notification_policy=notification_policy,
-                    alert_group=alert_group,
-                    slack_prevent_posting=prevent_posting_to_thread,
-                    notification_step=notification_policy.step,
-                )
-                task_logger.info(f"notify_user_task: Waiting {delay_in_seconds} to notify user {user.pk}")
-            elif notification_policy.step == UserNotificationPolicy.Step.NOTIFY:
-                user_to_be_notified_in_slack = (
-                    notification_policy.notify_by == UserNotificationPolicy.NotificationChannel.SLACK
-                )
-                if user_to_be_notified_in_slack and alert_group.notify_in_slack_enabled is False:
-                    log_record = UserNotificationPolicyLogRecord(
-                        author=user,
-                        type=UserNotificationPolicyLogRecord.TYPE_PERSONAL_NOTIFICATION_FAILED,
-                        notification_policy=notification_policy,
-                        alert_group=alert_group,
-                        reason=reason,
-                        slack_prevent_posting=prevent_posting_to_thread,
-                        notification_step=notification_policy.step,
-                        notification_channel=notification_policy.notify_by,
-                        notification_error_code=UserNotificationPolicyLogRecord.ERROR_NOTIFICATION_POSTING_TO_SLACK_IS_DISABLED,
-                    )
-                else:
-                    log_record = UserNotificationPolicyLogRecord(
-                        author=user,
-                        type=UserNotificationPolicyLogRecord.TYPE_PERSONAL_NOTIFICATION_TRIGGERED,
-                        notification_policy=notification_policy,
-                        alert_group=alert_group,
-                        reason=reason,
-                        slack_prevent_posting=prevent_posting_to_thread,
-                        notification_step=notification_policy.step,
-                        notification_channel=notification_policy.notify_by,
-                    )
+            log_record, countdown = _build_notification_log_record(
+                user, alert_group, notification_policy, reason, prevent_posting_to_thread
+            )
         if log_record:  # log_record is None if user notification policy step is unspecified
             log_record.save()
             if notify_user_task.request.retries == 0:
@@ -220,6 +257,115 @@ def notify_user_task(
             user_has_notification.save(update_fields=["active_notification_policy_id"])
 
 
+@shared_dedicated_queue_retry_task(
+    autoretry_for=(Exception,), retry_backoff=True, max_retries=1 if settings.DEBUG else None
+)
+def notify_users_task(user_pks, alert_group_pk, reason=None, prevent_posting_to_thread=False, important=False):
+    """
+    Start personal notifications of users notified by the same escalation step. Does the same as notify_user_task
+    called for each user without previous notification policy, but fetches users, their notification policies and
+    UserHasNotification rows in bulk. Further notification steps are made by notify_user_task for each user.
+    """
+    UserNotificationPolicy = apps.get_model("base", "UserNotificationPolicy")
+    UserNotificationPolicyLogRecord = apps.get_model("base", "UserNotificationPolicyLogRecord")
+    User = apps.get_model("user_management", "User")
+    AlertGroup = apps.get_model("alerts", "AlertGroup")
+    UserHasNotification = apps.get_model("alerts", "UserHasNotification")
+
+    try:
+        alert_group = AlertGroup.all_objects.select_related("channel__organization").get(pk=alert_group_pk)
+    except AlertGroup.DoesNotExist:
+        return f"notify_users_task: alert_group {alert_group_pk} doesn't exist"
+
+    tasks = []
+    with transaction.atomic():
+        users_by_pk = User.objects.in_bulk(user_pks)
+        notification_plans = UserNotificationPolicy.get_notification_plans(users_by_pk, important)
+
+        users = []
+        for user_pk in dict.fromkeys(user_pks):
+            user = users_by_pk.get(user_pk)
+            if user is None:
+                task_logger.info(f"notify_users_task: user {user_pk} doesn't exist")
+            elif not user.is_notification_allowed:
+                task_logger.info(f"notify_users_task: user {user.pk} notification is not allowed")
+                UserNotificationPolicyLogRecord(
+                    author=user,
+                    type=UserNotificationPolicyLogRecord.TYPE_PERSONAL_NOTIFICATION_FAILED,
+                    reason=f"notification is not allowed for user",
+                    alert_group=alert_group,
+                    notification_error_code=UserNotificationPolicyLogRecord.ERROR_NOTIFICATION_FORBIDDEN,
+                ).save()
+            elif not notification_plans[user.pk]:
+                task_logger.info(
+                    f"notify_users_task: Failed to notify. No notification policies. user_id={user_pk} "
+                    f"alert_group_id={alert_group_pk} important={important}"
+                )
+            else:
+                users.append(user)
+        if not users:
+            return
+
+        if (
+            alert_group.acknowledged
+            or alert_group.resolved
+            or alert_group.is_archived
+            or alert_group.wiped_at
+            or alert_group.root_alert_group
+        ):
+            return "Acknowledged, resolved, archived, attached or wiped."
+
+        if alert_group.silenced:
+            task_logger.info(f"notify_users_task: skip notification because alert_group {alert_group.pk} is silenced")
+            return
+
+        UserHasNotification.objects.bulk_create(
+            [UserHasNotification(user=user, alert_group=alert_group) for user in users], ignore_conflicts=True
+        )
+        user_has_notifications = {
+            user_has_notification.user_id: user_has_notification
+            for user_has_notification in UserHasNotification.objects.filter(
+                user__in=users, alert_group=alert_group
+            ).select_for_update()
+        }
+
+        for user in users:
+            notification_policy, *next_notification_policies = notification_plans[user.pk]
+            user_reason = _get_reason_with_notification_plan(reason, next_notification_policies)
+
+            log_record, countdown = _build_notification_log_record(
+                user, alert_group, notification_policy, user_reason, prevent_posting_to_thread
+            )
+            if log_record:  # log_record is None if user notification policy step is unspecified
+                log_record.save()
+                if notify_users_task.request.retries == 0:
+                    tasks.append(send_user_notification_signal.signature((log_record.pk,)))
+                if notification_policy.step != UserNotificationPolicy.Step.WAIT:
+                    tasks.append(perform_notification.signature((log_record.pk,)))
+
+            task_id = celery_uuid()
+            user_has_notifications[user.pk].active_notification_policy_id = task_id
+            tasks.append(
+                notify_user_task.signature(
+                    (user.pk, alert_group.pk, notification_policy.pk, user_reason),
+                    {
+                        "notify_even_acknowledged": False,
+                        "notify_anyway": False,
+                        "prevent_posting_to_thread": prevent_posting_to_thread,
+                    },
+                    countdown=NEXT_ESCALATION_DELAY + countdown,
+                    task_id=task_id,
+                )
+            )
+        UserHasNotification.objects.bulk_update(user_has_notifications.values(), ["active_notification_policy_id"])
+
+        def _apply_tasks():
+            for task in tasks:
+                task.apply_async()
+
+        transaction.on_commit(_apply_tasks)
+
+
 @shared_dedicated_queue_retry_task(
     autoretry_for=(Exception,), retry_backoff=True, max_retries=1 if settings.DEBUG else None
 )
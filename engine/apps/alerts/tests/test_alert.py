@@ -1,6 +1,9 @@
+from unittest import mock
+
 import pytest
+from django.core.cache import cache
 
-from apps.alerts.models import Alert
+from apps.alerts.models import Alert, AlertGroup
 
 
 @pytest.mark.django_db
@@ -41,3 +44,55 @@ def test_alert_create_custom_channel_filter(make_organization, make_alert_receiv
     )
 
     assert alert.group.channel_filter == other_channel_filter
+
+
+@mock.patch("apps.alerts.tasks.distribute_alert.distribute_grouped_alerts.apply_async")
+@mock.patch("apps.alerts.models.alert.distribute_alert.apply_async")
+@pytest.mark.django_db
+def test_alert_distribution_is_coalesced_per_alert_group(
+    mocked_distribute_alert,
+    mocked_distribute_grouped_alerts,
+    make_organization,
+    make_alert_receive_channel,
+    make_alert_group,
+):
+    cache.clear()
+    organization = make_organization()
+    alert_receive_channel = make_alert_receive_channel(organization)
+    alert_group = make_alert_group(alert_receive_channel)
+
+    first_alert = Alert.objects.create(group=alert_group, raw_request_data={}, is_the_first_alert_in_group=True)
+    mocked_distribute_alert.assert_called_once_with((first_alert.pk,), countdown=1)
+
+    for _ in range(3):
+        Alert.objects.create(group=alert_group, raw_request_data={})
+    mocked_distribute_grouped_alerts.assert_called_once()
+    assert mocked_distribute_grouped_alerts.call_args.args[0] == (alert_group.pk,)
+
+
+@mock.patch("apps.alerts.tasks.distribute_alert.distribute_grouped_alerts.apply_async")
+@pytest.mark.django_db
+def test_alert_bulk_create_for_group(
+    mocked_distribute_grouped_alerts,
+    django_assert_max_num_queries,
+    make_organization,
+    make_alert_receive_channel,
+    make_alert_group,
+):
+    cache.clear()
+    organization = make_organization()
+    alert_receive_channel = make_alert_receive_channel(organization)
+    alert_group = make_alert_group(alert_receive_channel)
+    group_data = AlertGroup.GroupData(
+        is_resolve_signal=False, is_acknowledge_signal=False, group_distinction="a", web_title_cache=None
+    )
+
+    # public primary keys check and the INSERT, regardless of the number of alerts
+    with django_assert_max_num_queries(2):
+        Alert.bulk_create_for_group(alert_group, [({"n": n}, group_data) for n in range(10)])
+
+    alerts = Alert.objects.filter(group=alert_group)
+    assert alerts.count() == 10
+    assert len(set(alerts.values_list("public_primary_key", flat=True))) == 10
+    assert not alerts.filter(is_the_first_alert_in_group=True).exists()
+    mocked_distribute_grouped_alerts.assert_called_once()
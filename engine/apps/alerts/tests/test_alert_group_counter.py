@@ -0,0 +1,68 @@
+from unittest import mock
+
+import pytest
+from django.db import transaction
+
+from apps.alerts.models import AlertGroupCounter
+from apps.alerts.models.alert_group_counter import AlertGroupNumberAllocator
+
+
+@pytest.mark.django_db
+def test_alert_group_counter_get_value(make_organization):
+    organization = make_organization()
+
+    assert AlertGroupCounter.objects.get_value(organization) == 1
+    assert AlertGroupCounter.objects.get_value(organization) == 2
+
+
+@pytest.mark.django_db
+def test_alert_group_counter_reserve_block(make_organization):
+    organization = make_organization()
+
+    assert AlertGroupCounter.objects.reserve_block(organization.pk, 10) == 10
+    assert AlertGroupCounter.objects.reserve_block(organization.pk, 5) == 15
+    assert AlertGroupCounter.objects.get(organization=organization).value == 15
+
+
+@pytest.mark.django_db
+def test_alert_group_number_allocator_sequential_when_not_bursting(make_organization):
+    organization = make_organization()
+    allocator = AlertGroupNumberAllocator(max_block_size=100)
+
+    with mock.patch("apps.alerts.models.alert_group_counter.time.monotonic", side_effect=[0, 10, 20]):
+        values = [allocator.allocate(organization.pk) for _ in range(3)]
+
+    assert values == [1, 2, 3]
+    # no values reserved in advance
+    assert AlertGroupCounter.objects.get(organization=organization).value == 3
+
+
+@pytest.mark.django_db(transaction=True)
+def test_alert_group_number_allocator_blocks_on_burst(make_organization):
+    organization = make_organization()
+    allocator = AlertGroupNumberAllocator(max_block_size=4)
+
+    with mock.patch("apps.alerts.models.alert_group_counter.time.monotonic", return_value=0):
+        values = [allocator.allocate(organization.pk) for _ in range(10)]
+
+    assert values == list(range(1, 11))
+    # blocks of 1, 2, 4, 4 were reserved
+    assert AlertGroupCounter.objects.get(organization=organization).value == 11
+
+    # another worker gets values after the reserved ones
+    other_allocator = AlertGroupNumberAllocator(max_block_size=4)
+    assert other_allocator.allocate(organization.pk) == 12
+
+
+@pytest.mark.django_db
+def test_alert_group_number_allocator_no_blocks_inside_transaction(make_organization):
+    organization = make_organization()
+    allocator = AlertGroupNumberAllocator(max_block_size=4)
+
+    with mock.patch("apps.alerts.models.alert_group_counter.time.monotonic", return_value=0):
+        with transaction.atomic():
+            values = [allocator.allocate(organization.pk) for _ in range(5)]
+
+    assert values == list(range(1, 6))
+    # nothing is reserved in advance, so values are not handed out again if the transaction is rolled back
+    assert AlertGroupCounter.objects.get(organization=organization).value == 5
@@ -101,7 +101,7 @@ def test_send_demo_alert(mocked_create_alert, make_organization, make_alert_rece
     assert mocked_create_alert.call_args.args[1]["force_route_id"] is None
 
 
-@mock.patch("apps.integrations.tasks.create_alertmanager_alerts.apply_async", return_value=None)
+@mock.patch("apps.integrations.tasks.create_alertmanager_alerts_batch.apply_async", return_value=None)
 @pytest.mark.django_db
 @pytest.mark.parametrize(
     "integration",
@@ -117,7 +117,9 @@ def test_send_demo_alert_alertmanager_payload_shape(
     organization = make_organization()
     alert_receive_channel = make_alert_receive_channel(organization, integration=integration)
     alert_receive_channel.send_demo_alert()
-    assert mocked_create_alert.called
+    # all example alerts are sent in one batch
+    assert mocked_create_alert.call_count == 1
+    assert mocked_create_alert.call_args.args[1]["alerts"] == alert_receive_channel.config.example_payload["alerts"]
     assert mocked_create_alert.call_args.args[1]["is_demo"]
     assert mocked_create_alert.call_args.args[1]["force_route_id"] is None
 
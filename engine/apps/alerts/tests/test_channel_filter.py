@@ -1,8 +1,10 @@
+import json
 from unittest import mock
 
 import pytest
 
 from apps.alerts.models import AlertReceiveChannel, ChannelFilter
+from apps.alerts.route_matcher import get_required_literal, get_route_matcher
 
 
 @pytest.mark.django_db
@@ -95,6 +97,121 @@ def test_channel_filter_select_filter_jinja2(make_organization, make_alert_recei
     assert satisfied_filter == channel_filter
 
 
+@pytest.mark.django_db
+def test_channel_filter_select_filter_first_match_in_order(
+    make_organization, make_alert_receive_channel, make_channel_filter
+):
+    organization = make_organization()
+    alert_receive_channel = make_alert_receive_channel(organization)
+    first_channel_filter = make_channel_filter(alert_receive_channel, filtering_term="alert", is_default=False)
+    make_channel_filter(alert_receive_channel, filtering_term="test", is_default=False)
+
+    with mock.patch("apps.alerts.route_matcher.json.dumps", wraps=json.dumps) as mocked_dumps:
+        satisfied_filter = ChannelFilter.select_filter(alert_receive_channel, {"title": "test alert"})
+
+    assert satisfied_filter == first_channel_filter
+    # payload is serialized once for all regex routes
+    assert mocked_dumps.call_count == 1
+
+
+@pytest.mark.django_db
+def test_channel_filter_select_filter_route_changes(make_organization, make_alert_receive_channel, make_channel_filter):
+    organization = make_organization()
+    alert_receive_channel = make_alert_receive_channel(organization)
+    default_channel_filter = make_channel_filter(alert_receive_channel, is_default=True)
+    raw_request_data = {"title": "test alert"}
+
+    assert ChannelFilter.select_filter(alert_receive_channel, raw_request_data) == default_channel_filter
+
+    # new route is picked up
+    channel_filter = make_channel_filter(alert_receive_channel, filtering_term="test", is_default=False)
+    assert ChannelFilter.select_filter(alert_receive_channel, raw_request_data) == channel_filter
+
+    # updated route is picked up
+    channel_filter.filtering_term = "not matching"
+    channel_filter.save()
+    assert ChannelFilter.select_filter(alert_receive_channel, raw_request_data) == default_channel_filter
+
+    # deleted route is picked up
+    channel_filter.filtering_term = "test"
+    channel_filter.save()
+    assert ChannelFilter.select_filter(alert_receive_channel, raw_request_data) == channel_filter
+    channel_filter.delete()
+    assert ChannelFilter.select_filter(alert_receive_channel, raw_request_data) == default_channel_filter
+
+
+@pytest.mark.django_db
+def test_channel_filter_select_filter_invalid_regex(make_organization, make_alert_receive_channel, make_channel_filter):
+    organization = make_organization()
+    alert_receive_channel = make_alert_receive_channel(organization)
+    default_channel_filter = make_channel_filter(alert_receive_channel, is_default=True)
+    make_channel_filter(alert_receive_channel, filtering_term="[invalid", is_default=False)
+
+    assert ChannelFilter.select_filter(alert_receive_channel, {"title": "[invalid"}) == default_channel_filter
+
+
+@pytest.mark.parametrize(
+    "pattern,literal",
+    [
+        ('"service": "api"', '"service": "api"'),
+        ("^critical$", "critical"),
+        (r"host-\d+\.example", ".example"),
+        ("(prod)?-db", "-db"),
+        ("a(bc)+d", "bc"),
+        ("x(?i:abc)yz", "yz"),
+        ("(?i)critical", None),
+        ("api|web", None),
+        (".*", None),
+    ],
+)
+def test_get_required_literal(pattern, literal):
+    assert get_required_literal(pattern) == literal
+
+
+@pytest.mark.django_db
+def test_channel_filter_select_filter_regex_prefilter(
+    settings, make_organization, make_alert_receive_channel, make_channel_filter
+):
+    settings.ROUTE_REGEX_PREFILTER_MIN_ROUTES = 1
+    organization = make_organization()
+    alert_receive_channel = make_alert_receive_channel(organization)
+    service_channel_filters = [
+        make_channel_filter(alert_receive_channel, filtering_term=f'"service": "svc-{i}"', is_default=False)
+        for i in range(10)
+    ]
+    case_insensitive_channel_filter = make_channel_filter(
+        alert_receive_channel, filtering_term="(?i)CRITICAL", is_default=False
+    )
+    jinja2_channel_filter = make_channel_filter(
+        alert_receive_channel,
+        filtering_term="{{ payload.team == 'db' }}",
+        filtering_term_type=ChannelFilter.FILTERING_TERM_TYPE_JINJA2,
+        is_default=False,
+    )
+    later_service_channel_filter = make_channel_filter(
+        alert_receive_channel, filtering_term='"service": "svc-(1|2)"', is_default=False
+    )
+    default_channel_filter = make_channel_filter(alert_receive_channel, is_default=True)
+
+    assert get_route_matcher(alert_receive_channel.pk).prefilter is not None
+    expected = [
+        ({"service": "svc-3"}, service_channel_filters[3]),
+        ({"service": "svc-3", "severity": "critical"}, service_channel_filters[3]),
+        ({"service": "svc-11", "severity": "critical"}, case_insensitive_channel_filter),
+        ({"service": "svc-11", "team": "db"}, jinja2_channel_filter),
+        # "svc-1" is a prefix of "svc-11" but the closing quote doesn't match
+        ({"service": "svc-11"}, default_channel_filter),
+        ({"service": "other", "tags": ["svc-2"]}, default_channel_filter),
+    ]
+    for raw_request_data, channel_filter in expected:
+        assert ChannelFilter.select_filter(alert_receive_channel, raw_request_data) == channel_filter
+
+    # routes after the jinja2 route are found by the prefilter as well
+    later_service_channel_filter.filtering_term = '"service": "svc-(11|12)"'
+    later_service_channel_filter.save()
+    assert ChannelFilter.select_filter(alert_receive_channel, {"service": "svc-11"}) == later_service_channel_filter
+
+
 @mock.patch("apps.integrations.tasks.create_alert.apply_async", return_value=None)
 @pytest.mark.django_db
 def test_send_demo_alert(
@@ -116,7 +233,7 @@ def test_send_demo_alert(
     assert mocked_create_alert.call_args.args[1]["force_route_id"] == channel_filter.id
 
 
-@mock.patch("apps.integrations.tasks.create_alertmanager_alerts.apply_async", return_value=None)
+@mock.patch("apps.integrations.tasks.create_alertmanager_alerts_batch.apply_async", return_value=None)
 @pytest.mark.django_db
 @pytest.mark.parametrize(
     "integration",
@@ -1,14 +1,18 @@
 import datetime
+from unittest.mock import patch
 
 import pytest
 from django.utils import timezone
 
+from apps.alerts.escalation_snapshot.escalation_definition import clear_escalation_definition_cache
+from apps.alerts.escalation_snapshot.serializers import EscalationPolicySnapshotSerializer
 from apps.alerts.escalation_snapshot.snapshot_classes import (
     ChannelFilterSnapshot,
     EscalationPolicySnapshot,
     EscalationSnapshot,
 )
-from apps.alerts.models import EscalationPolicy
+from apps.alerts.models import AlertGroup, EscalationPolicy, EscalationSnapshotDefinition
+from apps.alerts.tasks import calculate_escalation_finish_time
 
 
 @pytest.fixture()
@@ -226,3 +230,83 @@ def test_next_escalation_policy_snapshot(escalation_snapshot_test_setup):
         is escalation_snapshot.escalation_policies_snapshots[-1]
     )
     assert escalation_snapshot.next_active_escalation_policy_snapshot is None
+
+
+@pytest.mark.django_db
+def test_save_escalation_state(escalation_snapshot_test_setup):
+    alert_group, notify_to_multiple_users_step, wait_step, notify_if_time_step = escalation_snapshot_test_setup
+    raw_escalation_snapshot = alert_group.raw_escalation_snapshot
+
+    now = timezone.now()
+    next_step_eta = now + timezone.timedelta(minutes=15)
+    escalation_snapshot = alert_group.escalation_snapshot
+    escalation_snapshot.last_active_escalation_policy_order = 1
+    escalation_snapshot.next_step_eta = next_step_eta
+    escalation_snapshot.escalation_policies_snapshots[0].passed_last_time = now
+    escalation_snapshot.escalation_policies_snapshots[1].passed_last_time = now
+    # only state fields are serialized
+    with patch.object(EscalationPolicySnapshotSerializer, "to_representation", side_effect=AssertionError):
+        escalation_snapshot.save_state_to_alert_group()
+
+    alert_group = AlertGroup.all_objects.get(pk=alert_group.pk)
+    # the snapshot isn't rewritten, only policies passed by escalation are saved in the state
+    assert alert_group.raw_escalation_snapshot == raw_escalation_snapshot
+    assert alert_group.raw_escalation_state["version"] == 1
+    assert list(alert_group.raw_escalation_state["policies"]) == ["0", "1"]
+    assert alert_group.next_step_eta == next_step_eta
+
+    restored_escalation_snapshot = alert_group.escalation_snapshot
+    assert restored_escalation_snapshot.last_active_escalation_policy_order == 1
+    assert restored_escalation_snapshot.escalation_policies_snapshots[1].passed_last_time == now
+    assert restored_escalation_snapshot.escalation_policies_snapshots[2].passed_last_time is None
+    assert restored_escalation_snapshot.convert_to_dict() == escalation_snapshot.convert_to_dict()
+
+    # saving the whole snapshot drops the state
+    restored_escalation_snapshot.save_to_alert_group()
+    alert_group = AlertGroup.all_objects.get(pk=alert_group.pk)
+    assert alert_group.raw_escalation_state is None
+    assert alert_group.raw_escalation_snapshot == escalation_snapshot.convert_to_dict()
+
+
+@pytest.mark.django_db
+def test_escalation_state_unsupported_version(escalation_snapshot_test_setup):
+    alert_group, notify_to_multiple_users_step, wait_step, notify_if_time_step = escalation_snapshot_test_setup
+    alert_group.raw_escalation_state = {"version": 0}
+
+    assert alert_group.escalation_snapshot is None
+
+
+@pytest.mark.django_db
+def test_start_escalation_shares_escalation_definition(escalation_snapshot_test_setup, make_alert_group):
+    alert_group, notify_to_multiple_users_step, wait_step, notify_if_time_step = escalation_snapshot_test_setup
+    other_alert_group = make_alert_group(alert_group.channel, channel_filter=alert_group.channel_filter)
+    raw_escalation_snapshot = alert_group.build_raw_escalation_snapshot()
+    clear_escalation_definition_cache()
+
+    with patch.object(calculate_escalation_finish_time, "apply_async"), patch(
+        "apps.alerts.escalation_snapshot.escalation_snapshot_mixin.schedule_escalate_alert_group"
+    ):
+        alert_group.start_escalation_if_needed()
+        other_alert_group.start_escalation_if_needed()
+
+    alert_group = AlertGroup.all_objects.get(pk=alert_group.pk)
+    other_alert_group = AlertGroup.all_objects.get(pk=other_alert_group.pk)
+    # the definition is stored once and alert groups refer to it instead of storing their own snapshots
+    assert EscalationSnapshotDefinition.objects.count() == 1
+    assert alert_group.raw_escalation_snapshot is None
+    assert alert_group.escalation_definition_version is not None
+    assert alert_group.escalation_definition_version == other_alert_group.escalation_definition_version
+
+    # the definition is read from the DB if it's not cached in the process
+    clear_escalation_definition_cache()
+    assert alert_group.get_raw_escalation_snapshot() == raw_escalation_snapshot
+    assert alert_group.escalation_snapshot.convert_to_dict() == raw_escalation_snapshot
+
+    # runtime state is saved per alert group on top of the shared definition
+    escalation_snapshot = alert_group.escalation_snapshot
+    escalation_snapshot.last_active_escalation_policy_order = 0
+    escalation_snapshot.save_state_to_alert_group()
+    alert_group = AlertGroup.all_objects.get(pk=alert_group.pk)
+    assert alert_group.escalation_snapshot.last_active_escalation_policy_order == 0
+    assert other_alert_group.escalation_snapshot.last_active_escalation_policy_order is None
+    clear_escalation_definition_cache()
@@ -0,0 +1,91 @@
+from unittest.mock import call, patch
+
+import pytest
+from django.utils import timezone
+
+from apps.alerts.models import EscalationTimer
+from apps.alerts.tasks import dispatch_escalation_timers, escalate_alert_group, schedule_escalate_alert_group
+
+
+@pytest.mark.django_db
+def test_schedule_escalate_alert_group_timer(make_organization, make_alert_receive_channel, make_alert_group):
+    organization = make_organization()
+    alert_receive_channel = make_alert_receive_channel(organization)
+    alert_group = make_alert_group(alert_receive_channel)
+
+    eta = timezone.now() + timezone.timedelta(minutes=15)
+    with patch.object(escalate_alert_group, "apply_async") as mock_apply_async:
+        schedule_escalate_alert_group(alert_group.pk, "first", eta=eta)
+        # the next step of the same alert group replaces the timer
+        schedule_escalate_alert_group(alert_group.pk, "second", eta=eta + timezone.timedelta(minutes=5))
+
+    assert not mock_apply_async.called
+    timer = EscalationTimer.objects.get(alert_group=alert_group)
+    assert timer.escalation_id == "second"
+    assert timer.eta == eta + timezone.timedelta(minutes=5)
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("wheel_enabled,countdown", [(True, 10), (False, 15 * 60)])
+def test_schedule_escalate_alert_group_task(
+    settings, make_organization, make_alert_receive_channel, make_alert_group, wheel_enabled, countdown
+):
+    settings.ESCALATION_TIMER_WHEEL_ENABLED = wheel_enabled
+    organization = make_organization()
+    alert_receive_channel = make_alert_receive_channel(organization)
+    alert_group = make_alert_group(alert_receive_channel)
+
+    with patch.object(escalate_alert_group, "apply_async") as mock_apply_async:
+        with patch("django.db.transaction.on_commit", side_effect=lambda func: func()):
+            schedule_escalate_alert_group(alert_group.pk, "task-id", countdown=countdown)
+
+    assert mock_apply_async.call_count == 1
+    assert mock_apply_async.call_args.kwargs["task_id"] == "task-id"
+    assert not EscalationTimer.objects.exists()
+
+
+@pytest.mark.django_db
+def test_dispatch_escalation_timers(make_organization, make_alert_receive_channel, make_alert_group):
+    organization = make_organization()
+    alert_receive_channel = make_alert_receive_channel(organization)
+    alert_groups = [make_alert_group(alert_receive_channel) for _ in range(3)]
+
+    now = timezone.now()
+    overdue_eta = now - timezone.timedelta(minutes=1)
+    due_eta = now + timezone.timedelta(seconds=10)
+    EscalationTimer.objects.create(alert_group=alert_groups[0], escalation_id="overdue", eta=overdue_eta)
+    EscalationTimer.objects.create(alert_group=alert_groups[1], escalation_id="due", eta=due_eta)
+    EscalationTimer.objects.create(
+        alert_group=alert_groups[2], escalation_id="later", eta=now + timezone.timedelta(hours=1)
+    )
+
+    with patch.object(escalate_alert_group, "apply_async") as mock_apply_async:
+        assert dispatch_escalation_timers() == 2
+
+    assert mock_apply_async.call_args_list == [
+        call((alert_groups[0].pk,), immutable=True, eta=overdue_eta, task_id="overdue"),
+        call((alert_groups[1].pk,), immutable=True, eta=due_eta, task_id="due"),
+    ]
+    assert list(EscalationTimer.objects.values_list("escalation_id", flat=True)) == ["later"]
+
+
+@pytest.mark.django_db
+def test_dispatch_escalation_timers_restores_not_sent_timers(
+    make_organization, make_alert_receive_channel, make_alert_group
+):
+    organization = make_organization()
+    alert_receive_channel = make_alert_receive_channel(organization)
+    alert_groups = [make_alert_group(alert_receive_channel) for _ in range(2)]
+
+    now = timezone.now()
+    EscalationTimer.objects.create(alert_group=alert_groups[0], escalation_id="sent", eta=now)
+    EscalationTimer.objects.create(
+        alert_group=alert_groups[1], escalation_id="failed", eta=now + timezone.timedelta(seconds=10)
+    )
+
+    with patch.object(escalate_alert_group, "apply_async", side_effect=[None, Exception]):
+        with pytest.raises(Exception):
+            dispatch_escalation_timers()
+
+    # the sent timer is not sent again by the retry
+    assert list(EscalationTimer.objects.values_list("escalation_id", flat=True)) == ["failed"]
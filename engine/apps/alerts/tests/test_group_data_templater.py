@@ -0,0 +1,95 @@
+import hashlib
+from unittest.mock import patch
+
+import pytest
+
+from apps.alerts.incident_appearance.templaters import get_group_data_templater
+from apps.alerts.incident_appearance.templaters.group_data_templater import GroupDataTemplater
+from apps.alerts.models import Alert, AlertReceiveChannel
+from common.jinja_templater.apply_jinja_template import JinjaTemplateError
+
+
+@pytest.mark.django_db
+def test_render_group_data(make_organization, make_alert_receive_channel):
+    organization = make_organization()
+    alert_receive_channel = make_alert_receive_channel(
+        organization,
+        integration=AlertReceiveChannel.INTEGRATION_WEBHOOK,
+        grouping_id_template="{{ payload.id }}",
+        resolve_condition_template="{{ payload.state == 'ok' }}",
+        acknowledge_condition_template="{{ payload.state == 'ack' }}",
+        web_title_template="{{ payload.title }}",
+    )
+
+    group_data = Alert.render_group_data(alert_receive_channel, {"id": 1, "state": "ok", "title": "Test"})
+
+    assert group_data.group_distinction == hashlib.md5("1".encode()).hexdigest()
+    assert group_data.is_resolve_signal is True
+    assert group_data.is_acknowledge_signal is False
+    assert group_data.web_title_cache == "Test"
+
+
+@pytest.mark.django_db
+def test_render_group_data_template_errors(make_organization, make_alert_receive_channel):
+    organization = make_organization()
+    alert_receive_channel = make_alert_receive_channel(
+        organization,
+        integration=AlertReceiveChannel.INTEGRATION_WEBHOOK,
+        grouping_id_template="{{ payload.id",
+        resolve_condition_template="{{ payload.state.name }}",
+        web_title_template="{{ payload.title",
+    )
+
+    group_data = Alert.render_group_data(alert_receive_channel, {"id": 1})
+
+    # random distinction, so alerts are not grouped
+    assert group_data.group_distinction is not None
+    assert group_data.group_distinction != Alert.render_group_data(alert_receive_channel, {"id": 1}).group_distinction
+    assert group_data.is_resolve_signal is False
+    assert group_data.web_title_cache.startswith("Template Error: ")
+
+
+@pytest.mark.django_db
+def test_group_data_templater_raises_new_compilation_error(make_organization, make_alert_receive_channel):
+    organization = make_organization()
+    alert_receive_channel = make_alert_receive_channel(organization, grouping_id_template="{{ payload.id")
+    template = get_group_data_templater(alert_receive_channel).grouping_id_template
+
+    errors = []
+    for _ in range(2):
+        with pytest.raises(JinjaTemplateError) as exc_info:
+            template.render({"id": 1})
+        errors.append(exc_info.value)
+
+    assert errors[0] is not errors[1]
+    assert errors[0].fallback_message == errors[1].fallback_message
+    assert errors[0].fallback_message.startswith("Template Error: ")
+
+
+@pytest.mark.django_db
+def test_group_data_templater_is_rebuilt_on_template_change(make_organization, make_alert_receive_channel):
+    organization = make_organization()
+    alert_receive_channel = make_alert_receive_channel(organization, grouping_id_template="{{ payload.a }}")
+
+    templater = get_group_data_templater(alert_receive_channel)
+    assert get_group_data_templater(alert_receive_channel) is templater
+    assert templater.render({"a": "1"}).group_distinction == hashlib.md5("1".encode()).hexdigest()
+
+    alert_receive_channel.grouping_id_template = "{{ payload.b }}"
+    new_templater = get_group_data_templater(alert_receive_channel)
+    assert new_templater is not templater
+    assert new_templater.render({"a": "1", "b": "2"}).group_distinction == hashlib.md5("2".encode()).hexdigest()
+
+
+@pytest.mark.django_db
+def test_render_group_data_empty_web_title(make_organization, make_alert_receive_channel):
+    organization = make_organization()
+    alert_receive_channel = make_alert_receive_channel(organization)
+
+    with patch(
+        "apps.alerts.incident_appearance.templaters.group_data_templater.TemplateLoader.get_attr_template",
+        return_value="",
+    ):
+        templater = GroupDataTemplater(alert_receive_channel, None)
+
+    assert templater.render({"id": 1}).web_title_cache is None
@@ -3,11 +3,18 @@ from unittest.mock import Mock, patch
 
 import pytest
 import pytz
+from django.core.cache import cache
 from django.utils import timezone
 
-from apps.alerts.tasks.notify_ical_schedule_shift import notify_ical_schedule_shift
+from apps.alerts.tasks.notify_ical_schedule_shift import (
+    NOTIFY_SHIFT_BOUNDARY_DELAY,
+    notify_ical_schedule_shift,
+    schedule_notify_ical_schedule_shift,
+)
 from apps.schedules.ical_utils import memoized_users_in_ical
-from apps.schedules.models import OnCallScheduleICal
+from apps.schedules.models import CustomOnCallShift, OnCallScheduleICal, OnCallScheduleWeb
+from apps.schedules.oncall_timeline import build_schedule_timeline
+from apps.schedules.tasks.refresh_ical_files import refresh_ical_file
 
 ICAL_DATA = """
 BEGIN:VCALENDAR
@@ -105,3 +112,120 @@ def test_next_shift_notification_long_shifts(
     notification = slack_blocks[0]["text"]["text"]
     assert "*New on-call shift:*\nuser2" in notification
     assert "*Next on-call shift:*\nuser1" in notification
+
+
+@pytest.mark.django_db
+def test_schedule_notify_ical_schedule_shift_at_boundary(
+    make_organization, make_user_for_organization, make_schedule, make_on_call_shift
+):
+    cache.clear()
+    organization = make_organization()
+    user = make_user_for_organization(organization)
+    schedule = make_schedule(organization, schedule_class=OnCallScheduleWeb, channel="channel")
+    shift_start = timezone.now().replace(microsecond=0) + timezone.timedelta(hours=1)
+    on_call_shift = make_on_call_shift(
+        organization=organization,
+        shift_type=CustomOnCallShift.TYPE_ROLLING_USERS_EVENT,
+        start=shift_start,
+        rotation_start=shift_start,
+        duration=timezone.timedelta(hours=8),
+        priority_level=1,
+        frequency=CustomOnCallShift.FREQUENCY_DAILY,
+        schedule=schedule,
+    )
+    on_call_shift.add_rolling_users([[user]])
+    schedule.refresh_ical_file()
+
+    with patch("apps.alerts.tasks.notify_ical_schedule_shift.notify_ical_schedule_shift") as mock_notify:
+        # no timeline, shifts are compared right away
+        schedule_notify_ical_schedule_shift(schedule, schedule_changed=False)
+        mock_notify.apply_async.assert_called_once_with((schedule.pk,))
+
+        build_schedule_timeline(schedule)
+        mock_notify.reset_mock()
+        schedule_notify_ical_schedule_shift(schedule, schedule_changed=False)
+        schedule_notify_ical_schedule_shift(schedule, schedule_changed=False)
+        # a single task for the boundary
+        mock_notify.apply_async.assert_called_once_with(
+            (schedule.pk,), {"boundary": shift_start.timestamp()}, eta=shift_start + NOTIFY_SHIFT_BOUNDARY_DELAY
+        )
+
+        mock_notify.reset_mock()
+        schedule_notify_ical_schedule_shift(schedule, schedule_changed=True)
+        mock_notify.apply_async.assert_called_once_with((schedule.pk,))
+
+
+@pytest.mark.django_db
+def test_notify_ical_schedule_shift_skips_outdated_boundary(
+    make_organization_and_user_with_slack_identities, make_schedule, make_on_call_shift
+):
+    cache.clear()
+    organization, user, _, _ = make_organization_and_user_with_slack_identities()
+    schedule = make_schedule(organization, schedule_class=OnCallScheduleWeb, channel="channel")
+    shift_start = timezone.now().replace(microsecond=0) + timezone.timedelta(hours=1)
+    on_call_shift = make_on_call_shift(
+        organization=organization,
+        shift_type=CustomOnCallShift.TYPE_ROLLING_USERS_EVENT,
+        start=shift_start,
+        rotation_start=shift_start,
+        duration=timezone.timedelta(hours=8),
+        priority_level=1,
+        frequency=CustomOnCallShift.FREQUENCY_DAILY,
+        schedule=schedule,
+    )
+    on_call_shift.add_rolling_users([[user]])
+    schedule.refresh_ical_file()
+    build_schedule_timeline(schedule)
+
+    with patch(
+        "apps.alerts.tasks.notify_ical_schedule_shift.get_current_shifts_from_ical", return_value=({}, {})
+    ) as mock_current_shifts:
+        with patch("apps.slack.slack_client.SlackClientWithErrorHandling.api_call"):
+            # on-call users don't change at the boundary anymore, e.g. the shift was moved
+            outdated_boundary = shift_start + timezone.timedelta(minutes=30)
+            notify_ical_schedule_shift(schedule.pk, boundary=outdated_boundary.timestamp())
+            assert not mock_current_shifts.called
+
+            notify_ical_schedule_shift(schedule.pk, boundary=shift_start.timestamp())
+            assert mock_current_shifts.called
+
+
+@pytest.mark.django_db
+def test_notify_ical_schedule_shift_refreshed_at_boundary(
+    make_organization_and_user_with_slack_identities, make_schedule, make_on_call_shift
+):
+    cache.clear()
+    organization, user, _, _ = make_organization_and_user_with_slack_identities()
+    schedule = make_schedule(organization, schedule_class=OnCallScheduleWeb, channel="channel")
+    shift_start = timezone.now().replace(microsecond=0) + timezone.timedelta(hours=1)
+    shift_end = shift_start + timezone.timedelta(hours=8)
+    on_call_shift = make_on_call_shift(
+        organization=organization,
+        shift_type=CustomOnCallShift.TYPE_ROLLING_USERS_EVENT,
+        start=shift_start,
+        rotation_start=shift_start,
+        duration=shift_end - shift_start,
+        priority_level=1,
+        frequency=CustomOnCallShift.FREQUENCY_DAILY,
+        schedule=schedule,
+    )
+    on_call_shift.add_rolling_users([[user]])
+
+    # do not trigger schedule checks for real
+    with patch("apps.schedules.tasks.refresh_ical_files.notify_about_empty_shifts_in_schedule"):
+        with patch("apps.schedules.tasks.refresh_ical_files.notify_about_gaps_in_schedule"):
+            with patch("apps.alerts.tasks.notify_ical_schedule_shift.notify_ical_schedule_shift") as mock_notify:
+                refresh_ical_file(schedule.pk)
+                # the refresh scheduled for the boundary runs right at it and schedules the next boundary
+                with patch("django.utils.timezone.now", return_value=shift_start):
+                    refresh_ical_file(schedule.pk)
+    boundary_tasks = [call for call in mock_notify.apply_async.call_args_list if "eta" in call.kwargs]
+    assert [call.args[1]["boundary"] for call in boundary_tasks] == [shift_start.timestamp(), shift_end.timestamp()]
+
+    # the task of the passed boundary isn't skipped
+    with patch(
+        "apps.alerts.tasks.notify_ical_schedule_shift.get_current_shifts_from_ical", return_value=({}, {})
+    ) as mock_current_shifts:
+        with patch("apps.slack.slack_client.SlackClientWithErrorHandling.api_call"):
+            notify_ical_schedule_shift(schedule.pk, boundary=shift_start.timestamp())
+    assert mock_current_shifts.called
@@ -2,7 +2,13 @@ from unittest.mock import patch
 
 import pytest
 
-from apps.alerts.tasks.notify_user import notify_user_task, perform_notification
+from apps.alerts.models import UserHasNotification
+from apps.alerts.tasks.notify_user import (
+    notify_user_task,
+    notify_users_task,
+    perform_notification,
+    send_user_notification_signal,
+)
 from apps.api.permissions import LegacyAccessControlRole
 from apps.base.models.user_notification_policy import UserNotificationPolicy
 from apps.base.models.user_notification_policy_log_record import UserNotificationPolicyLogRecord
@@ -178,3 +184,52 @@ def test_notify_user_error_if_viewer(
     assert error_log_record.type == UserNotificationPolicyLogRecord.TYPE_PERSONAL_NOTIFICATION_FAILED
     assert error_log_record.reason == NOTIFICATION_UNAUTHORIZED_MSG
     assert error_log_record.notification_error_code == UserNotificationPolicyLogRecord.ERROR_NOTIFICATION_FORBIDDEN
+
+
+@pytest.mark.django_db
+def test_notify_users(
+    make_organization,
+    make_user_for_organization,
+    make_user_notification_policy,
+    make_alert_receive_channel,
+    make_alert_group,
+):
+    organization = make_organization()
+    user_1 = make_user_for_organization(organization)
+    user_2 = make_user_for_organization(organization)
+    viewer = make_user_for_organization(organization, role=LegacyAccessControlRole.VIEWER)
+    for user in (user_1, user_2):
+        make_user_notification_policy(
+            user=user,
+            step=UserNotificationPolicy.Step.NOTIFY,
+            notify_by=UserNotificationPolicy.NotificationChannel.TESTONLY,
+        )
+        make_user_notification_policy(
+            user=user, step=UserNotificationPolicy.Step.WAIT, wait_delay=UserNotificationPolicy.FIVE_MINUTES
+        )
+    alert_receive_channel = make_alert_receive_channel(organization=organization)
+    alert_group = make_alert_group(alert_receive_channel=alert_receive_channel)
+
+    with patch.object(notify_user_task, "apply_async") as mock_notify_user, patch.object(
+        perform_notification, "apply_async"
+    ) as mock_perform_notification, patch.object(send_user_notification_signal, "apply_async"), patch(
+        "django.db.transaction.on_commit", side_effect=lambda func: func()
+    ):
+        notify_users_task([user_1.pk, user_2.pk, viewer.pk], alert_group.pk, reason="test")
+
+    log_records = UserNotificationPolicyLogRecord.objects.filter(alert_group=alert_group)
+    assert log_records.get(author=viewer).notification_error_code == (
+        UserNotificationPolicyLogRecord.ERROR_NOTIFICATION_FORBIDDEN
+    )
+    assert mock_perform_notification.call_count == 2
+
+    # further notification steps are made by notify_user_task of each user
+    assert mock_notify_user.call_count == 2
+    for user, notify_user_call in zip((user_1, user_2), mock_notify_user.call_args_list):
+        user_pk, alert_group_pk, previous_notification_policy_pk, reason = notify_user_call.args[0]
+        assert (user_pk, alert_group_pk) == (user.pk, alert_group.pk)
+        assert previous_notification_policy_pk == user.notification_policies.get(important=False, order=0).pk
+        assert reason == "Reason: test\n"
+        user_has_notification = UserHasNotification.objects.get(user=user, alert_group=alert_group)
+        assert user_has_notification.active_notification_policy_id == notify_user_call.kwargs["task_id"]
+    assert not UserHasNotification.objects.filter(user=viewer).exists()
@@ -1216,6 +1216,116 @@ def test_next_shifts_per_user(
     assert returned_data == expected
 
 
+@pytest.mark.django_db
+def test_oncall_users(
+    make_organization_and_user_with_plugin_token,
+    make_user_for_organization,
+    make_user_auth_headers,
+    make_schedule,
+    make_on_call_shift,
+):
+    organization, admin, token = make_organization_and_user_with_plugin_token()
+    client = APIClient()
+    user_a, user_b = (make_user_for_organization(organization, username=i) for i in "AB")
+
+    tomorrow = timezone.now().replace(hour=0, minute=0, second=0, microsecond=0) + timezone.timedelta(days=1)
+    schedules = []
+    for user in (user_a, user_b):
+        schedule = make_schedule(organization, schedule_class=OnCallScheduleWeb)
+        on_call_shift = make_on_call_shift(
+            organization=organization,
+            shift_type=CustomOnCallShift.TYPE_ROLLING_USERS_EVENT,
+            start=tomorrow + timezone.timedelta(hours=8),
+            rotation_start=tomorrow + timezone.timedelta(hours=8),
+            duration=timezone.timedelta(hours=8),
+            priority_level=1,
+            frequency=CustomOnCallShift.FREQUENCY_DAILY,
+            schedule=schedule,
+        )
+        on_call_shift.add_rolling_users([[user]])
+        schedules.append(schedule)
+
+    url = reverse("api-internal:schedule-oncall-users")
+    params = {
+        "schedule": [schedule.public_primary_key for schedule in schedules],
+        "timestamp": [
+            (tomorrow + timezone.timedelta(hours=9)).isoformat(),
+            (tomorrow + timezone.timedelta(hours=17)).replace(tzinfo=None).isoformat(),
+        ],
+    }
+    response = client.get(url, params, **make_user_auth_headers(admin, token))
+    assert response.status_code == status.HTTP_200_OK
+
+    result = {
+        s["id"]: [[u["pk"] for u in users] for users in s["oncall_users"]] for s in response.json()["schedules"]
+    }
+    assert result == {
+        schedules[0].public_primary_key: [[user_a.public_primary_key], []],
+        schedules[1].public_primary_key: [[user_b.public_primary_key], []],
+    }
+
+    response = client.get(url, {"schedule": "unknown"}, **make_user_auth_headers(admin, token))
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    params = {"schedule": schedules[0].public_primary_key, "timestamp": "invalid"}
+    response = client.get(url, params, **make_user_auth_headers(admin, token))
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+
+@pytest.mark.django_db
+def test_list_schedules_on_call_now(
+    make_organization_and_user_with_plugin_token,
+    make_user_auth_headers,
+    make_schedule,
+    make_on_call_shift,
+):
+    organization, user, token = make_organization_and_user_with_plugin_token()
+    client = APIClient()
+
+    today = timezone.now().replace(hour=0, minute=0, second=0, microsecond=0)
+    schedule = make_schedule(organization, schedule_class=OnCallScheduleWeb)
+    on_call_shift = make_on_call_shift(
+        organization=organization,
+        shift_type=CustomOnCallShift.TYPE_ROLLING_USERS_EVENT,
+        start=today,
+        rotation_start=today,
+        duration=timezone.timedelta(hours=23, minutes=59, seconds=59),
+        priority_level=1,
+        frequency=CustomOnCallShift.FREQUENCY_DAILY,
+        schedule=schedule,
+    )
+    on_call_shift.add_rolling_users([[user]])
+
+    url = reverse("api-internal:schedule-list")
+    response = client.get(url, **make_user_auth_headers(user, token))
+    assert response.status_code == status.HTTP_200_OK
+    [result] = response.json()["results"]
+    assert [u["pk"] for u in result["on_call_now"]] == [user.public_primary_key]
+
+    url = reverse("api-internal:schedule-detail", kwargs={"pk": schedule.public_primary_key})
+    response = client.get(url, **make_user_auth_headers(user, token))
+    assert response.status_code == status.HTTP_200_OK
+    assert [u["pk"] for u in response.json()["on_call_now"]] == [user.public_primary_key]
+
+
+@pytest.mark.django_db
+def test_oncall_users_other_team(
+    make_organization_and_user_with_plugin_token,
+    make_user_auth_headers,
+    make_schedule,
+    make_team,
+):
+    organization, user, token = make_organization_and_user_with_plugin_token()
+    client = APIClient()
+    team = make_team(organization)
+    schedule = make_schedule(organization, schedule_class=OnCallScheduleWeb, team=team)
+
+    # schedules are scoped by the current team of the user like in other schedule endpoints
+    url = reverse("api-internal:schedule-oncall-users")
+    response = client.get(url, {"schedule": schedule.public_primary_key}, **make_user_auth_headers(user, token))
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+
 @pytest.mark.django_db
 def test_related_escalation_chains(
     make_organization_and_user_with_plugin_token,
@@ -1,3 +1,4 @@
+import pytz
 from django.core.exceptions import ObjectDoesNotExist
 from django.db.models import Count, OuterRef, Subquery
 from django.db.utils import IntegrityError
@@ -25,8 +26,9 @@ from apps.api.serializers.schedule_polymorphic import (
 from apps.auth_token.auth import PluginAuthentication
 from apps.auth_token.constants import SCHEDULE_EXPORT_TOKEN_NAME
 from apps.auth_token.models import ScheduleExportAuthToken
+from apps.schedules.ical_utils import get_oncall_users_for_multiple_schedules_at, get_schedule_event_columns
 from apps.schedules.models import OnCallSchedule
-from apps.schedules.quality_score import get_schedule_quality_score
+from apps.schedules.quality_score import get_schedule_quality_score_by_columns
 from apps.slack.models import SlackChannel
 from apps.slack.tasks import update_slack_user_group_for_schedules
 from common.api_helpers.exceptions import BadRequest, Conflict
@@ -45,6 +47,11 @@ EVENTS_FILTER_BY_ROTATION = "rotation"
 EVENTS_FILTER_BY_OVERRIDE = "override"
 EVENTS_FILTER_BY_FINAL = "final"
 
+ONCALL_USERS_MAX_SCHEDULES = 100
+ONCALL_USERS_MAX_TIMESTAMPS = 100
+
+QUALITY_MAX_DAYS = 366
+
 SCHEDULE_TYPE_TO_CLASS = {
     str(num_type): cls for cls, num_type in PolymorphicScheduleSerializer.SCHEDULE_CLASS_TO_TYPE.items()
 }
@@ -80,6 +87,7 @@ class ScheduleView(
         "notify_oncall_shift_freq_options": [RBACPermission.Permissions.SCHEDULES_READ],
         "mention_options": [RBACPermission.Permissions.SCHEDULES_READ],
         "related_escalation_chains": [RBACPermission.Permissions.SCHEDULES_READ],
+        "batch_oncall_users": [RBACPermission.Permissions.SCHEDULES_READ],
         "create": [RBACPermission.Permissions.SCHEDULES_WRITE],
         "update": [RBACPermission.Permissions.SCHEDULES_WRITE],
         "partial_update": [RBACPermission.Permissions.SCHEDULES_WRITE],
@@ -342,13 +350,68 @@ class ScheduleView(
     def quality(self, request, pk):
         schedule = self.get_object()
         user_tz, date = self.get_request_timezone()
-        days = int(self.request.query_params.get("days", 90))  # todo: check if days could be calculated more precisely
+        # todo: check if days could be calculated more precisely
+        try:
+            days = int(self.request.query_params.get("days", 90))
+        except ValueError:
+            raise BadRequest(detail="Invalid days format")
+        if not 0 < days <= QUALITY_MAX_DAYS:
+            raise BadRequest(detail=f"days must be between 1 and {QUALITY_MAX_DAYS}")
+        with_load_distribution = self.request.query_params.get("with_load_distribution", "false") == "true"
 
-        events = schedule.filter_events(user_tz, date, days=days, with_empty=True, with_gap=True)
+        columns = get_schedule_event_columns(schedule, date, user_tz, days=days)
 
-        schedule_score = get_schedule_quality_score(events, days)
+        schedule_score = get_schedule_quality_score_by_columns(columns, days, with_load_distribution)
         return Response(schedule_score)
 
+    @action(detail=False, methods=["get"], url_path="oncall_users", url_name="oncall-users")
+    def batch_oncall_users(self, request):
+        """
+        Return on-call users of schedules passed as `schedule` params at timestamps passed as `timestamp` params
+        (ISO 8601, UTC if timezone is omitted, now by default) in a single request.
+        """
+        schedule_pks = self.request.query_params.getlist("schedule")
+        if not schedule_pks:
+            raise BadRequest(detail="schedule param is required")
+        if len(schedule_pks) > ONCALL_USERS_MAX_SCHEDULES:
+            raise BadRequest(detail=f"Up to {ONCALL_USERS_MAX_SCHEDULES} schedules are allowed")
+
+        timestamps = []
+        for timestamp_param in self.request.query_params.getlist("timestamp"):
+            try:
+                timestamp = dateparse.parse_datetime(timestamp_param)
+            except ValueError:
+                timestamp = None
+            if timestamp is None:
+                raise BadRequest(detail="Invalid timestamp format")
+            if timezone.is_naive(timestamp):
+                timestamp = timezone.make_aware(timestamp, pytz.UTC)
+            timestamps.append(timestamp.astimezone(pytz.UTC))
+        if len(timestamps) > ONCALL_USERS_MAX_TIMESTAMPS:
+            raise BadRequest(detail=f"Up to {ONCALL_USERS_MAX_TIMESTAMPS} timestamps are allowed")
+        if not timestamps:
+            timestamps = [timezone.now()]
+
+        schedules = self.get_queryset().filter(public_primary_key__in=schedule_pks)
+        schedules = {schedule.public_primary_key: schedule for schedule in schedules}
+        not_found = [pk for pk in schedule_pks if pk not in schedules]
+        if not_found:
+            raise BadRequest(detail=f"Schedules not found: {', '.join(not_found)}")
+
+        oncall_users = get_oncall_users_for_multiple_schedules_at(schedules.values(), timestamps)
+        result = {
+            "timestamps": timestamps,
+            "schedules": [
+                {
+                    "id": schedule.public_primary_key,
+                    "name": schedule.name,
+                    "oncall_users": [[user.short() for user in users] for users in oncall_users[schedule.pk]],
+                }
+                for schedule in (schedules[pk] for pk in dict.fromkeys(schedule_pks))
+            ],
+        }
+        return Response(result, status=status.HTTP_200_OK)
+
     @action(detail=False, methods=["get"])
     def type_options(self, request):
         # TODO: check if it needed
@@ -1,11 +1,15 @@
+import datetime
 from enum import unique
-from typing import Tuple
+from typing import Dict, Iterable, NamedTuple, Optional, Tuple
 
 from django.conf import settings
+from django.core.cache import cache
 from django.core.exceptions import ValidationError
 from django.core.validators import MinLengthValidator
-from django.db import models
+from django.db import models, transaction
 from django.db.models import Q, QuerySet
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
 from django.utils import timezone
 from ordered_model.models import OrderedModel
 
@@ -56,6 +60,26 @@ def _notification_channel_choices():
 
 _notification_channels = _notification_channel_choices()
 
+USER_NOTIFICATION_PLAN_CACHE_KEY = "user_notification_plan_{}_{}"
+USER_NOTIFICATION_PLAN_CACHE_TIMEOUT = 60 * 60 * 24
+
+
+def _notification_plan_cache_key(user_pk, important):
+    return USER_NOTIFICATION_PLAN_CACHE_KEY.format(user_pk, int(important))
+
+
+class NotificationPlanStep(NamedTuple):
+    """
+    Compact copy of UserNotificationPolicy fields used to notify user and to render notification plan,
+    can be used in place of UserNotificationPolicy for reading these fields
+    """
+
+    pk: int
+    order: int
+    step: Optional[int]
+    notify_by: int
+    wait_delay: Optional[datetime.timedelta]
+
 
 def validate_channel_choice(value):
     if value is None:
@@ -82,6 +106,7 @@ class UserNotificationPolicyQuerySet(models.QuerySet):
         )
 
         super().bulk_create(policies_to_create)
+        model.invalidate_notification_plans(user.pk)
         return user.notification_policies.filter(important=False)
 
     def create_important_policies_for_user(self, user: User) -> "QuerySet[UserNotificationPolicy]":
@@ -98,6 +123,7 @@ class UserNotificationPolicyQuerySet(models.QuerySet):
         )
 
         super().bulk_create(policies_to_create)
+        model.invalidate_notification_plans(user.pk)
         return user.notification_policies.filter(important=True)
 
 
@@ -161,6 +187,47 @@ class UserNotificationPolicy(OrderedModel):
 
         return default, important
 
+    @classmethod
+    def get_notification_plans(
+        cls, user_pks: Iterable[int], important: bool
+    ) -> Dict[int, Tuple[NotificationPlanStep, ...]]:
+        """
+        Return ordered notification plan steps of the users, cached until their notification policies are changed.
+        Plans missing in the cache are fetched by a single query.
+        """
+        cache_keys = {user_pk: _notification_plan_cache_key(user_pk, important) for user_pk in user_pks}
+        cached_plans = cache.get_many(cache_keys.values())
+        notification_plans = {
+            user_pk: cached_plans[cache_key] for user_pk, cache_key in cache_keys.items() if cache_key in cached_plans
+        }
+
+        missing_user_pks = [user_pk for user_pk in cache_keys if user_pk not in notification_plans]
+        if missing_user_pks:
+            steps_by_user = {user_pk: [] for user_pk in missing_user_pks}
+            notification_policies = cls.objects.filter(user__in=missing_user_pks, important=important).values_list(
+                "user_id", "pk", "order", "step", "notify_by", "wait_delay"
+            )
+            for user_pk, *fields in notification_policies:
+                steps_by_user[user_pk].append(NotificationPlanStep(*fields))
+            missing_plans = {user_pk: tuple(steps) for user_pk, steps in steps_by_user.items()}
+            cache.set_many(
+                {cache_keys[user_pk]: plan for user_pk, plan in missing_plans.items()},
+                timeout=USER_NOTIFICATION_PLAN_CACHE_TIMEOUT,
+            )
+            notification_plans.update(missing_plans)
+        return notification_plans
+
+    @classmethod
+    def get_notification_plan(cls, user_pk: int, important: bool) -> Tuple[NotificationPlanStep, ...]:
+        return cls.get_notification_plans([user_pk], important)[user_pk]
+
+    @classmethod
+    def invalidate_notification_plans(cls, user_pk: int) -> None:
+        cache_keys = [_notification_plan_cache_key(user_pk, important) for important in (False, True)]
+        cache.delete_many(cache_keys)
+        # drop plans cached by concurrent readers before the changes were committed
+        transaction.on_commit(lambda: cache.delete_many(cache_keys))
+
     @property
     def short_verbal(self) -> str:
         if self.step == UserNotificationPolicy.Step.NOTIFY:
@@ -184,6 +251,21 @@ class UserNotificationPolicy(OrderedModel):
             super().delete()
 
 
+@receiver(post_save, sender=UserNotificationPolicy)
+@receiver(post_delete, sender=UserNotificationPolicy)
+def listen_for_user_notification_policy_change(sender, instance, *args, **kwargs):
+    # reordering also updates other policies of the user without signals, so plans are invalidated for the whole user
+    if instance.user_id is not None:
+        UserNotificationPolicy.invalidate_notification_plans(instance.user_id)
+
+
+@receiver(post_save, sender=User)
+def listen_for_user_create(sender, instance, created, *args, **kwargs):
+    # don't use plans cached for the same pk before, e.g. for a deleted user
+    if created:
+        UserNotificationPolicy.invalidate_notification_plans(instance.pk)
+
+
 class NotificationChannelOptions:
     """
     NotificationChannelOptions encapsulates logic of notification channel representation for API and public API,
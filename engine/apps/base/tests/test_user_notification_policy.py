@@ -6,6 +6,7 @@ from apps.base.models.user_notification_policy import (
     NotificationChannelAPIOptions,
     NotificationChannelOptions,
     NotificationChannelPublicAPIOptions,
+    NotificationPlanStep,
     validate_channel_choice,
 )
 from apps.base.tests.messaging_backend import TestOnlyBackend
@@ -103,3 +104,51 @@ def test_unable_to_delete_last_notification_policy(
     first_policy.delete()
     with pytest.raises(UserNotificationPolicyCouldNotBeDeleted):
         second_policy.delete()
+
+
+@pytest.mark.django_db
+def test_notification_plan(
+    make_organization,
+    make_user_for_organization,
+    make_user_notification_policy,
+    django_assert_num_queries,
+):
+    organization = make_organization()
+    user = make_user_for_organization(organization)
+    other_user = make_user_for_organization(organization)
+
+    notify_policy = make_user_notification_policy(
+        user, UserNotificationPolicy.Step.NOTIFY, notify_by=UserNotificationPolicy.NotificationChannel.SLACK
+    )
+    wait_policy = make_user_notification_policy(user, UserNotificationPolicy.Step.WAIT, wait_delay=timedelta(minutes=5))
+    make_user_notification_policy(
+        user,
+        UserNotificationPolicy.Step.NOTIFY,
+        notify_by=UserNotificationPolicy.NotificationChannel.SMS,
+        important=True,
+    )
+
+    with django_assert_num_queries(1):
+        notification_plans = UserNotificationPolicy.get_notification_plans([user.pk, other_user.pk], False)
+    assert notification_plans == {
+        user.pk: (
+            NotificationPlanStep(
+                notify_policy.pk, 0, UserNotificationPolicy.Step.NOTIFY, notify_policy.notify_by, None
+            ),
+            NotificationPlanStep(wait_policy.pk, 1, UserNotificationPolicy.Step.WAIT, 0, timedelta(minutes=5)),
+        ),
+        other_user.pk: (),
+    }
+
+    # plans are cached until notification policies of the user are changed
+    with django_assert_num_queries(0):
+        assert UserNotificationPolicy.get_notification_plan(user.pk, False) == notification_plans[user.pk]
+
+    wait_policy.to(0)
+    assert [step.pk for step in UserNotificationPolicy.get_notification_plan(user.pk, False)] == [
+        wait_policy.pk,
+        notify_policy.pk,
+    ]
+
+    notify_policy.delete()
+    assert [step.pk for step in UserNotificationPolicy.get_notification_plan(user.pk, False)] == [wait_policy.pk]
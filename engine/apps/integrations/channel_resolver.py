@@ -0,0 +1,211 @@
+"""
+Two-tier integration token -> AlertReceiveChannel resolution for inbound webhooks.
+
+Tier one is a per-process LRU of compact channel records with a short TTL. Once the TTL is over the record is
+revalidated against tier two by its version, so unchanged records are not replaced.
+Tier two is a cache entry per token (Redis in production) with a short TTL too, so changes made without save()
+are picked up in seconds. It is populated on DB reads.
+When the DB is not available fully populated channels cached by warm_up_channel_records are used instead.
+"""
+import logging
+import threading
+import time
+import typing
+from collections import OrderedDict
+from uuid import uuid4
+
+from django.apps import apps
+from django.core.cache import cache
+from django.db.models.base import DEFERRED
+
+logger = logging.getLogger(__name__)
+
+CHANNEL_RECORD_CACHE_KEY = "integration_token_{}"
+CHANNEL_RECORD_CACHE_TIMEOUT = 5
+
+# Channels used when the DB is not available, entries of deleted channels and old tokens expire eventually
+CHANNEL_FALLBACK_CACHE_KEY = "integration_token_fallback_{}"
+CHANNEL_FALLBACK_CACHE_TIMEOUT = 60 * 60 * 24
+
+# All fallback channels are re-cached at most once per interval, when some token was resolved from the DB
+CHANNEL_RECORDS_WARM_UP_KEY = "integration_token_records_warm_up"
+CHANNEL_RECORDS_WARM_UP_INTERVAL = 180
+
+LOCAL_CHANNEL_RECORD_TIMEOUT = 5
+LOCAL_CHANNEL_RECORD_MAX_SIZE = 10000
+
+
+class ChannelRecord(typing.NamedTuple):
+    pk: int
+    token: str
+    organization_id: int
+    integration: str
+    verbal_name: typing.Optional[str]
+    maintenance_mode: typing.Optional[int]
+    organization_is_moved: bool
+    organization_is_deleted: bool
+    version: str
+
+
+# (AlertReceiveChannel field lookup, ChannelRecord field)
+_CHANNEL_RECORD_LOOKUPS = (
+    ("pk", "pk"),
+    ("token", "token"),
+    ("organization_id", "organization_id"),
+    ("integration", "integration"),
+    ("verbal_name", "verbal_name"),
+    ("maintenance_mode", "maintenance_mode"),
+    ("organization__migration_destination", "organization_is_moved"),
+    ("organization__deleted_at", "organization_is_deleted"),
+)
+
+_local_records: OrderedDict[str, typing.Tuple[ChannelRecord, float]] = OrderedDict()
+_local_records_lock = threading.Lock()
+
+
+def _cache_key(token: str) -> str:
+    return CHANNEL_RECORD_CACHE_KEY.format(token)
+
+
+def _fallback_cache_key(token: str) -> str:
+    return CHANNEL_FALLBACK_CACHE_KEY.format(token)
+
+
+def _records_from_db(**filters) -> typing.List[ChannelRecord]:
+    AlertReceiveChannel = apps.get_model("alerts", "AlertReceiveChannel")
+
+    records = []
+    lookups = [lookup for lookup, _ in _CHANNEL_RECORD_LOOKUPS]
+    for values in AlertReceiveChannel.objects.filter(**filters).values_list(*lookups):
+        record = dict(zip((field for _, field in _CHANNEL_RECORD_LOOKUPS), values))
+        record["organization_is_moved"] = record["organization_is_moved"] is not None
+        record["organization_is_deleted"] = record["organization_is_deleted"] is not None
+        records.append(ChannelRecord(version=uuid4().hex, **record))
+    return records
+
+
+def _get_local_record(token: str, include_expired=False) -> typing.Optional[ChannelRecord]:
+    with _local_records_lock:
+        entry = _local_records.get(token)
+        if entry is None:
+            return None
+        record, expires_at = entry
+        if not include_expired and expires_at <= time.monotonic():
+            return None
+        _local_records.move_to_end(token)
+        return record
+
+
+def _set_local_record(record: ChannelRecord) -> None:
+    with _local_records_lock:
+        _local_records[record.token] = (record, time.monotonic() + LOCAL_CHANNEL_RECORD_TIMEOUT)
+        _local_records.move_to_end(record.token)
+        while len(_local_records) > LOCAL_CHANNEL_RECORD_MAX_SIZE:
+            _local_records.popitem(last=False)
+
+
+def get_channel_record(token: str) -> typing.Optional[ChannelRecord]:
+    """
+    Resolve integration token to a compact channel record.
+    Returns None if there is no such integration, raises OperationalError if it's not cached and the DB is down.
+    """
+    record = _get_local_record(token)
+    if record is not None:
+        return record
+
+    cached_record = cache.get(_cache_key(token))
+    if cached_record is not None:
+        # keep already known record if it wasn't changed to save on replacing it in LRU
+        local_record = _get_local_record(token, include_expired=True)
+        if local_record is not None and local_record.version == cached_record.version:
+            record = local_record
+        else:
+            record = cached_record
+        _set_local_record(record)
+        return record
+
+    records = _records_from_db(token=token)
+    if not records:
+        return None
+    record = records[0]
+    cache.set(_cache_key(token), record, CHANNEL_RECORD_CACHE_TIMEOUT)
+    _set_local_record(record)
+
+    warm_up_channel_records_if_obsolete()
+    return record
+
+
+def get_fallback_channel(token: str):
+    """
+    Resolve integration token to (ChannelRecord, AlertReceiveChannel) without touching the DB.
+    Used when the DB is not available, the channel and its organization are fully populated.
+    """
+    return cache.get(_fallback_cache_key(token))
+
+
+def warm_up_channel_records() -> None:
+    AlertReceiveChannel = apps.get_model("alerts", "AlertReceiveChannel")
+
+    logger.info("Caching alert receive channels from database.")
+    fallback_channels = {}
+    for alert_receive_channel in AlertReceiveChannel.objects.select_related("organization"):
+        organization = alert_receive_channel.organization
+        record = ChannelRecord(
+            pk=alert_receive_channel.pk,
+            token=alert_receive_channel.token,
+            organization_id=alert_receive_channel.organization_id,
+            integration=alert_receive_channel.integration,
+            verbal_name=alert_receive_channel.verbal_name,
+            maintenance_mode=alert_receive_channel.maintenance_mode,
+            organization_is_moved=organization.is_moved,
+            organization_is_deleted=organization.deleted_at is not None,
+            version=uuid4().hex,
+        )
+        fallback_channels[_fallback_cache_key(record.token)] = (record, alert_receive_channel)
+    cache.set_many(fallback_channels, CHANNEL_FALLBACK_CACHE_TIMEOUT)
+
+
+def warm_up_channel_records_if_obsolete() -> None:
+    if cache.get(CHANNEL_RECORDS_WARM_UP_KEY) is None:
+        cache.set(CHANNEL_RECORDS_WARM_UP_KEY, True, CHANNEL_RECORDS_WARM_UP_INTERVAL)
+        warm_up_channel_records()
+
+
+def invalidate_channel_record(token: str) -> None:
+    cache.delete_many([_cache_key(token), _fallback_cache_key(token)])
+    with _local_records_lock:
+        _local_records.pop(token, None)
+
+
+def invalidate_organization_channel_records(organization_ids: typing.Iterable[int]) -> None:
+    """
+    Drop cached records of all integrations of the organizations, so a moved or deleted organization is picked up.
+    """
+    AlertReceiveChannel = apps.get_model("alerts", "AlertReceiveChannel")
+
+    tokens = list(
+        AlertReceiveChannel.objects.filter(organization_id__in=organization_ids).values_list("token", flat=True)
+    )
+    cache.delete_many([key for token in tokens for key in (_cache_key(token), _fallback_cache_key(token))])
+    with _local_records_lock:
+        for token in tokens:
+            _local_records.pop(token, None)
+
+
+def build_alert_receive_channel(record: ChannelRecord):
+    """
+    Build AlertReceiveChannel instance from the record without querying the DB.
+    Fields which are not in the record are deferred and fetched from the DB on first access.
+    """
+    AlertReceiveChannel = apps.get_model("alerts", "AlertReceiveChannel")
+
+    loaded_values = {
+        AlertReceiveChannel._meta.pk.attname: record.pk,
+        "token": record.token,
+        "organization_id": record.organization_id,
+        "integration": record.integration,
+        "verbal_name": record.verbal_name,
+        "maintenance_mode": record.maintenance_mode,
+    }
+    values = [loaded_values.get(field.attname, DEFERRED) for field in AlertReceiveChannel._meta.concrete_fields]
+    return AlertReceiveChannel.from_db(None, list(loaded_values), values)
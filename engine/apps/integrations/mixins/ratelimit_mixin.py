@@ -1,4 +1,5 @@
 import logging
+import time
 from abc import ABC, abstractmethod
 from functools import wraps
 
@@ -8,7 +9,7 @@ from django.http import HttpRequest, HttpResponse
 from django.views import View
 from ratelimit import ALL
 from ratelimit.exceptions import Ratelimited
-from ratelimit.utils import is_ratelimited
+from ratelimit.utils import get_usage_count, is_ratelimited
 
 from apps.integrations.tasks import start_notify_about_integration_ratelimit
 
@@ -58,6 +59,10 @@ def ratelimit(group=None, key=None, rate=None, method=ALL, block=False, reason=N
             ratelimited = is_ratelimited(
                 request=request, group=group, fn=fn, key=key, rate=rate, method=method, increment=True
             )
+            # Requests carrying several alerts are counted by their weight
+            if not ratelimited:
+                weight = getattr(request, "ratelimit_weight", 1)
+                ratelimited = count_ratelimit_weight(request, group, fn, key, rate, method, weight)
 
             # We need to know if it's the first ratelimited request for notification purposes.
             request.is_first_rate_limited_request = getattr(request, "is_first_rate_limited_request", False)
@@ -85,6 +90,34 @@ def ratelimit(group=None, key=None, rate=None, method=ALL, block=False, reason=N
     return decorator
 
 
+def count_ratelimit_weight(request, group, fn, key, rate, method, weight):
+    """
+    django-ratelimit counts every request once, the rest of the request weight is counted in a separate counter
+    expiring with the same window. Only the allowance left in the window is counted, so a batch larger than the limit
+    is accepted when the limit is not reached yet and its retries don't keep the integration locked out.
+    Returns whether the request is ratelimited by the weight of previous requests.
+    """
+    usage = get_usage_count(request, group=group, fn=fn, key=key, rate=rate, method=method, increment=False)
+    if usage is None:
+        return False
+
+    weight_cache_key = f"ratelimit_weight_{group}_{key(group, request)}_{int(time.time()) + usage['time_left']}"
+    count = usage["count"] + cache.get(weight_cache_key, 0)
+    if count > usage["limit"]:
+        request.limited = True
+        return True
+
+    extra_weight = min(weight - 1, usage["limit"] - count)
+    if extra_weight > 0:
+        cache.add(weight_cache_key, 0, timeout=max(usage["time_left"], 1))
+        try:
+            cache.incr(weight_cache_key, extra_weight)
+        except ValueError:
+            # counter has expired in between, the window is over
+            pass
+    return False
+
+
 def is_ratelimit_ignored(alert_receive_channel):
     DynamicSetting = apps.get_model("base", "DynamicSetting")
     integration_token_to_ignore_ratelimit = DynamicSetting.objects.get_or_create(
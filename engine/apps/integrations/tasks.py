@@ -1,13 +1,12 @@
 import logging
-import random
 
 from celery import shared_task
 from celery.utils.log import get_task_logger
+from celery.utils.time import get_exponential_backoff_interval
 from django.apps import apps
 from django.conf import settings
 from django.core.cache import cache
 
-from apps.alerts.models.alert_group_counter import ConcurrentUpdateError
 from apps.alerts.tasks import resolve_alert_group_by_source_if_needed
 from apps.slack.slack_client import SlackClientWithErrorHandling
 from apps.slack.slack_client.exceptions import SlackAPIException
@@ -17,6 +16,9 @@ from common.custom_celery_tasks.create_alert_base_task import CreateAlertBaseTas
 logger = get_task_logger(__name__)
 logger.setLevel(logging.DEBUG)
 
+# partially failed batches are retried by new tasks, the limit applies when the task itself retries forever
+ALERTMANAGER_BATCH_MAX_RETRIES = 10
+
 
 @shared_task(
     base=CreateAlertBaseTask,
@@ -36,26 +38,18 @@ def create_alertmanager_alerts(alert_receive_channel_pk, alert, is_demo=False, f
         logger.info(f"AlertReceiveChannel alert ignored if deleted/maintenance")
         return
 
-    try:
-        alert = Alert.create(
-            title=None,
-            message=None,
-            image_url=None,
-            link_to_upstream_details=None,
-            alert_receive_channel=alert_receive_channel,
-            integration_unique_data=None,
-            raw_request_data=alert,
-            enable_autoresolve=False,
-            is_demo=is_demo,
-            force_route_id=force_route_id,
-        )
-    except ConcurrentUpdateError:
-        # This error is raised when there are concurrent updates on AlertGroupCounter due to optimistic lock on it.
-        # The idea is to not block the worker with a database lock and retry the task in case of concurrent updates.
-        countdown = random.randint(1, 10)
-        create_alertmanager_alerts.apply_async((alert_receive_channel_pk, alert), countdown=countdown)
-        logger.warning(f"Retrying the task gracefully in {countdown} seconds due to ConcurrentUpdateError")
-        return
+    alert = Alert.create(
+        title=None,
+        message=None,
+        image_url=None,
+        link_to_upstream_details=None,
+        alert_receive_channel=alert_receive_channel,
+        integration_unique_data=None,
+        raw_request_data=alert,
+        enable_autoresolve=False,
+        is_demo=is_demo,
+        force_route_id=force_route_id,
+    )
 
     if alert_receive_channel.allow_source_based_resolving:
         task = resolve_alert_group_by_source_if_needed.apply_async((alert.group.pk,), countdown=5)
@@ -65,6 +59,129 @@ def create_alertmanager_alerts(alert_receive_channel_pk, alert, is_demo=False, f
     logger.info(f"Created alert {alert.pk} for alert group {alert.group.pk}")
 
 
+@shared_task(
+    base=CreateAlertBaseTask,
+    autoretry_for=(Exception,),
+    retry_backoff=True,
+    max_retries=1 if settings.DEBUG else None,
+)
+def create_alertmanager_alerts_batch(
+    alert_receive_channel_pk, alerts, is_demo=False, force_route_id=None, retry_count=0
+):
+    """
+    Create alerts for the whole "alerts" list of a single AlertManager / Grafana Alerting webhook.
+    The channel is resolved once, alerts are rendered and routed once each and grouped by their alert group
+    before any AlertGroup is touched, so alerts of the same group are created one after another.
+    Only the first alert of each group goes through Alert.create, the rest are inserted in bulk when possible.
+    If it fails after some alerts are created, only the rest is retried by a new task, retry_count is the number
+    of such retries so far.
+    """
+    AlertReceiveChannel = apps.get_model("alerts", "AlertReceiveChannel")
+    Alert = apps.get_model("alerts", "Alert")
+    ChannelFilter = apps.get_model("alerts", "ChannelFilter")
+
+    alert_receive_channel = AlertReceiveChannel.objects_with_deleted.get(pk=alert_receive_channel_pk)
+    if (
+        alert_receive_channel.deleted_at is not None
+        or alert_receive_channel.integration == AlertReceiveChannel.INTEGRATION_MAINTENANCE
+    ):
+        logger.info(f"AlertReceiveChannel alert ignored if deleted/maintenance")
+        return
+
+    # {(channel_filter_pk, group_distinction): [(alert, channel_filter, group_data), ...]}, keeps arrival order
+    grouped_alerts = {}
+    for alert in alerts:
+        group_data = Alert.render_group_data(alert_receive_channel, alert, is_demo)
+        channel_filter = ChannelFilter.select_filter(alert_receive_channel, alert, force_route_id)
+        group_key = (channel_filter.pk if channel_filter else None, group_data.group_distinction)
+        grouped_alerts.setdefault(group_key, []).append((alert, channel_filter, group_data))
+
+    pending_alerts = [alert_data for group_alerts in grouped_alerts.values() for alert_data in group_alerts]
+    created_alert_groups = {}
+    processed_count = 0
+    # alerts which join the alert group of the previous alert and don't change its state are inserted in bulk
+    alert_group = None
+    joining_alerts = []
+    try:
+        for alert, channel_filter, group_data in pending_alerts:
+            if (
+                alert_group is not None
+                and (alert_group.channel_filter_id, alert_group.distinction)
+                == (channel_filter.pk if channel_filter else None, group_data.group_distinction)
+                and not alert_group.resolved
+                and (alert_group.acknowledged or not group_data.is_acknowledge_signal)
+            ):
+                joining_alerts.append((alert, group_data))
+                continue
+
+            if joining_alerts:
+                Alert.bulk_create_for_group(alert_group, joining_alerts)
+                processed_count += len(joining_alerts)
+                logger.info(f"Created {len(joining_alerts)} alerts for alert group {alert_group.pk}")
+                joining_alerts = []
+
+            created_alert = Alert.create(
+                title=None,
+                message=None,
+                image_url=None,
+                link_to_upstream_details=None,
+                alert_receive_channel=alert_receive_channel,
+                integration_unique_data=None,
+                raw_request_data=alert,
+                enable_autoresolve=False,
+                is_demo=is_demo,
+                channel_filter=channel_filter,
+                group_data=group_data,
+            )
+            processed_count += 1
+            alert_group = created_alert.group
+            created_alert_groups[alert_group.pk] = alert_group
+            logger.info(f"Created alert {created_alert.pk} for alert group {alert_group.pk}")
+
+        if joining_alerts:
+            Alert.bulk_create_for_group(alert_group, joining_alerts)
+            processed_count += len(joining_alerts)
+            logger.info(f"Created {len(joining_alerts)} alerts for alert group {alert_group.pk}")
+    except Exception as e:
+        if processed_count == 0:
+            # nothing is created yet, it's safe to autoretry the whole batch
+            raise
+        # retry only not yet created alerts to avoid duplicates, with the same backoff and limit as autoretry
+        remaining_alerts = [alert for alert, _, _ in pending_alerts[processed_count:]]
+        max_retries = create_alertmanager_alerts_batch.max_retries
+        if max_retries is None:
+            max_retries = ALERTMANAGER_BATCH_MAX_RETRIES
+        if retry_count >= max_retries:
+            logger.error(
+                f"Dropped {len(remaining_alerts)} alerts of the batch after {retry_count} retries "
+                f"due to {type(e).__name__}"
+            )
+        else:
+            # defaults are the ones of celery autoretry
+            countdown = get_exponential_backoff_interval(
+                factor=1,
+                retries=retry_count,
+                maximum=getattr(create_alertmanager_alerts_batch, "retry_backoff_max", 600),
+                full_jitter=getattr(create_alertmanager_alerts_batch, "retry_jitter", True),
+            )
+            create_alertmanager_alerts_batch.apply_async(
+                (alert_receive_channel_pk, remaining_alerts),
+                {"is_demo": is_demo, "force_route_id": force_route_id, "retry_count": retry_count + 1},
+                countdown=countdown,
+            )
+            logger.warning(
+                f"Retrying {len(remaining_alerts)} alerts of the batch in {countdown} seconds "
+                f"due to {type(e).__name__}"
+            )
+
+    if alert_receive_channel.allow_source_based_resolving:
+        # resolve calculation is based on the last alert of the group, one task per group is enough
+        for alert_group in created_alert_groups.values():
+            task = resolve_alert_group_by_source_if_needed.apply_async((alert_group.pk,), countdown=5)
+            alert_group.active_resolve_calculation_id = task.id
+            alert_group.save(update_fields=["active_resolve_calculation_id"])
+
+
 @shared_task(
     base=CreateAlertBaseTask,
     autoretry_for=(Exception,),
@@ -93,36 +210,18 @@ def create_alert(
     if image_url is not None:
         image_url = str(image_url)[:299]
 
-    try:
-        alert = Alert.create(
-            title=title,
-            message=message,
-            image_url=image_url,
-            link_to_upstream_details=link_to_upstream_details,
-            alert_receive_channel=alert_receive_channel,
-            integration_unique_data=integration_unique_data,
-            raw_request_data=raw_request_data,
-            force_route_id=force_route_id,
-            is_demo=is_demo,
-        )
-        logger.info(f"Created alert {alert.pk} for alert group {alert.group.pk}")
-    except ConcurrentUpdateError:
-        # This error is raised when there are concurrent updates on AlertGroupCounter due to optimistic lock on it.
-        # The idea is to not block the worker with a database lock and retry the task in case of concurrent updates.
-        countdown = random.randint(1, 10)
-        create_alert.apply_async(
-            (
-                title,
-                message,
-                image_url,
-                link_to_upstream_details,
-                alert_receive_channel_pk,
-                integration_unique_data,
-                raw_request_data,
-            ),
-            countdown=countdown,
-        )
-        logger.warning(f"Retrying the task gracefully in {countdown} seconds due to ConcurrentUpdateError")
+    alert = Alert.create(
+        title=title,
+        message=message,
+        image_url=image_url,
+        link_to_upstream_details=link_to_upstream_details,
+        alert_receive_channel=alert_receive_channel,
+        integration_unique_data=integration_unique_data,
+        raw_request_data=raw_request_data,
+        force_route_id=force_route_id,
+        is_demo=is_demo,
+    )
+    logger.info(f"Created alert {alert.pk} for alert group {alert.group.pk}")
 
 
 @shared_dedicated_queue_retry_task()
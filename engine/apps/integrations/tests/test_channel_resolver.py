@@ -0,0 +1,143 @@
+from unittest import mock
+
+import pytest
+from django.core.cache import cache
+
+from apps.alerts.models import AlertReceiveChannel
+from apps.integrations import channel_resolver
+from apps.integrations.channel_resolver import (
+    build_alert_receive_channel,
+    get_channel_record,
+    get_fallback_channel,
+    invalidate_channel_record,
+    warm_up_channel_records,
+)
+from apps.user_management.models import Organization
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    cache.clear()
+    channel_resolver._local_records.clear()
+
+
+@pytest.mark.django_db
+def test_get_channel_record(make_organization, make_alert_receive_channel):
+    organization = make_organization()
+    alert_receive_channel = make_alert_receive_channel(
+        organization, integration=AlertReceiveChannel.INTEGRATION_ALERTMANAGER
+    )
+
+    record = get_channel_record(alert_receive_channel.token)
+
+    assert record.pk == alert_receive_channel.pk
+    assert record.organization_id == organization.pk
+    assert record.integration == AlertReceiveChannel.INTEGRATION_ALERTMANAGER
+    assert record.organization_is_moved is False
+    assert record.organization_is_deleted is False
+    assert get_channel_record("unknown_token") is None
+
+
+@pytest.mark.django_db
+def test_get_channel_record_does_not_query_db_when_cached(
+    django_assert_num_queries, make_organization, make_alert_receive_channel
+):
+    organization = make_organization()
+    alert_receive_channel = make_alert_receive_channel(organization)
+    record = get_channel_record(alert_receive_channel.token)
+
+    # in-process tier
+    with django_assert_num_queries(0):
+        assert get_channel_record(alert_receive_channel.token) == record
+
+    # shared cache tier
+    channel_resolver._local_records.clear()
+    with django_assert_num_queries(0):
+        assert get_channel_record(alert_receive_channel.token) == record
+
+
+@pytest.mark.django_db
+def test_get_channel_record_invalidation(make_organization, make_alert_receive_channel):
+    organization = make_organization()
+    alert_receive_channel = make_alert_receive_channel(organization)
+    get_channel_record(alert_receive_channel.token)
+
+    alert_receive_channel.verbal_name = "new name"
+    alert_receive_channel.save()
+    assert get_channel_record(alert_receive_channel.token).verbal_name == "new name"
+
+    alert_receive_channel.delete()
+    assert get_channel_record(alert_receive_channel.token) is None
+
+
+@pytest.mark.django_db
+def test_get_channel_record_organization_invalidation(make_organization, make_region, make_alert_receive_channel):
+    organization = make_organization()
+    alert_receive_channel = make_alert_receive_channel(organization)
+    get_channel_record(alert_receive_channel.token)
+
+    organization.migration_destination = make_region()
+    organization.save()
+    assert get_channel_record(alert_receive_channel.token).organization_is_moved is True
+
+    organization.delete()
+    assert get_channel_record(alert_receive_channel.token).organization_is_deleted is True
+
+
+@pytest.mark.django_db
+def test_get_channel_record_organization_queryset_delete(make_organization, make_alert_receive_channel):
+    organization = make_organization()
+    alert_receive_channel = make_alert_receive_channel(organization)
+    get_channel_record(alert_receive_channel.token)
+
+    Organization.objects.filter(pk=organization.pk).delete()
+    assert get_channel_record(alert_receive_channel.token).organization_is_deleted is True
+
+
+@pytest.mark.django_db
+def test_get_channel_record_update_without_save(make_organization, make_alert_receive_channel):
+    organization = make_organization()
+    alert_receive_channel = make_alert_receive_channel(organization)
+    get_channel_record(alert_receive_channel.token)
+
+    AlertReceiveChannel.objects.filter(pk=alert_receive_channel.pk).update(verbal_name="new name")
+    # picked up once the short TTL of both tiers is over
+    with mock.patch("apps.integrations.channel_resolver.time.monotonic", return_value=float("inf")):
+        cache.delete(channel_resolver._cache_key(alert_receive_channel.token))
+        assert get_channel_record(alert_receive_channel.token).verbal_name == "new name"
+
+
+@pytest.mark.django_db
+def test_get_fallback_channel(django_assert_num_queries, make_organization, make_alert_receive_channel):
+    organization = make_organization()
+    alert_receive_channel = make_alert_receive_channel(organization, verbal_name="test")
+    warm_up_channel_records()
+
+    with django_assert_num_queries(0):
+        record, fallback_alert_receive_channel = get_fallback_channel(alert_receive_channel.token)
+        assert record.pk == alert_receive_channel.pk
+        assert record.organization_is_moved is False
+        assert record.organization_is_deleted is False
+        # all fields are populated, as they can't be loaded when the DB is not available
+        assert fallback_alert_receive_channel.public_primary_key == alert_receive_channel.public_primary_key
+        assert fallback_alert_receive_channel.organization.pk == organization.pk
+
+    invalidate_channel_record(alert_receive_channel.token)
+    assert get_fallback_channel(alert_receive_channel.token) is None
+
+
+@pytest.mark.django_db
+def test_build_alert_receive_channel(django_assert_num_queries, make_organization, make_alert_receive_channel):
+    organization = make_organization()
+    alert_receive_channel = make_alert_receive_channel(organization, verbal_name="test")
+    record = get_channel_record(alert_receive_channel.token)
+
+    with django_assert_num_queries(0):
+        built_alert_receive_channel = build_alert_receive_channel(record)
+        assert built_alert_receive_channel.pk == alert_receive_channel.pk
+        assert built_alert_receive_channel.organization_id == organization.pk
+        assert built_alert_receive_channel.verbal_name == "test"
+
+    # not cached fields are loaded on access
+    with django_assert_num_queries(1):
+        assert built_alert_receive_channel.public_primary_key == alert_receive_channel.public_primary_key
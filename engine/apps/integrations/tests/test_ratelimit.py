@@ -98,3 +98,33 @@ def test_ratelimit_integration_heartbeats(
     assert response.status_code == 429
 
     assert mocked_task.call_count == 1
+
+
+@mock.patch("ratelimit.utils._split_rate", return_value=(3, 60))
+@mock.patch("apps.integrations.tasks.create_alertmanager_alerts_batch.apply_async", return_value=None)
+@pytest.mark.django_db
+def test_ratelimit_alertmanager_batch_weight(
+    mocked_task,
+    mocked_rate,
+    make_organization,
+    make_alert_receive_channel,
+):
+    organization = make_organization()
+    integration = make_alert_receive_channel(organization, integration=AlertReceiveChannel.INTEGRATION_ALERTMANAGER)
+    url = reverse("integrations:alertmanager", kwargs={"alert_channel_key": integration.token})
+
+    c = Client()
+
+    # request itself + one alert
+    response = c.post(url, data={"alerts": [{"labels": {}}, {"labels": {}}]}, content_type="application/json")
+    assert response.status_code == 200
+
+    # a batch larger than the allowance left is accepted, only the allowance left is counted
+    response = c.post(url, data={"alerts": [{"labels": {}}] * 5}, content_type="application/json")
+    assert response.status_code == 200
+
+    # the limit is reached
+    response = c.post(url, data={"alerts": [{"labels": {}}]}, content_type="application/json")
+    assert response.status_code == 429
+
+    assert mocked_task.call_count == 2
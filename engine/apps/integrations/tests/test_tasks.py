@@ -1,7 +1,13 @@
+from unittest import mock
+
 import pytest
 
-from apps.alerts.models import Alert, AlertReceiveChannel
-from apps.integrations.tasks import create_alertmanager_alerts
+from apps.alerts.models import Alert, AlertGroup, AlertReceiveChannel
+from apps.integrations.tasks import (
+    ALERTMANAGER_BATCH_MAX_RETRIES,
+    create_alertmanager_alerts,
+    create_alertmanager_alerts_batch,
+)
 
 
 @pytest.mark.django_db
@@ -29,3 +35,124 @@ def test_create_alertmanager_alert_maintanance_task_no_alert_no_retry(
     create_alertmanager_alerts(integration.pk, {})
 
     assert Alert.objects.count() == 0
+
+
+@pytest.mark.django_db
+def test_create_alertmanager_alerts_batch_deleted_no_alert(
+    make_organization,
+    make_alert_receive_channel,
+):
+    organization = make_organization()
+    integration = make_alert_receive_channel(organization, integration=AlertReceiveChannel.INTEGRATION_ALERTMANAGER)
+    integration.delete()
+
+    create_alertmanager_alerts_batch(integration.pk, [{}, {}])
+
+    assert Alert.objects.count() == 0
+
+
+@mock.patch("apps.integrations.tasks.resolve_alert_group_by_source_if_needed.apply_async")
+@pytest.mark.django_db
+def test_create_alertmanager_alerts_batch(
+    mocked_resolve_task,
+    make_organization,
+    make_alert_receive_channel,
+    make_channel_filter,
+):
+    organization = make_organization()
+    integration = make_alert_receive_channel(organization, integration=AlertReceiveChannel.INTEGRATION_ALERTMANAGER)
+    make_channel_filter(integration, is_default=True)
+    mocked_resolve_task.return_value.id = "task_id"
+
+    alerts = [
+        {"status": "firing", "labels": {"alertname": "first"}},
+        {"status": "firing", "labels": {"alertname": "second"}},
+        {"status": "firing", "labels": {"alertname": "first"}},
+    ]
+    create_alertmanager_alerts_batch(integration.pk, alerts)
+
+    assert Alert.objects.count() == 3
+    assert AlertGroup.all_objects.count() == 2
+    first_group = Alert.objects.filter(raw_request_data__labels__alertname="first").first().group
+    assert first_group.alerts.count() == 2
+    # one resolve calculation per alert group
+    assert mocked_resolve_task.call_count == 2
+
+
+@mock.patch("apps.alerts.tasks.distribute_alert.distribute_grouped_alerts.apply_async")
+@mock.patch("apps.integrations.tasks.resolve_alert_group_by_source_if_needed.apply_async")
+@pytest.mark.django_db
+def test_create_alertmanager_alerts_batch_bulk_creates_grouped_alerts(
+    mocked_resolve_task,
+    mocked_distribute_grouped_alerts,
+    make_organization,
+    make_alert_receive_channel,
+    make_channel_filter,
+):
+    organization = make_organization()
+    integration = make_alert_receive_channel(organization, integration=AlertReceiveChannel.INTEGRATION_ALERTMANAGER)
+    make_channel_filter(integration, is_default=True)
+    mocked_resolve_task.return_value.id = "task_id"
+
+    alerts = [{"status": "firing", "labels": {"alertname": "first"}}] * 5 + [
+        {"status": "firing", "labels": {"alertname": "second"}}
+    ]
+    with mock.patch.object(Alert, "create", wraps=Alert.create) as mocked_create:
+        create_alertmanager_alerts_batch(integration.pk, alerts)
+
+    # one Alert.create per alert group, the rest of the alerts are inserted in bulk
+    assert mocked_create.call_count == 2
+    assert Alert.objects.count() == 6
+    first_group = Alert.objects.filter(raw_request_data__labels__alertname="first").first().group
+    assert first_group.alerts.count() == 5
+    assert first_group.alerts.filter(is_the_first_alert_in_group=True).count() == 1
+
+
+
+@mock.patch("apps.integrations.tasks.create_alertmanager_alerts_batch.apply_async")
+@mock.patch("apps.integrations.tasks.resolve_alert_group_by_source_if_needed.apply_async")
+@pytest.mark.django_db
+def test_create_alertmanager_alerts_batch_retries_remaining_alerts(
+    mocked_resolve_task,
+    mocked_batch_task,
+    make_organization,
+    make_alert_receive_channel,
+    make_channel_filter,
+):
+    organization = make_organization()
+    integration = make_alert_receive_channel(organization, integration=AlertReceiveChannel.INTEGRATION_ALERTMANAGER)
+    make_channel_filter(integration, is_default=True)
+    mocked_resolve_task.return_value.id = "task_id"
+
+    alerts = [
+        {"status": "firing", "labels": {"alertname": "first"}},
+        {"status": "firing", "labels": {"alertname": "second"}},
+    ]
+    create = Alert.create
+
+    def create_or_fail(**kwargs):
+        if kwargs["raw_request_data"]["labels"]["alertname"] == "second":
+            raise Exception
+        return create(**kwargs)
+
+    with mock.patch.object(Alert, "create", side_effect=create_or_fail):
+        create_alertmanager_alerts_batch(integration.pk, alerts, retry_count=2)
+
+    assert Alert.objects.count() == 1
+    # only not created alerts are retried, with the next retry count
+    args, kwargs = mocked_batch_task.call_args.args
+    assert args == (integration.pk, alerts[1:])
+    assert kwargs["retry_count"] == 3
+
+    # not retried anymore once max retries are reached
+    mocked_batch_task.reset_mock()
+    with mock.patch.object(create_alertmanager_alerts_batch, "max_retries", 3):
+        with mock.patch.object(Alert, "create", side_effect=create_or_fail):
+            create_alertmanager_alerts_batch(integration.pk, alerts, retry_count=3)
+    assert not mocked_batch_task.called
+
+    # retries are limited when the task itself retries forever
+    with mock.patch.object(create_alertmanager_alerts_batch, "max_retries", None):
+        with mock.patch.object(Alert, "create", side_effect=create_or_fail):
+            create_alertmanager_alerts_batch(integration.pk, alerts, retry_count=ALERTMANAGER_BATCH_MAX_RETRIES)
+    assert not mocked_batch_task.called
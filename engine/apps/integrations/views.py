@@ -24,7 +24,7 @@ from apps.integrations.mixins import (
     IntegrationRateLimitMixin,
     is_ratelimit_ignored,
 )
-from apps.integrations.tasks import create_alert, create_alertmanager_alerts
+from apps.integrations.tasks import create_alert, create_alertmanager_alerts_batch
 from common.api_helpers.utils import create_engine_url
 
 logger = logging.getLogger(__name__)
@@ -115,16 +115,22 @@ class AlertManagerAPIView(
                 + str(alert_receive_channel.get_integration_display())
             )
 
-        for alert in request.data.get("alerts", []):
-            if settings.DEBUG:
-                create_alertmanager_alerts(alert_receive_channel.pk, alert)
-            else:
-                self.execute_rate_limit_with_notification_logic()
+        alerts = request.data.get("alerts", [])
+        if not alerts:
+            return Response("Ok.")
+
+        if settings.DEBUG:
+            create_alertmanager_alerts_batch(alert_receive_channel.pk, alerts)
+        else:
+            # count every alert of the batch towards the rate limit, up to the allowance left
+            self.request.ratelimit_weight = len(alerts)
+            self.execute_rate_limit_with_notification_logic()
 
-                if self.request.limited and not is_ratelimit_ignored(alert_receive_channel):
-                    return self.get_ratelimit_http_response()
+            if self.request.limited and not is_ratelimit_ignored(alert_receive_channel):
+                return self.get_ratelimit_http_response()
 
-                create_alertmanager_alerts.apply_async((alert_receive_channel.pk, alert))
+            # one task per request, so the channel, routes and templates are resolved once for the whole batch
+            create_alertmanager_alerts_batch.apply_async((alert_receive_channel.pk, alerts))
 
         return Response("Ok.")
 
@@ -0,0 +1,154 @@
+import array
+import datetime
+import typing
+from collections import defaultdict
+
+import pytz
+
+EPOCH = datetime.datetime(1970, 1, 1, tzinfo=pytz.UTC)
+MICROSECOND = datetime.timedelta(microseconds=1)
+
+
+def to_epoch(value: datetime.datetime) -> int:
+    """Return number of microseconds since epoch, naive datetimes are considered UTC"""
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=pytz.UTC)
+    return (value - EPOCH) // MICROSECOND
+
+
+class Interval(typing.NamedTuple):
+    start: int
+    end: int
+    # e.g. pks of users on-call during the interval
+    keys: typing.Tuple[typing.Hashable, ...] = ()
+
+
+class Coverage:
+    """
+    Coverage of time by intervals with integer bounds, computed by a single sweep over sorted interval bounds:
+    covered duration (overlapping intervals are counted once) and covered duration for each key of intervals
+    (e.g. on-call time of each user).
+    """
+
+    def __init__(self, intervals: typing.Iterable[Interval]):
+        self.intervals = sorted(intervals, key=lambda interval: interval.start)
+
+        self.covered_duration = 0
+        self.durations_by_key: typing.Dict[typing.Hashable, int] = defaultdict(int)
+
+        changes = defaultdict(list)
+        for interval in self.intervals:
+            if interval.end > interval.start:
+                changes[interval.start].append((1, interval.keys))
+                changes[interval.end].append((-1, interval.keys))
+
+        depth = 0
+        active_keys = defaultdict(int)
+        previous_time = None
+        for time in sorted(changes):
+            if previous_time is not None and depth > 0:
+                duration = time - previous_time
+                self.covered_duration += duration
+                for key in active_keys:
+                    self.durations_by_key[key] += duration
+
+            for delta, keys in changes[time]:
+                depth += delta
+                for key in keys:
+                    active_keys[key] += delta
+                    if active_keys[key] == 0:
+                        del active_keys[key]
+            previous_time = time
+
+    def gaps(
+        self, start: int, end: int, min_gap: int = 0
+    ) -> typing.List[typing.Tuple[typing.Optional[int], typing.Optional[int]]]:
+        """
+        Return gaps between start and end, the first and the last gaps are open (None) if they are not covered
+        at the beginning and the end. Gaps between intervals shorter than min_gap are ignored.
+        No gaps are returned if there are no intervals.
+        """
+        if not self.intervals:
+            return []
+
+        gaps = []
+        covered_until = self.intervals[0].end
+        if self.intervals[0].start > start:
+            gaps.append((None, self.intervals[0].start))
+        for interval in self.intervals[1:]:
+            gap = interval.start - covered_until
+            if gap > 0 and gap >= min_gap:
+                gaps.append((covered_until, interval.start))
+            covered_until = max(covered_until, interval.end)
+        if covered_until < end:
+            gaps.append((covered_until, None))
+        return gaps
+
+
+class ScheduleEventColumns:
+    """
+    Schedule events stored column-wise, one row per event user or a single row with user_id -1 for events without
+    users. Rows of an event are contiguous and share event_id, bounds are microseconds since epoch
+    and user_id is an index in `users`.
+    """
+
+    def __init__(self):
+        self.event_ids = array.array("l")
+        self.starts = array.array("q")
+        self.ends = array.array("q")
+        self.user_ids = array.array("l")
+        self.is_gap = array.array("b")
+        self.is_empty = array.array("b")
+        self.is_override = array.array("b")
+        self.users: typing.List[str] = []
+        self._user_ids: typing.Dict[str, int] = {}
+        self.events_count = 0
+
+    def __len__(self):
+        return len(self.event_ids)
+
+    def add_event(
+        self,
+        start: datetime.datetime,
+        end: datetime.datetime,
+        user_pks: typing.Iterable[str],
+        is_gap: bool = False,
+        is_empty: bool = False,
+        is_override: bool = False,
+    ) -> None:
+        event_id = self.events_count
+        self.events_count += 1
+        start, end = to_epoch(start), to_epoch(end)
+        user_ids = []
+        for user_pk in user_pks:
+            if user_pk not in self._user_ids:
+                self._user_ids[user_pk] = len(self.users)
+                self.users.append(user_pk)
+            user_ids.append(self._user_ids[user_pk])
+
+        for user_id in user_ids or [-1]:
+            self.event_ids.append(event_id)
+            self.starts.append(start)
+            self.ends.append(end)
+            self.user_ids.append(user_id)
+            self.is_gap.append(is_gap)
+            self.is_empty.append(is_empty)
+            self.is_override.append(is_override)
+
+    def get_good_events_coverage(self) -> Coverage:
+        """Coverage of time by primary events which are not gaps and not empty, keyed by pks of event users"""
+        intervals = []
+        event_id = start = end = None
+        user_pks = []
+        for row in range(len(self)):
+            if self.is_gap[row] or self.is_empty[row] or self.is_override[row]:
+                continue
+            if self.event_ids[row] != event_id:
+                if event_id is not None:
+                    intervals.append(Interval(start, end, tuple(user_pks)))
+                event_id, start, end, user_pks = self.event_ids[row], self.starts[row], self.ends[row], []
+            if self.user_ids[row] != -1:
+                user_pks.append(self.users[self.user_ids[row]])
+        if event_id is not None:
+            intervals.append(Interval(start, end, tuple(user_pks)))
+        return Coverage(intervals)
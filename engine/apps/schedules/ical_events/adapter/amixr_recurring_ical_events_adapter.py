@@ -17,11 +17,16 @@ from apps.schedules.constants import (
     RE_EVENT_UID_V1,
     RE_EVENT_UID_V2,
 )
+from apps.schedules.ical_events.calendar_cache import get_expanded_events
 from apps.schedules.ical_events.proxy.ical_proxy import IcalService
 
 EXTRA_LOOKUP_DAYS = 16
 
 
+def is_utc(value: datetime) -> bool:
+    return value.tzinfo is not None and value.tzinfo.utcoffset(None) == timezone.timedelta(0)
+
+
 class AmixrUnfoldableCalendar(UnfoldableCalendar):
     """
     This is overridden recurring_ical_events.UnfoldableCalendar.
@@ -100,10 +105,24 @@ class AmixrRecurringIcalEventsAdapter(IcalService):
         make one more pass for events array to filter out events which are between start_date and end_date.
         EXTRA_LOOKUP_DAYS is empirical.
         """
-        events = AmixrUnfoldableCalendar(calendar).between(
-            start_date - timezone.timedelta(days=EXTRA_LOOKUP_DAYS),
-            end_date + timezone.timedelta(days=EXTRA_LOOKUP_DAYS),
-        )
+
+        def expand(span_start, span_end):
+            return lambda: AmixrUnfoldableCalendar(calendar).between(
+                span_start - timezone.timedelta(days=EXTRA_LOOKUP_DAYS),
+                span_end + timezone.timedelta(days=EXTRA_LOOKUP_DAYS),
+            )
+
+        if is_utc(start_date) and is_utc(end_date):
+            # expand periods within a day once for the whole day, so lookups at different times share expanded events
+            day_start = start_date.replace(hour=0, minute=0, second=0, microsecond=0)
+            day_end = day_start + timezone.timedelta(days=1)
+            if end_date < day_end:
+                events = get_expanded_events(calendar, (day_start, day_end), expand(day_start, day_end))
+            else:
+                events = get_expanded_events(calendar, (start_date, end_date), expand(start_date, end_date))
+        else:
+            # dates of all-day events are compared in the timezone of the period, don't share them
+            events = expand(start_date, end_date)()
 
         def filter_extra_days(event):
             event_start, event_end = self.get_start_and_end_with_respect_to_event_type(event)
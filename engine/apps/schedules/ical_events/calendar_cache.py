@@ -0,0 +1,113 @@
+import hashlib
+import threading
+import typing
+from collections import OrderedDict
+
+from django.conf import settings
+from icalendar import Calendar, Event
+
+# number of expanded event lists kept for each calendar
+MAX_EXPANSIONS_PER_CALENDAR = 8
+
+
+class CachedCalendar:
+    """
+    Parsed calendar and its expanded events for recently looked up periods.
+    Size is estimated by iCal file length, each expanded event is counted as an average event of the file.
+    """
+
+    def __init__(self, ical_file: str):
+        self.calendar = Calendar.from_ical(ical_file)
+        self.ical_file_size = len(ical_file)
+        self.event_size = self.ical_file_size // max(len(self.calendar.walk("VEVENT")), 1)
+        self.expansions: OrderedDict[typing.Hashable, typing.List[Event]] = OrderedDict()
+        self.size = self.ical_file_size
+
+    def add_expansion(self, key, events):
+        self.expansions[key] = events
+        self.size += self.event_size * len(events)
+        while len(self.expansions) > MAX_EXPANSIONS_PER_CALENDAR:
+            _, evicted_events = self.expansions.popitem(last=False)
+            self.size -= self.event_size * len(evicted_events)
+
+
+_cached_calendars: OrderedDict[str, CachedCalendar] = OrderedDict()
+# lookup of cached calendars by id of Calendar objects, to find expansions of calendars passed around by callers
+_cached_calendars_by_id: typing.Dict[int, CachedCalendar] = {}
+_cached_calendars_size = 0
+_cached_calendars_lock = threading.Lock()
+
+
+def _evict():
+    global _cached_calendars_size
+
+    # keep the most recent calendar even if it's larger than the limit
+    while _cached_calendars_size > settings.ICAL_CALENDAR_CACHE_MAX_SIZE and len(_cached_calendars) > 1:
+        _, cached_calendar = _cached_calendars.popitem(last=False)
+        del _cached_calendars_by_id[id(cached_calendar.calendar)]
+        _cached_calendars_size -= cached_calendar.size
+
+
+def get_icalendar(ical_file: str) -> Calendar:
+    """
+    Return parsed calendar, shared by all callers within the process until it's evicted. Don't modify it.
+    """
+    global _cached_calendars_size
+
+    key = hashlib.md5(ical_file.encode()).hexdigest()
+    with _cached_calendars_lock:
+        cached_calendar = _cached_calendars.get(key)
+        if cached_calendar is not None:
+            _cached_calendars.move_to_end(key)
+            return cached_calendar.calendar
+
+    cached_calendar = CachedCalendar(ical_file)
+
+    with _cached_calendars_lock:
+        if key in _cached_calendars:
+            # parsed concurrently by another thread
+            return _cached_calendars[key].calendar
+        _cached_calendars[key] = cached_calendar
+        _cached_calendars_by_id[id(cached_calendar.calendar)] = cached_calendar
+        _cached_calendars_size += cached_calendar.size
+        _evict()
+
+    return cached_calendar.calendar
+
+
+def get_expanded_events(
+    calendar: Calendar, key: typing.Hashable, expand: typing.Callable[[], typing.List[Event]]
+) -> typing.List[Event]:
+    """
+    Return events expanded by expand() for the calendar, cached by key if the calendar was returned by get_icalendar.
+    """
+    global _cached_calendars_size
+
+    with _cached_calendars_lock:
+        cached_calendar = _cached_calendars_by_id.get(id(calendar))
+        if cached_calendar is None or cached_calendar.calendar is not calendar:
+            cached_calendar = None
+        elif key in cached_calendar.expansions:
+            cached_calendar.expansions.move_to_end(key)
+            return cached_calendar.expansions[key]
+
+    events = expand()
+
+    if cached_calendar is not None:
+        with _cached_calendars_lock:
+            if _cached_calendars_by_id.get(id(calendar)) is cached_calendar and key not in cached_calendar.expansions:
+                _cached_calendars_size -= cached_calendar.size
+                cached_calendar.add_expansion(key, events)
+                _cached_calendars_size += cached_calendar.size
+                _evict()
+
+    return events
+
+
+def clear_calendar_cache():
+    global _cached_calendars_size
+
+    with _cached_calendars_lock:
+        _cached_calendars.clear()
+        _cached_calendars_by_id.clear()
+        _cached_calendars_size = 0
@@ -1,8 +1,11 @@
 from __future__ import annotations
 
 import datetime
+import hashlib
+import http.cookiejar
 import logging
 import re
+import threading
 import typing
 from collections import namedtuple
 from typing import TYPE_CHECKING
@@ -10,9 +13,11 @@ from typing import TYPE_CHECKING
 import pytz
 import requests
 from django.apps import apps
+from django.core.cache import cache
 from django.db.models import Q
 from django.utils import timezone
 from icalendar import Calendar
+from requests.adapters import HTTPAdapter
 
 from apps.api.permissions import RBACPermission
 from apps.schedules.constants import (
@@ -26,6 +31,7 @@ from apps.schedules.constants import (
     RE_EVENT_UID_V2,
     RE_PRIORITY,
 )
+from apps.schedules.coverage import MICROSECOND, Coverage, Interval, ScheduleEventColumns, to_epoch
 from apps.schedules.ical_events import ical_events
 from common.timezones import is_valid_timezone
 from common.utils import timed_lru_cache
@@ -64,7 +70,6 @@ def users_in_ical(
         Whether or not the list should be further filtered to exclude users based on granted permissions
     users_to_filter : typing.Optional[UserQuerySet]
         Filter users without making SQL queries if users_to_filter arg is provided
-        users_to_filter is passed in `apps.schedules.ical_utils.get_oncall_users_for_multiple_schedules`
     """
     from apps.user_management.models import User
 
@@ -176,15 +181,37 @@ def list_of_oncall_shifts_from_ical(
     return result or None
 
 
+def get_schedule_event_columns(schedule, date, user_timezone="UTC", days=1) -> ScheduleEventColumns:
+    """
+    Return events of schedule.filter_events(user_timezone, date, days, with_empty=True, with_gap=True) as columns,
+    so they can be kept for long periods, e.g. for schedule quality score over a year.
+    """
+    columns = ScheduleEventColumns()
+    events = schedule.filter_events(user_timezone, date, days, with_empty=True, with_gap=True, all_day_datetime=True)
+    for event in events:
+        # adding one microsecond to the end datetime to make sure 1 day-long events are really 1 day long
+        end = event["end"] + MICROSECOND if event["all_day"] else event["end"]
+        columns.add_event(
+            event["start"],
+            end,
+            [user["pk"] for user in event["users"]],
+            is_gap=event["is_gap"],
+            is_empty=event["is_empty"],
+            is_override=event["is_override"],
+        )
+    return columns
+
+
 def get_shifts_dict(calendar, calendar_type, schedule, datetime_start, datetime_end, with_empty_shifts=False):
     events = ical_events.get_events_from_ical_between(calendar, datetime_start, datetime_end)
+    users_resolver = IcalUsersResolver(events, schedule.organization)
     result_datetime = []
     result_date = []
     for event in events:
         priority = parse_priority_from_string(event.get(ICAL_SUMMARY, "[L0]"))
         pk, source = parse_event_uid(event.get(ICAL_UID))
-        users = get_users_from_ical_event(event, schedule.organization)
-        missing_users = get_missing_users_from_ical_event(event, schedule.organization)
+        users = users_resolver.get_users_from_ical_event(event)
+        missing_users = users_resolver.get_missing_users_from_ical_event(event)
         # Define on-call shift out of ical event that has the actual user
         if len(users) > 0 or with_empty_shifts:
             if type(event[ICAL_DATETIME_START].dt) == datetime.date:
@@ -257,11 +284,13 @@ def list_of_empty_shifts_in_schedule(schedule, start_date, end_date):
                 calendar, start_datetime_with_offset, end_datetime_with_offset
             )
 
+            users_resolver = IcalUsersResolver(events, schedule.organization)
+
             # Keep hashes of checked events to include only first recurrent event into result
             checked_events = set()
             empty_shifts_per_calendar = []
             for event in events:
-                users = get_users_from_ical_event(event, schedule.organization)
+                users = users_resolver.get_users_from_ical_event(event)
                 if len(users) == 0:
                     summary = event.get(ICAL_SUMMARY, "")
                     description = event.get(ICAL_DESCRIPTION, "")
@@ -320,20 +349,11 @@ def list_users_to_notify_from_ical_for_period(
     include_viewers=False,
     users_to_filter=None,
 ) -> UserQuerySet:
-    # get list of iCalendars from current iCal files. If there is more than one calendar, primary calendar will always
-    # be the first
-    calendars = schedule.get_icalendars()
-    # reverse calendars to make overrides calendar the first, if schedule is iCal
-    calendars = calendars[::-1]
     users_found_in_ical = []
     # at first check overrides calendar and return users from it if it exists and on-call users are found
-    for calendar in calendars:
-        if calendar is None:
-            continue
-        events = ical_events.get_events_from_ical_between(calendar, start_datetime, end_datetime)
+    for events_usernames in _usernames_from_calendars_between(schedule, start_datetime, end_datetime):
         parsed_ical_events = {}  # event info where key is event priority and value list of found usernames {0:["alex"]}
-        for event in events:
-            current_usernames, current_priority = get_usernames_from_ical_event(event)
+        for current_usernames, current_priority in events_usernames:
             parsed_ical_events.setdefault(current_priority, []).extend(current_usernames)
         # find users by usernames. if users are not found for shift, get users from lower priority
         for _, usernames in sorted(parsed_ical_events.items(), reverse=True):
@@ -348,50 +368,110 @@ def list_users_to_notify_from_ical_for_period(
     return users_found_in_ical
 
 
-def get_oncall_users_for_multiple_schedules(
-    schedules, events_datetime=None
-) -> typing.Dict[OnCallSchedule, typing.List[User]]:
-    from apps.user_management.models import User
+def _usernames_from_timeline_between(timeline, start_datetime, end_datetime):
+    for calendar_timeline in timeline.calendars[::-1]:
+        if calendar_timeline is not None:
+            entries = calendar_timeline.between(start_datetime, end_datetime)
+            yield [(entry.usernames, entry.priority) for entry in entries]
 
-    if events_datetime is None:
-        events_datetime = timezone.datetime.now(timezone.utc)
 
-    # Exit early if there are no schedules
-    if not schedules.exists():
+def _usernames_from_calendars_between(schedule, start_datetime, end_datetime):
+    """
+    Yield list of (usernames, priority) for events of each calendar of the schedule, overrides calendar first.
+    Events are looked up in the materialized timeline of the schedule if it covers the period, iCal files are parsed
+    otherwise.
+    """
+    from apps.schedules.oncall_timeline import get_schedule_timeline
+
+    timeline = get_schedule_timeline(schedule, start_datetime, end_datetime)
+    if timeline is not None:
+        yield from _usernames_from_timeline_between(timeline, start_datetime, end_datetime)
+        return
+
+    # get list of iCalendars from current iCal files. If there is more than one calendar, primary calendar will always
+    # be the first
+    calendars = schedule.get_icalendars()
+    # reverse calendars to make overrides calendar the first, if schedule is iCal
+    for calendar in calendars[::-1]:
+        if calendar is not None:
+            events = ical_events.get_events_from_ical_between(calendar, start_datetime, end_datetime)
+            yield [get_usernames_from_ical_event(event) for event in events]
+
+
+def _oncall_usernames_for_multiple_datetimes(schedule, events_datetimes):
+    """
+    Return list of calendars usernames (same as _usernames_from_calendars_between yields) for each datetime.
+    The timeline is looked up once for all datetimes, parsed calendars and their expanded events are shared otherwise.
+    """
+    from apps.schedules.oncall_timeline import get_schedule_timeline
+
+    timeline = get_schedule_timeline(schedule, min(events_datetimes), max(events_datetimes))
+    if timeline is not None:
+        return [list(_usernames_from_timeline_between(timeline, dt, dt)) for dt in events_datetimes]
+    return [list(_usernames_from_calendars_between(schedule, dt, dt)) for dt in events_datetimes]
+
+
+def _oncall_users_from_usernames(calendars_usernames, users_resolver) -> typing.List[User]:
+    """Pick on-call users the same way as list_users_to_notify_from_ical_for_period"""
+    for events_usernames in calendars_usernames:
+        usernames_by_priority = {}
+        for usernames, priority in events_usernames:
+            usernames_by_priority.setdefault(priority, []).extend(usernames)
+        # if users are not found for shift, get users from lower priority
+        for _, usernames in sorted(usernames_by_priority.items(), reverse=True):
+            users = users_resolver.get_users(usernames)
+            if users:
+                # if users are found in the overrides calendar, there is no need to check primary calendar
+                return users
+    return []
+
+
+def get_oncall_users_for_multiple_schedules_at(
+    schedules, events_datetimes: typing.List[datetime.datetime]
+) -> typing.Dict[int, typing.List[typing.List[User]]]:
+    """
+    Return on-call users of each schedule at each of events_datetimes, keyed by schedule pk.
+    Calendars of all schedules are looked up in a single pass, users are fetched with a single query per organization.
+    """
+    if not events_datetimes:
         return {}
 
-    # Assume all schedules from the queryset belong to the same organization
-    organization = schedules[0].organization
+    schedules = list(schedules)
+    usernames_by_schedule = {}
+    usernames_by_organization = {}
+    for schedule in schedules:
+        schedule_usernames = _oncall_usernames_for_multiple_datetimes(schedule, events_datetimes)
+        usernames_by_schedule[schedule.pk] = schedule_usernames
+        organization_usernames = usernames_by_organization.setdefault(schedule.organization_id, set())
+        for calendars_usernames in schedule_usernames:
+            for events_usernames in calendars_usernames:
+                for usernames, _ in events_usernames:
+                    organization_usernames.update(usernames)
+
+    users_resolvers = {}
+    for schedule in schedules:
+        if schedule.organization_id not in users_resolvers:
+            users_resolvers[schedule.organization_id] = IcalUsersResolver.from_usernames(
+                usernames_by_organization[schedule.organization_id], schedule.organization
+            )
 
-    # Gather usernames from all events from all schedules
-    usernames = set()
-    for schedule in schedules.all():
-        calendars = schedule.get_icalendars()
-        for calendar in calendars:
-            if calendar is None:
-                continue
-            events = ical_events.get_events_from_ical_between(calendar, events_datetime, events_datetime)
-            for event in events:
-                current_usernames, _ = get_usernames_from_ical_event(event)
-                usernames.update(current_usernames)
-
-    # Fetch relevant users from the db
-    emails = [username.lower() for username in usernames]
-    users = organization.users.filter(
-        Q(**User.build_permissions_query(RBACPermission.Permissions.SCHEDULES_WRITE, organization))
-        & (Q(username__in=usernames) | Q(email__lower__in=emails))
-    )
+    return {
+        schedule.pk: [
+            _oncall_users_from_usernames(calendars_usernames, users_resolvers[schedule.organization_id])
+            for calendars_usernames in usernames_by_schedule[schedule.pk]
+        ]
+        for schedule in schedules
+    }
 
-    # Get on-call users
-    oncall_users = {}
-    for schedule in schedules.all():
-        # pass user list to list_users_to_notify_from_ical
-        schedule_oncall_users = list_users_to_notify_from_ical(
-            schedule, events_datetime=events_datetime, users_to_filter=users
-        )
-        oncall_users.update({schedule.pk: schedule_oncall_users})
 
-    return oncall_users
+def get_oncall_users_for_multiple_schedules(
+    schedules, events_datetime=None
+) -> typing.Dict[OnCallSchedule, typing.List[User]]:
+    if events_datetime is None:
+        events_datetime = timezone.datetime.now(timezone.utc)
+
+    oncall_users = get_oncall_users_for_multiple_schedules_at(schedules, [events_datetime])
+    return {schedule_pk: users[0] for schedule_pk, users in oncall_users.items()}
 
 
 def parse_username_from_string(string):
@@ -481,6 +561,52 @@ def get_users_from_ical_event(event, organization):
     return users
 
 
+class IcalUsersResolver:
+    """
+    Resolve users of many iCal events with a single query and match them to each event in memory.
+    Events are matched to users the same way as by `users_in_ical`, so it can be used instead of
+    `get_users_from_ical_event` and `get_missing_users_from_ical_event` for all events of a calendar.
+    """
+
+    def __init__(self, events, organization: Organization, include_viewers=False):
+        usernames = {username for event in events for username in get_usernames_from_ical_event(event)[0]}
+        self._resolve(usernames, organization, include_viewers)
+
+    @classmethod
+    def from_usernames(
+        cls, usernames: typing.Iterable[str], organization: Organization, include_viewers=False
+    ) -> IcalUsersResolver:
+        users_resolver = cls.__new__(cls)
+        users_resolver._resolve(set(usernames), organization, include_viewers)
+        return users_resolver
+
+    def _resolve(self, usernames, organization, include_viewers):
+        users = []
+        if usernames:
+            users = users_in_ical(list(usernames), organization, include_viewers=include_viewers)
+
+        self._users_by_username = {}
+        self._users_by_email = {}
+        for user in sorted(users, key=lambda u: u.pk):
+            self._users_by_username.setdefault(user.username, []).append(user)
+            self._users_by_email.setdefault(user.email.lower(), []).append(user)
+
+    def get_users(self, usernames: typing.Iterable[str]) -> typing.List[User]:
+        users = {}
+        for username in usernames:
+            for user in self._users_by_username.get(username, []) + self._users_by_email.get(username.lower(), []):
+                users[user.pk] = user
+        return [users[pk] for pk in sorted(users)]
+
+    def get_users_from_ical_event(self, event) -> typing.List[User]:
+        usernames_from_ical, _ = get_usernames_from_ical_event(event)
+        return self.get_users(usernames_from_ical)
+
+    def get_missing_users_from_ical_event(self, event) -> typing.List[str]:
+        usernames_from_ical, _ = get_usernames_from_ical_event(event)
+        return [u for u in usernames_from_ical if u != "" and not self.get_users([u])]
+
+
 def is_icals_equal_line_by_line(first, second):
     first = first.split("\n")
     second = second.split("\n")
@@ -499,6 +625,8 @@ def is_icals_equal_line_by_line(first, second):
 
 
 def is_icals_equal(first, second):
+    if first == second:
+        return True
     first_cal = Calendar.from_ical(first)
     if first_cal.get("PRODID", None) in ("-//My calendar product//amixr//", "-//web schedule//oncall//"):
         # Compare schedules generated by oncall line by line, since they not support SEQUENCE field yet.
@@ -572,27 +700,86 @@ def get_icalendar_tz_or_utc(icalendar):
     return pytz.timezone(converted_timezone)
 
 
-def fetch_ical_file_or_get_error(ical_url):
-    cached_ical_file = None
+def fetch_ical_file_or_get_error(ical_url, cached_ical_file=None):
+    """
+    Download iCal file and check it's a valid calendar. If cached_ical_file is the file downloaded from the URL
+    last time and the server responds it's not modified, cached_ical_file is returned without parsing it again.
+    """
     ical_file_error = None
     try:
-        new_ical_file = fetch_ical_file(ical_url)
-        Calendar.from_ical(new_ical_file)
-        cached_ical_file = new_ical_file
+        new_ical_file = fetch_ical_file(ical_url, cached_ical_file)
+        if new_ical_file is not cached_ical_file:
+            Calendar.from_ical(new_ical_file)
     except requests.exceptions.RequestException:
-        ical_file_error = "iCal download failed"
+        new_ical_file, ical_file_error = None, "iCal download failed"
     except ValueError:
-        ical_file_error = "wrong iCal"
+        new_ical_file, ical_file_error = None, "wrong iCal"
     # TODO: catch icalendar exceptions
-    return cached_ical_file, ical_file_error
+    return new_ical_file, ical_file_error
+
+
+ICAL_URL_VALIDATORS_CACHE_KEY = "ical_url_validators_{}"
+ICAL_URL_VALIDATORS_CACHE_TIMEOUT = 60 * 60 * 24 * 7
+# max number of kept connections to each host, calendars are mostly imported from a few hosts (Google, Outlook)
+ICAL_FETCH_POOL_MAXSIZE = 10
+
+_ical_fetch_session = None
+_ical_fetch_session_lock = threading.Lock()
+
 
+def _get_ical_fetch_session() -> requests.Session:
+    """Session shared by the process, so connections to calendar hosts are reused between downloads"""
+    global _ical_fetch_session
 
-def fetch_ical_file(ical_url):
-    # without user-agent header google calendar sometimes returns text/html instead of text/calendar
-    headers = {"User-Agent": "Grafana OnCall"}
-    r = requests.get(ical_url, headers=headers, timeout=10)
+    with _ical_fetch_session_lock:
+        if _ical_fetch_session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_maxsize=ICAL_FETCH_POOL_MAXSIZE)
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            # without user-agent header google calendar sometimes returns text/html instead of text/calendar
+            session.headers["User-Agent"] = "Grafana OnCall"
+            # the session is shared by all organizations, cookies set by one calendar host must not be sent later
+            session.cookies.set_policy(http.cookiejar.DefaultCookiePolicy(allowed_domains=[]))
+            _ical_fetch_session = session
+    return _ical_fetch_session
+
+
+def _ical_url_validators_cache_key(ical_url):
+    return ICAL_URL_VALIDATORS_CACHE_KEY.format(hashlib.md5(ical_url.encode()).hexdigest())
+
+
+def _ical_file_hash(ical_file):
+    return hashlib.md5(ical_file.encode()).hexdigest()
+
+
+def fetch_ical_file(ical_url, cached_ical_file=None):
+    """
+    Download iCal file. ETag and Last-Modified of the last download from the URL are sent as conditional headers
+    if cached_ical_file is the file downloaded that time, cached_ical_file itself is returned if it's not modified.
+    """
+    headers = {}
+    validators_cache_key = _ical_url_validators_cache_key(ical_url)
+    validators = cache.get(validators_cache_key) if cached_ical_file else None
+    if validators is not None and validators["ical_file_hash"] == _ical_file_hash(cached_ical_file):
+        if validators["etag"]:
+            headers["If-None-Match"] = validators["etag"]
+        if validators["last_modified"]:
+            headers["If-Modified-Since"] = validators["last_modified"]
+
+    r = _get_ical_fetch_session().get(ical_url, headers=headers, timeout=10)
+    if r.status_code == 304 and headers:
+        logger.info("fetch_ical_file: not modified")
+        return cached_ical_file
     logger.info(f"fetch_ical_file: content-type={r.headers.get('Content-Type')}")
     ical_file = r.text
+
+    etag, last_modified = r.headers.get("ETag"), r.headers.get("Last-Modified")
+    if r.ok and (etag or last_modified):
+        validators = {"etag": etag, "last_modified": last_modified, "ical_file_hash": _ical_file_hash(ical_file)}
+        cache.set(validators_cache_key, validators, timeout=ICAL_URL_VALIDATORS_CACHE_TIMEOUT)
+    else:
+        cache.delete(validators_cache_key)
     return ical_file
 
 
@@ -644,15 +831,28 @@ def user_ical_export(user: User, schedules: list[OnCallSchedule]) -> bytes:
 
 
 DatetimeInterval = namedtuple("DatetimeInterval", ["start", "end"])
+# gaps between shifts shorter than that are not reported
+GAP_MIN_DURATION = datetime.timedelta(minutes=1)
 
 
 def list_of_gaps_in_schedule(schedule, start_date, end_date):
-    calendars = schedule.get_icalendars()
+    from apps.schedules.oncall_timeline import get_schedule_timeline
+
     intervals = []
     start_datetime = timezone.datetime.combine(start_date, datetime.time.min) + timezone.timedelta(milliseconds=1)
     start_datetime = start_datetime.astimezone(pytz.UTC)
     end_datetime = timezone.datetime.combine(end_date, datetime.time.max).astimezone(pytz.UTC)
 
+    timeline = get_schedule_timeline(schedule, start_datetime, end_datetime)
+    if timeline is not None:
+        for calendar_timeline in timeline.calendars:
+            if calendar_timeline is not None:
+                for entry in calendar_timeline.between(start_datetime, end_datetime):
+                    start, end = entry.start_end_with_respect_to_all_day(calendar_timeline.calendar_tz)
+                    intervals.append(DatetimeInterval(start, end))
+        return detect_gaps(intervals, start_datetime, end_datetime)
+
+    calendars = schedule.get_icalendars()
     for idx, calendar in enumerate(calendars):
         if calendar is not None:
             calendar_tz = get_icalendar_tz_or_utc(calendar)
@@ -668,29 +868,26 @@ def list_of_gaps_in_schedule(schedule, start_date, end_date):
 
 
 def detect_gaps(intervals, start, end):
-    gaps = []
-    intervals = sorted(intervals, key=lambda dt: dt.start)
-    if len(intervals) > 0:
-        base_interval = intervals[0]
-        if base_interval.start > start:
-            gaps.append(DatetimeInterval(None, base_interval.start))
-        for interval in intervals[1:]:
-            overlaps, new_base_interval = merge_if_overlaps(base_interval, interval)
-            if not overlaps:
-                gaps.append(DatetimeInterval(base_interval.end, interval.start))
-            base_interval = new_base_interval
-        if base_interval.end < end:
-            gaps.append(DatetimeInterval(base_interval.end, None))
-    return gaps
-
-
-def merge_if_overlaps(a: DatetimeInterval, b: DatetimeInterval):
-    if a.end >= b.end:
-        return True, DatetimeInterval(a.start, a.end)
-    if b.start - a.end < datetime.timedelta(minutes=1):
-        return True, DatetimeInterval(a.start, b.end)
-    else:
-        return False, DatetimeInterval(b.start, b.end)
+    """
+    Return gaps between start and end not covered by any of the intervals, gaps shorter than a minute between
+    intervals are ignored. Gap bounds are datetimes of the intervals, None for uncovered start and end of the period.
+    """
+    datetimes = {}
+    coverage_intervals = []
+    for interval in intervals:
+        interval_start, interval_end = to_epoch(interval.start), to_epoch(interval.end)
+        datetimes.setdefault(interval_start, interval.start)
+        datetimes.setdefault(interval_end, interval.end)
+        coverage_intervals.append(Interval(interval_start, interval_end))
+
+    gaps = Coverage(coverage_intervals).gaps(to_epoch(start), to_epoch(end), min_gap=GAP_MIN_DURATION // MICROSECOND)
+    return [
+        DatetimeInterval(
+            datetimes[gap_start] if gap_start is not None else None,
+            datetimes[gap_end] if gap_end is not None else None,
+        )
+        for gap_start, gap_end in gaps
+    ]
 
 
 def start_end_with_respect_to_all_day(event, calendar_tz):
@@ -0,0 +1,18 @@
+# Generated by Django 3.2.18 on 2023-03-14 10:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('schedules', '0008_auto_20221201_0809'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='oncallschedule',
+            name='ical_files_version',
+            field=models.CharField(default=None, max_length=32, null=True),
+        ),
+    ]
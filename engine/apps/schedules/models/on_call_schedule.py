@@ -1,8 +1,6 @@
 import datetime
 import functools
-import itertools
 
-import icalendar
 import pytz
 from django.apps import apps
 from django.conf import settings
@@ -16,6 +14,7 @@ from polymorphic.managers import PolymorphicManager
 from polymorphic.models import PolymorphicModel
 from polymorphic.query import PolymorphicQuerySet
 
+from apps.schedules.ical_events.calendar_cache import get_icalendar
 from apps.schedules.ical_utils import (
     fetch_ical_file_or_get_error,
     get_oncall_users_for_multiple_schedules,
@@ -24,6 +23,9 @@ from apps.schedules.ical_utils import (
     list_of_oncall_shifts_from_ical,
 )
 from apps.schedules.models import CustomOnCallShift
+from apps.schedules.oncall_timeline import compute_ical_files_version
+from apps.schedules.refresh_scheduler import mark_schedule_dirty
+from apps.schedules.shift_ical_cache import convert_shifts_to_ical
 from common.public_primary_keys import generate_public_primary_key, increase_public_primary_key_length
 
 
@@ -69,6 +71,9 @@ class OnCallSchedule(PolymorphicModel):
     cached_ical_file_overrides = models.TextField(null=True, default=None)
     prev_ical_file_overrides = models.TextField(null=True, default=None)
 
+    # hash of cached iCal files, updated every time they are saved, see oncall_timeline.compute_ical_files_version
+    ical_files_version = models.CharField(max_length=32, null=True, default=None)
+
     organization = models.ForeignKey(
         "user_management.Organization", on_delete=models.CASCADE, related_name="oncall_schedules"
     )
@@ -124,16 +129,33 @@ class OnCallSchedule(PolymorphicModel):
     class Meta:
         unique_together = ("name", "organization")
 
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get("update_fields")
+        if update_fields is None or {"cached_ical_file_primary", "cached_ical_file_overrides"} & set(update_fields):
+            self.ical_files_version = compute_ical_files_version(
+                self.cached_ical_file_primary, self.cached_ical_file_overrides
+            )
+            if update_fields is not None:
+                kwargs["update_fields"] = [*update_fields, "ical_files_version"]
+        super().save(*args, **kwargs)
+
+    def update_ical_files_version(self):
+        self.ical_files_version = compute_ical_files_version(
+            self.cached_ical_file_primary, self.cached_ical_file_overrides
+        )
+        self.save(update_fields=["ical_files_version"])
+
     def get_icalendars(self):
         """Returns list of calendars. Primary calendar should always be the first"""
         calendar_primary = None
         calendar_overrides = None
         # if self._ical_file_(primary|overrides) is None -> no cache, will trigger a refresh
         # if self._ical_file_(primary|overrides) == "" -> cached value for an empty schedule
+        # calendars are parsed once per process for the same iCal file, they must not be modified
         if self._ical_file_primary:
-            calendar_primary = icalendar.Calendar.from_ical(self._ical_file_primary)
+            calendar_primary = get_icalendar(self._ical_file_primary)
         if self._ical_file_overrides:
-            calendar_overrides = icalendar.Calendar.from_ical(self._ical_file_overrides)
+            calendar_overrides = get_icalendar(self._ical_file_overrides)
         return calendar_primary, calendar_overrides
 
     def get_prev_and_current_ical_files(self):
@@ -162,6 +184,7 @@ class OnCallSchedule(PolymorphicModel):
     def drop_cached_ical(self):
         self._drop_primary_ical_file()
         self._drop_overrides_ical_file()
+        mark_schedule_dirty(self.pk)
 
     def refresh_ical_file(self):
         self._refresh_primary_ical_file()
@@ -485,7 +508,7 @@ class OnCallScheduleICal(OnCallSchedule):
         self.prev_ical_file_primary = self.cached_ical_file_primary
         if self.ical_url_primary is not None:
             self.cached_ical_file_primary, self.ical_file_error_primary = fetch_ical_file_or_get_error(
-                self.ical_url_primary,
+                self.ical_url_primary, self.cached_ical_file_primary
             )
         self.save(update_fields=["cached_ical_file_primary", "prev_ical_file_primary", "ical_file_error_primary"])
 
@@ -493,7 +516,7 @@ class OnCallScheduleICal(OnCallSchedule):
         self.prev_ical_file_overrides = self.cached_ical_file_overrides
         if self.ical_url_overrides is not None:
             self.cached_ical_file_overrides, self.ical_file_error_overrides = fetch_ical_file_or_get_error(
-                self.ical_url_overrides,
+                self.ical_url_overrides, self.cached_ical_file_overrides
             )
         self.save(update_fields=["cached_ical_file_overrides", "prev_ical_file_overrides", "ical_file_error_overrides"])
 
@@ -557,7 +580,7 @@ class OnCallScheduleCalendar(OnCallSchedule):
         self.prev_ical_file_overrides = self.cached_ical_file_overrides
         if self.ical_url_overrides is not None:
             self.cached_ical_file_overrides, self.ical_file_error_overrides = fetch_ical_file_or_get_error(
-                self.ical_url_overrides,
+                self.ical_url_overrides, self.cached_ical_file_overrides
             )
         self.save(update_fields=["cached_ical_file_overrides", "prev_ical_file_overrides", "ical_file_error_overrides"])
 
@@ -599,7 +622,8 @@ class OnCallScheduleWeb(OnCallSchedule):
         """Generate iCal events file from custom on-call shifts."""
         # default to empty string since it is not possible to have a no-events ical file
         ical = ""
-        if qs.exists() or extra_shifts is not None:
+        shifts = list(qs.prefetch_related("users"))
+        if shifts or extra_shifts is not None:
             if extra_shifts is None:
                 extra_shifts = []
             end_line = "END:VCALENDAR"
@@ -610,8 +634,10 @@ class OnCallScheduleWeb(OnCallSchedule):
             ical_file = calendar.to_ical().decode()
             ical = ical_file.replace(end_line, "").strip()
             ical = f"{ical}\r\n"
-            for event in itertools.chain(qs.all(), extra_shifts):
-                ical += event.convert_to_ical(self.time_zone, allow_empty_users=allow_empty_users)
+            # events of unchanged shifts are taken from cache
+            ical += "".join(
+                convert_shifts_to_ical(shifts + extra_shifts, self.time_zone, allow_empty_users=allow_empty_users)
+            )
             ical += f"{end_line}\r\n"
         return ical
 
@@ -715,8 +741,11 @@ class OnCallScheduleWeb(OnCallSchedule):
         ical_file = self._generate_ical_file_from_shifts(qs, extra_shifts=extra_shifts, allow_empty_users=True)
 
         original_value = getattr(self, ical_attr)
+        original_version = self.ical_files_version
         _invalidate_cache(self, ical_property)
         setattr(self, ical_attr, ical_file)
+        # the stored version doesn't match the preview calendar, so the timeline is not used
+        self.ical_files_version = None
 
         # filter events using a temporal overriden calendar including the not-yet-saved shift
         events = self.filter_events(user_tz, starting_date, days=days, with_empty=True, with_gap=True)
@@ -727,6 +756,7 @@ class OnCallScheduleWeb(OnCallSchedule):
 
         _invalidate_cache(self, ical_property)
         setattr(self, ical_attr, original_value)
+        self.ical_files_version = original_version
 
         return shift_events, final_events
 
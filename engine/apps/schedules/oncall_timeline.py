@@ -0,0 +1,272 @@
+import bisect
+import collections
+import datetime
+import hashlib
+import json
+import threading
+import typing
+
+import pytz
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+
+from apps.schedules.constants import ICAL_DATETIME_END, ICAL_DATETIME_START
+from apps.schedules.ical_events import ical_events
+from apps.schedules.ical_events.adapter.amixr_recurring_ical_events_adapter import is_utc
+from apps.schedules.ical_utils import get_icalendar_tz_or_utc, get_usernames_from_ical_event, ical_date_to_datetime
+
+# bump the version when ScheduleTimeline structure is changed, so timelines pickled by the previous release are ignored
+SCHEDULE_TIMELINE_CACHE_KEY = "schedule_timeline_v2_{}"
+SCHEDULE_TIMELINE_CACHE_TIMEOUT = 60 * 60 * 24 * 2
+
+# timeline starts a bit in the past, so lookups for the current day (e.g. gaps checks) are covered as well
+TIMELINE_LOOKBACK = datetime.timedelta(days=1)
+# timeline is rebuilt at least this often to keep rolling the horizon forward
+TIMELINE_REBUILD_INTERVAL = datetime.timedelta(days=1)
+# number of timelines kept in process, so repeated lookups don't unpickle them from cache
+LOCAL_TIMELINES_MAX_SIZE = 100
+
+_local_timelines = collections.OrderedDict()
+_local_timelines_lock = threading.Lock()
+
+
+def _to_timestamp(value: typing.Union[datetime.date, datetime.datetime]) -> float:
+    """
+    Convert event datetime to POSIX timestamp the same way recurring_ical_events compares them with UTC datetimes:
+    dates and naive datetimes are considered UTC.
+    """
+    if not isinstance(value, datetime.datetime):
+        value = datetime.datetime(value.year, value.month, value.day)
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=pytz.UTC)
+    return value.timestamp()
+
+
+def compute_ical_files_version(ical_file_primary, ical_file_overrides) -> str:
+    """
+    Hash of iCal files the timeline is built from. Timelines of other versions are never used.
+    It's stored in OnCallSchedule.ical_files_version every time the files are saved, see OnCallSchedule.save.
+    """
+    # files which are not cached yet (None) differ from empty ones
+    ical_files = json.dumps([ical_file_primary, ical_file_overrides])
+    return hashlib.md5(ical_files.encode()).hexdigest()
+
+
+class TimelineEntry(typing.NamedTuple):
+    # event bounds used for lookups, see ical_events.get_events_from_ical_between
+    match_start: float
+    match_end: float
+    # event bounds as they are returned by event_start_end_all_day_with_respect_to_type, dates for all-day events
+    start: typing.Union[datetime.date, datetime.datetime]
+    end: typing.Union[datetime.date, datetime.datetime]
+    all_day: bool
+    priority: int
+    usernames: typing.Tuple[str, ...]
+
+    def start_end_with_respect_to_all_day(self, calendar_tz):
+        if not self.all_day:
+            return self.start, self.end
+        start, _ = ical_date_to_datetime(self.start, calendar_tz, start=True)
+        end, _ = ical_date_to_datetime(self.end, calendar_tz, start=False)
+        return start, end
+
+
+class CalendarTimeline:
+    """
+    Expanded events of a single calendar indexed by time.
+    The timeline is split into segments by event bounds, each segment keeps indexes of events lasting during it,
+    so point lookups take a single bisect and range lookups only check events overlapping the range.
+    """
+
+    def __init__(self, entries: typing.List[TimelineEntry], calendar_tz):
+        self.calendar_tz = calendar_tz
+        self.entries = sorted(entries, key=lambda e: (e.match_start, e.match_end))
+        # zero-length events don't last during any segment, there are very few of them
+        self.instant_entries = [idx for idx, e in enumerate(self.entries) if e.match_start == e.match_end]
+
+        self.boundaries = sorted({t for e in self.entries for t in (e.match_start, e.match_end)})
+        self.segments = [[] for _ in self.boundaries]
+        for idx, entry in enumerate(self.entries):
+            if entry.match_start == entry.match_end:
+                continue
+            first = bisect.bisect_left(self.boundaries, entry.match_start)
+            last = bisect.bisect_left(self.boundaries, entry.match_end)
+            for segment in range(first, last):
+                self.segments[segment].append(idx)
+
+        # moments on-call users change, all-day events change hands at midnight in the calendar timezone
+        transitions = set(self.boundaries)
+        for entry in self.entries:
+            if entry.all_day:
+                transitions.update(_to_timestamp(dt) for dt in entry.start_end_with_respect_to_all_day(calendar_tz))
+        self.transitions = sorted(transitions)
+
+    def next_transition(self, after: datetime.datetime) -> typing.Optional[float]:
+        idx = bisect.bisect_right(self.transitions, after.timestamp())
+        return self.transitions[idx] if idx < len(self.transitions) else None
+
+    def between(self, start_datetime: datetime.datetime, end_datetime: datetime.datetime) -> typing.List[TimelineEntry]:
+        """Return events between start_datetime and end_datetime, same as ical_events.get_events_from_ical_between"""
+        start, end = start_datetime.timestamp(), end_datetime.timestamp()
+        if start > end:
+            return []
+
+        # segment containing the start of the range
+        first = max(bisect.bisect_right(self.boundaries, start) - 1, 0)
+        if start == end:
+            candidates = set(self.segments[first]) if self.boundaries and self.boundaries[first] <= start else set()
+            candidates.update(idx for idx in self.instant_entries if self.entries[idx].match_start == start)
+            return [self.entries[idx] for idx in sorted(candidates)]
+
+        last = bisect.bisect_left(self.boundaries, end)
+        candidates = {idx for segment in self.segments[first:last] for idx in segment}
+        candidates.update(idx for idx in self.instant_entries if start <= self.entries[idx].match_start < end)
+        result = []
+        for idx in sorted(candidates):
+            entry = self.entries[idx]
+            if entry.match_start == entry.match_end or (entry.match_start < end and start < entry.match_end):
+                result.append(entry)
+        return result
+
+
+class ScheduleTimeline(typing.NamedTuple):
+    version: str
+    built_at: datetime.datetime
+    horizon_start: datetime.datetime
+    horizon_end: datetime.datetime
+    # primary calendar first, None if there is no calendar, same as OnCallSchedule.get_icalendars
+    calendars: typing.Tuple[typing.Optional[CalendarTimeline], ...]
+
+    def covers(self, start_datetime: datetime.datetime, end_datetime: datetime.datetime) -> bool:
+        return self.horizon_start <= start_datetime and end_datetime <= self.horizon_end
+
+    def next_transition(self, after: datetime.datetime) -> typing.Optional[datetime.datetime]:
+        """Return the first moment after the given one when on-call users may change, None if there is none"""
+        transitions = [
+            transition
+            for transition in (calendar.next_transition(after) for calendar in self.calendars if calendar is not None)
+            if transition is not None
+        ]
+        if not transitions:
+            return None
+        return datetime.datetime.fromtimestamp(min(transitions), tz=pytz.UTC)
+
+
+def _cache_key(schedule_pk):
+    return SCHEDULE_TIMELINE_CACHE_KEY.format(schedule_pk)
+
+
+def _set_local_timeline(schedule_pk, timeline: ScheduleTimeline) -> None:
+    with _local_timelines_lock:
+        _local_timelines[schedule_pk] = timeline
+        _local_timelines.move_to_end(schedule_pk)
+        while len(_local_timelines) > LOCAL_TIMELINES_MAX_SIZE:
+            _local_timelines.popitem(last=False)
+
+
+def _get_timeline(schedule, start_datetime, end_datetime) -> typing.Optional[ScheduleTimeline]:
+    """
+    Return the timeline built from the current iCal files, the process copy is used if it covers the period.
+    Timelines only depend on the iCal files and the horizon, so a copy of the same version is never stale.
+    """
+    version = schedule.ical_files_version
+    if version is None:
+        return None
+
+    with _local_timelines_lock:
+        timeline = _local_timelines.get(schedule.pk)
+    if timeline is not None and timeline.version == version and timeline.covers(start_datetime, end_datetime):
+        return timeline
+
+    timeline = cache.get(_cache_key(schedule.pk))
+    if timeline is None or timeline.version != version:
+        return None
+    _set_local_timeline(schedule.pk, timeline)
+    return timeline
+
+
+def _build_calendar_timeline(calendar, horizon_start, horizon_end) -> CalendarTimeline:
+    entries = []
+    for event in ical_events.get_events_from_ical_between(calendar, horizon_start, horizon_end):
+        match_start, match_end = ical_events.get_start_and_end_with_respect_to_event_type(event)
+        if type(event[ICAL_DATETIME_START].dt) == datetime.date:
+            start, end, all_day = event[ICAL_DATETIME_START].dt, event[ICAL_DATETIME_END].dt, True
+        else:
+            start, end, all_day = match_start, match_end, False
+        usernames, priority = get_usernames_from_ical_event(event)
+        entries.append(
+            TimelineEntry(
+                match_start=_to_timestamp(match_start),
+                match_end=_to_timestamp(match_end),
+                start=start,
+                end=end,
+                all_day=all_day,
+                priority=priority,
+                usernames=tuple(usernames),
+            )
+        )
+    return CalendarTimeline(entries, get_icalendar_tz_or_utc(calendar))
+
+
+def build_schedule_timeline(schedule) -> ScheduleTimeline:
+    """Expand schedule events over the horizon and store the timeline in cache"""
+    now = timezone.now()
+    horizon_start = now - TIMELINE_LOOKBACK
+    horizon_end = now + datetime.timedelta(days=settings.SCHEDULE_TIMELINE_HORIZON_DAYS)
+
+    calendars = tuple(
+        _build_calendar_timeline(calendar, horizon_start, horizon_end) if calendar is not None else None
+        for calendar in schedule.get_icalendars()
+    )
+    # iCal files may have been generated by get_icalendars, the version is taken after that
+    if schedule.ical_files_version is None:
+        schedule.update_ical_files_version()
+    timeline = ScheduleTimeline(
+        version=schedule.ical_files_version,
+        built_at=now,
+        horizon_start=horizon_start,
+        horizon_end=horizon_end,
+        calendars=calendars,
+    )
+    cache.set(_cache_key(schedule.pk), timeline, timeout=SCHEDULE_TIMELINE_CACHE_TIMEOUT)
+    _set_local_timeline(schedule.pk, timeline)
+    return timeline
+
+
+def refresh_schedule_timeline(schedule, force=False) -> bool:
+    """
+    Rebuild the timeline if iCal files were changed (force=True) or if the cached one is missing, outdated or
+    about to run out of horizon. Returns whether the timeline was rebuilt.
+    """
+    if not settings.SCHEDULE_TIMELINE_HORIZON_DAYS:
+        return False
+
+    if not force:
+        timeline = cache.get(_cache_key(schedule.pk))
+        if (
+            timeline is not None
+            and schedule.ical_files_version is not None
+            and timeline.version == schedule.ical_files_version
+            and timeline.built_at > timezone.now() - TIMELINE_REBUILD_INTERVAL
+        ):
+            return False
+
+    build_schedule_timeline(schedule)
+    return True
+
+
+def get_schedule_timeline(
+    schedule, start_datetime: datetime.datetime, end_datetime: datetime.datetime
+) -> typing.Optional[ScheduleTimeline]:
+    """
+    Return the timeline of the schedule if it was built from the current iCal files and covers the period.
+    Only UTC datetimes are looked up, since all-day events are compared to midnight in the timezone of the period.
+    """
+    if not settings.SCHEDULE_TIMELINE_HORIZON_DAYS or not (is_utc(start_datetime) and is_utc(end_datetime)):
+        return None
+
+    timeline = _get_timeline(schedule, start_datetime, end_datetime)
+    if timeline is None or not timeline.covers(start_datetime, end_datetime):
+        return None
+    return timeline
@@ -1,10 +1,9 @@
 import datetime
 import enum
 import itertools
-from collections import defaultdict
-from typing import Iterable, Union
+from typing import Iterable
 
-import pytz
+from apps.schedules.coverage import MICROSECOND, Coverage, ScheduleEventColumns
 
 
 class CommentType(str, enum.Enum):
@@ -13,17 +12,23 @@ class CommentType(str, enum.Enum):
 
 
 # TODO: add "inside working hours score" and "balance outside working hours score" when working hours editor is implemented
-def get_schedule_quality_score(events: list[dict], days: int) -> dict:
-    # an event is “good” if it's a primary event, not a gap and not empty
-    good_events = [
-        event for event in events if not event["is_override"] and not event["is_gap"] and not event["is_empty"]
-    ]
-    good_event_score = get_good_event_score(good_events, days)
+def get_schedule_quality_score_by_columns(
+    columns: ScheduleEventColumns, days: int, with_load_distribution: bool = False
+) -> dict:
+    coverage = columns.get_good_events_coverage()
+    result = get_schedule_quality_score_by_coverage(coverage, columns.events_count > 0, days)
+    if with_load_distribution:
+        result["load_distribution"] = get_load_distribution(coverage)
+    return result
+
+
+def get_schedule_quality_score_by_coverage(coverage: Coverage, has_events: bool, days: int) -> dict:
+    good_event_score = get_good_event_score_by_coverage(coverage, days)
 
     # formula for balance score is taken from here: https://github.com/grafana/oncall/issues/118
-    balance_score, overloaded_users = get_balance_score(good_events)
+    balance_score, overloaded_users = get_balance_score_by_coverage(coverage)
 
-    if events:
+    if has_events:
         total_score = (good_event_score + balance_score) / 2
     else:
         total_score = 0
@@ -48,22 +53,16 @@ def get_schedule_quality_score(events: list[dict], days: int) -> dict:
     }
 
 
-def get_good_event_score(good_events: list[dict], days: int) -> float:
-    good_events_duration = timedelta_sum(event_duration(event) for event in good_events)
-    good_event_score = min(
-        good_events_duration / datetime.timedelta(days=days), 1
-    )  # todo: deal with overlapping events
-
-    return good_event_score
-
+def get_good_event_score_by_coverage(coverage: Coverage, days: int) -> float:
+    # time covered by overlapping events is counted once
+    good_events_duration = coverage.covered_duration * MICROSECOND
+    return min(good_events_duration / datetime.timedelta(days=days), 1)
 
-def get_balance_score(events: list[dict]) -> tuple[float, list[str]]:
-    duration_map = defaultdict(datetime.timedelta)
-    for event in events:
-        for user in event["users"]:
-            user_pk = user["pk"]
-            duration_map[user_pk] += event_duration(event)
 
+def get_balance_score_by_coverage(coverage: Coverage) -> tuple[float, list[str]]:
+    duration_map = {
+        user_pk: duration * MICROSECOND for user_pk, duration in coverage.durations_by_key.items() if duration > 0
+    }
     if len(duration_map) == 0:
         return 1, []
 
@@ -73,6 +72,21 @@ def get_balance_score(events: list[dict]) -> tuple[float, list[str]]:
     return get_balance_score_by_duration_map(duration_map), overloaded_users
 
 
+def get_load_distribution(coverage: Coverage) -> list[dict]:
+    """On-call time of each user in seconds and its share of the on-call time of all users in percent"""
+    total_duration = sum(coverage.durations_by_key.values())
+    load_distribution = [
+        {
+            "user": user_pk,
+            "duration": round((duration * MICROSECOND).total_seconds()),
+            "share": score_to_percent(duration / total_duration),
+        }
+        for user_pk, duration in coverage.durations_by_key.items()
+        if duration > 0
+    ]
+    return sorted(load_distribution, key=lambda load: (-load["duration"], load["user"]))
+
+
 def get_balance_score_by_duration_map(duration_map: dict[str, datetime.timedelta]) -> float:
     if len(duration_map) <= 1:
         return 1
@@ -89,26 +103,6 @@ def get_balance_score_by_duration_map(duration_map: dict[str, datetime.timedelta
     return balance_score
 
 
-def get_day_start(dt: Union[datetime.datetime, datetime.date]) -> datetime.datetime:
-    return datetime.datetime.combine(dt, datetime.datetime.min.time(), tzinfo=pytz.UTC)
-
-
-def get_day_end(dt: Union[datetime.datetime, datetime.date]) -> datetime.datetime:
-    return datetime.datetime.combine(dt, datetime.datetime.max.time(), tzinfo=pytz.UTC)
-
-
-def event_duration(event: dict) -> datetime.timedelta:
-    start = event["start"]
-    end = event["end"]
-
-    if event["all_day"]:
-        start = get_day_start(start)
-        # adding one microsecond to the end datetime to make sure 1 day-long events are really 1 day long
-        end = get_day_end(end) + datetime.timedelta(microseconds=1)
-
-    return end - start
-
-
 def timedelta_sum(deltas: Iterable[datetime.timedelta]) -> datetime.timedelta:
     return sum(deltas, start=datetime.timedelta())
 
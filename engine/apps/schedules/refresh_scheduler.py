@@ -0,0 +1,96 @@
+import datetime
+import typing
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+
+from apps.schedules.oncall_timeline import get_schedule_timeline
+
+# same as start_refresh_ical_files period in CELERY_BEAT_SCHEDULE
+REFRESH_CYCLE_INTERVAL = datetime.timedelta(minutes=10)
+
+SCHEDULE_REFRESH_DIRTY_CACHE_KEY = "schedule_refresh_dirty_{}"
+SCHEDULE_REFRESH_DUE_AT_CACHE_KEY = "schedule_refresh_due_at_{}"
+SCHEDULE_REFRESH_CACHE_TIMEOUT = 60 * 60 * 24 * 2
+
+
+def _dirty_cache_key(schedule_pk):
+    return SCHEDULE_REFRESH_DIRTY_CACHE_KEY.format(schedule_pk)
+
+
+def _due_at_cache_key(schedule_pk):
+    return SCHEDULE_REFRESH_DUE_AT_CACHE_KEY.format(schedule_pk)
+
+
+def mark_schedule_dirty(schedule_pk):
+    """Make the schedule refreshed by the next refresh cycle, e.g. after its shifts or settings were changed"""
+    cache.set(_dirty_cache_key(schedule_pk), True, timeout=SCHEDULE_REFRESH_CACHE_TIMEOUT)
+
+
+def clear_schedule_dirty(schedule_pk) -> bool:
+    """
+    Called right before the refresh, so changes made while it's running mark the schedule dirty again.
+    Return whether the schedule was marked dirty.
+    """
+    is_dirty = bool(cache.get(_dirty_cache_key(schedule_pk)))
+    if is_dirty:
+        cache.delete(_dirty_cache_key(schedule_pk))
+    return is_dirty
+
+
+def get_next_refresh_at(schedule, now: datetime.datetime) -> datetime.datetime:
+    """
+    Return when the schedule should be refreshed next if nothing is changed: the next moment on-call users change
+    according to the timeline, but not later than SCHEDULE_REFRESH_MAX_INTERVAL from now.
+    Schedules fetching remote iCal files and schedules without a timeline are refreshed every cycle.
+    """
+    if getattr(schedule, "ical_url_primary", None) or getattr(schedule, "ical_url_overrides", None):
+        return now
+
+    timeline = get_schedule_timeline(schedule, now, now)
+    if timeline is None:
+        return now
+
+    next_refresh_at = now + datetime.timedelta(seconds=settings.SCHEDULE_REFRESH_MAX_INTERVAL)
+    next_transition = timeline.next_transition(now)
+    if next_transition is not None:
+        next_refresh_at = min(next_refresh_at, next_transition)
+    return next_refresh_at
+
+
+def set_next_refresh_at(schedule, now: typing.Optional[datetime.datetime] = None):
+    now = now or timezone.now()
+    next_refresh_at = get_next_refresh_at(schedule, now)
+    cache.set(_due_at_cache_key(schedule.pk), next_refresh_at, timeout=SCHEDULE_REFRESH_CACHE_TIMEOUT)
+
+
+def get_schedules_to_refresh(
+    schedule_pks: typing.Iterable[int], now: typing.Optional[datetime.datetime] = None
+) -> typing.Tuple[typing.List[int], typing.List[typing.Tuple[int, datetime.datetime]]]:
+    """
+    Split schedules into ones to refresh right away (dirty, overdue or never refreshed) and ones to refresh
+    at some moment before the next cycle, returned along with the moment.
+    Schedules refreshed at a moment are considered not due until the next cycle, so they aren't scheduled twice.
+    """
+    now = now or timezone.now()
+    next_cycle_at = now + REFRESH_CYCLE_INTERVAL
+    schedule_pks = list(schedule_pks)
+
+    cache_keys = [key for pk in schedule_pks for key in (_dirty_cache_key(pk), _due_at_cache_key(pk))]
+    cached_values = cache.get_many(cache_keys)
+
+    refresh_now = []
+    refresh_at = []
+    for pk in schedule_pks:
+        due_at = cached_values.get(_due_at_cache_key(pk))
+        if cached_values.get(_dirty_cache_key(pk)) or due_at is None or due_at <= now:
+            refresh_now.append(pk)
+        elif due_at < next_cycle_at:
+            refresh_at.append((pk, due_at))
+
+    if refresh_at:
+        cache.set_many(
+            {_due_at_cache_key(pk): next_cycle_at for pk, _ in refresh_at}, timeout=SCHEDULE_REFRESH_CACHE_TIMEOUT
+        )
+    return refresh_now, refresh_at
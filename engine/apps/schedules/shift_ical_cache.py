@@ -0,0 +1,62 @@
+import hashlib
+import typing
+
+from django.apps import apps
+from django.core.cache import cache
+
+CUSTOM_SHIFT_ICAL_CACHE_KEY = "custom_shift_ical_{}"
+CUSTOM_SHIFT_ICAL_CACHE_TIMEOUT = 60 * 60 * 24
+
+
+def _get_usernames_by_pk(shifts) -> typing.Dict[str, str]:
+    User = apps.get_model("user_management", "User")
+
+    user_pks = {pk for shift in shifts if shift.rolling_users for users in shift.rolling_users for pk in users}
+    if not user_pks:
+        return {}
+    # same manager as CustomOnCallShift.get_rolling_users uses, so deleted users are skipped the same way
+    return {str(pk): username for pk, username in User.objects.filter(pk__in=user_pks).values_list("pk", "username")}
+
+
+def get_shift_ical_version(shift, time_zone, allow_empty_users, usernames_by_pk) -> str:
+    """
+    Hash of everything CustomOnCallShift.convert_to_ical output depends on: shift fields, usernames of its users
+    and the arguments. Output doesn't depend on the current time.
+    """
+    CustomOnCallShift = apps.get_model("schedules", "CustomOnCallShift")
+
+    if shift.type in (CustomOnCallShift.TYPE_ROLLING_USERS_EVENT, CustomOnCallShift.TYPE_OVERRIDE):
+        usernames = [[usernames_by_pk.get(str(pk)) for pk in users] for users in shift.rolling_users or []]
+    else:
+        usernames = [user.username for user in shift.users.all()]
+    fields = [(field.attname, getattr(shift, field.attname)) for field in shift._meta.concrete_fields]
+    return hashlib.md5(repr((fields, usernames, time_zone, allow_empty_users)).encode()).hexdigest()
+
+
+def convert_shifts_to_ical(shifts, time_zone="UTC", allow_empty_users=False) -> typing.List[str]:
+    """
+    Return CustomOnCallShift.convert_to_ical output for each shift. Output for saved shifts is cached by their
+    version, so only new and changed shifts are converted.
+    """
+    usernames_by_pk = _get_usernames_by_pk(shifts)
+    cache_keys = [
+        CUSTOM_SHIFT_ICAL_CACHE_KEY.format(get_shift_ical_version(shift, time_zone, allow_empty_users, usernames_by_pk))
+        if shift.pk is not None
+        else None
+        for shift in shifts
+    ]
+    cached_icals = cache.get_many([key for key in cache_keys if key is not None])
+
+    result = []
+    icals_to_cache = {}
+    for shift, cache_key in zip(shifts, cache_keys):
+        ical = cached_icals.get(cache_key)
+        if ical is None:
+            ical = shift.convert_to_ical(time_zone, allow_empty_users=allow_empty_users)
+            if cache_key is not None:
+                icals_to_cache[cache_key] = ical
+        result.append(ical)
+
+    if icals_to_cache:
+        cache.set_many(icals_to_cache, timeout=CUSTOM_SHIFT_ICAL_CACHE_TIMEOUT)
+    return result
@@ -1,8 +1,10 @@
 from celery.utils.log import get_task_logger
 from django.apps import apps
 
-from apps.alerts.tasks import notify_ical_schedule_shift
+from apps.alerts.tasks import schedule_notify_ical_schedule_shift
 from apps.schedules.ical_utils import is_icals_equal
+from apps.schedules.oncall_timeline import refresh_schedule_timeline
+from apps.schedules.refresh_scheduler import clear_schedule_dirty, get_schedules_to_refresh, set_next_refresh_at
 from apps.schedules.tasks import notify_about_empty_shifts_in_schedule, notify_about_gaps_in_schedule
 from apps.slack.tasks import start_update_slack_user_group_for_schedules
 from common.custom_celery_tasks import shared_dedicated_queue_retry_task
@@ -16,9 +18,14 @@ def start_refresh_ical_files():
 
     task_logger.info("Start refresh ical files")
 
-    schedules = OnCallSchedule.objects.all()
-    for schedule in schedules:
-        refresh_ical_file.apply_async((schedule.pk,))
+    # only schedules which were changed or whose on-call users are about to change are refreshed
+    refresh_now, refresh_at = get_schedules_to_refresh(OnCallSchedule.objects.values_list("pk", flat=True))
+    for schedule_pk in refresh_now:
+        refresh_ical_file.apply_async((schedule_pk,))
+    for schedule_pk, eta in refresh_at:
+        refresh_ical_file.apply_async((schedule_pk,), eta=eta)
+
+    task_logger.info(f"Refresh ical files: {len(refresh_now)} schedules now, {len(refresh_at)} schedules later")
 
     # Update Slack user groups with a delay to make sure all the schedules are refreshed
     start_update_slack_user_group_for_schedules.apply_async(countdown=30)
@@ -36,9 +43,9 @@ def refresh_ical_file(schedule_pk):
         task_logger.info(f"Tried to refresh non-existing schedule {schedule_pk}")
         return
 
+    # shifts or settings may be changed even if iCal files are not, e.g. a reader already regenerated them
+    is_dirty = clear_schedule_dirty(schedule_pk)
     schedule.refresh_ical_file()
-    if schedule.channel is not None:
-        notify_ical_schedule_shift.apply_async((schedule.pk,))
 
     run_task_primary = False
     if schedule.cached_ical_file_primary:
@@ -71,6 +78,20 @@ def refresh_ical_file(schedule_pk):
             task_logger.info(f"run_task_overrides {schedule_pk} {run_task_primary} icals not equal")
     run_task = run_task_primary or run_task_overrides
 
+    try:
+        refresh_schedule_timeline(schedule, force=run_task)
+    except ValueError:
+        # timeline is only an index, lookups parse iCal files if it's missing
+        task_logger.exception(f"Failed to build on-call timeline for schedule {schedule_pk}")
+    set_next_refresh_at(schedule)
+
+    if schedule.channel is not None:
+        # current shifts also end if iCal file became empty
+        ical_emptied = (schedule.prev_ical_file_primary and not schedule.cached_ical_file_primary) or (
+            schedule.prev_ical_file_overrides and not schedule.cached_ical_file_overrides
+        )
+        schedule_notify_ical_schedule_shift(schedule, schedule_changed=run_task or is_dirty or bool(ical_emptied))
+
     if run_task:
         notify_about_empty_shifts_in_schedule.apply_async((schedule_pk,))
         notify_about_gaps_in_schedule.apply_async((schedule_pk,))
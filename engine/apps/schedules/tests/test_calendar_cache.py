@@ -0,0 +1,64 @@
+import os
+from unittest.mock import patch
+
+import pytest
+from django.utils import timezone
+from icalendar import Calendar
+
+from apps.schedules.ical_events import ical_events
+from apps.schedules.ical_events.adapter.amixr_recurring_ical_events_adapter import AmixrUnfoldableCalendar
+from apps.schedules.ical_events.calendar_cache import clear_calendar_cache, get_icalendar
+from apps.schedules.tests.conftest import CALENDARS_FOLDER
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    clear_calendar_cache()
+    yield
+    clear_calendar_cache()
+
+
+def _read_ical(calendar_name):
+    with open(os.path.join(CALENDARS_FOLDER, calendar_name)) as file:
+        return file.read()
+
+
+def test_get_icalendar_parses_once():
+    ical_file = _read_ical("calendar_with_recurring_event.ics")
+
+    calendar = get_icalendar(ical_file)
+    assert get_icalendar(ical_file) is calendar
+    assert get_icalendar(_read_ical("calendar_with_all_day_event.ics")) is not calendar
+
+
+def test_get_icalendar_evicts_by_size(settings):
+    recurring_ical_file = _read_ical("calendar_with_recurring_event.ics")
+    all_day_ical_file = _read_ical("calendar_with_all_day_event.ics")
+    settings.ICAL_CALENDAR_CACHE_MAX_SIZE = len(recurring_ical_file) + len(all_day_ical_file) - 1
+
+    calendar = get_icalendar(recurring_ical_file)
+    get_icalendar(all_day_ical_file)
+    assert get_icalendar(recurring_ical_file) is not calendar
+
+
+def test_expanded_events_are_shared_within_day():
+    ical_file = _read_ical("calendar_with_edited_recurring_events.ics")
+    calendar = get_icalendar(ical_file)
+    day_to_check = timezone.datetime.fromisoformat("2021-01-27T15:27:14.448059+00:00")
+
+    with patch.object(AmixrUnfoldableCalendar, "between", autospec=True, side_effect=AmixrUnfoldableCalendar.between):
+        events = [
+            ical_events.get_events_from_ical_between(calendar, day_to_check + delta, day_to_check + delta)
+            for delta in (timezone.timedelta(hours=-15), timezone.timedelta(0), timezone.timedelta(hours=8))
+        ]
+        assert AmixrUnfoldableCalendar.between.call_count == 1
+
+    # same events as for a calendar which is not cached
+    not_cached_calendar = Calendar.from_ical(ical_file)
+    for delta, cached_events in zip(
+        (timezone.timedelta(hours=-15), timezone.timedelta(0), timezone.timedelta(hours=8)), events
+    ):
+        expected_events = ical_events.get_events_from_ical_between(
+            not_cached_calendar, day_to_check + delta, day_to_check + delta
+        )
+        assert [e.to_ical() for e in cached_events] == [e.to_ical() for e in expected_events]
@@ -0,0 +1,66 @@
+import datetime
+
+import pytest
+import pytz
+
+from apps.schedules.coverage import Coverage, Interval, to_epoch
+from apps.schedules.ical_utils import DatetimeInterval, detect_gaps
+
+
+def test_coverage():
+    coverage = Coverage(
+        [
+            Interval(0, 10, ("a",)),
+            Interval(5, 12, ("a", "b")),
+            Interval(20, 30, ("b",)),
+            Interval(12, 15, ()),
+            Interval(40, 40, ("c",)),
+        ]
+    )
+
+    # overlapping intervals are counted once
+    assert coverage.covered_duration == 15 + 10
+    # overlapping intervals of the same key are counted once
+    assert coverage.durations_by_key == {"a": 12, "b": 17}
+
+
+@pytest.mark.parametrize(
+    "intervals,min_gap,expected_gaps",
+    [
+        ([], 0, []),
+        ([(0, 100)], 0, []),
+        ([(10, 20), (30, 100)], 0, [(None, 10), (20, 30)]),
+        ([(0, 20), (5, 10), (30, 50)], 0, [(20, 30), (50, None)]),
+        ([(0, 20), (25, 100)], 10, []),
+        ([(0, 20), (20, 100)], 0, []),
+    ],
+)
+def test_coverage_gaps(intervals, min_gap, expected_gaps):
+    coverage = Coverage([Interval(start, end) for start, end in intervals])
+    assert coverage.gaps(0, 100, min_gap=min_gap) == expected_gaps
+
+
+def test_to_epoch():
+    value = datetime.datetime(2023, 1, 1, 12, 0, 0, 1, tzinfo=pytz.UTC)
+    assert to_epoch(value) == int(value.timestamp()) * 10**6 + 1
+    assert to_epoch(value.replace(tzinfo=None)) == to_epoch(value)
+    assert to_epoch(value.astimezone(pytz.timezone("Europe/Amsterdam"))) == to_epoch(value)
+
+
+def test_detect_gaps():
+    start = datetime.datetime(2023, 1, 1, tzinfo=pytz.UTC)
+    end = start + datetime.timedelta(days=1)
+    hours = [start + datetime.timedelta(hours=hour) for hour in range(25)]
+    intervals = [
+        DatetimeInterval(hours[1], hours[5]),
+        DatetimeInterval(hours[2], hours[3]),
+        # gaps shorter than a minute are ignored
+        DatetimeInterval(hours[5] + datetime.timedelta(seconds=30), hours[8]),
+        DatetimeInterval(hours[10], hours[20]),
+    ]
+
+    assert detect_gaps(intervals, start, end) == [
+        DatetimeInterval(None, hours[1]),
+        DatetimeInterval(hours[8], hours[10]),
+        DatetimeInterval(hours[20], None),
+    ]
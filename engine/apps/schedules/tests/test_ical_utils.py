@@ -1,12 +1,20 @@
 import datetime
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import patch
 from uuid import uuid4
 
 import pytest
 import pytz
+from django.core.cache import cache
 from django.utils import timezone
+from icalendar import Event
 
 from apps.api.permissions import LegacyAccessControlRole
 from apps.schedules.ical_utils import (
+    IcalUsersResolver,
+    fetch_ical_file_or_get_error,
+    get_oncall_users_for_multiple_schedules_at,
     list_of_oncall_shifts_from_ical,
     list_users_to_notify_from_ical,
     parse_event_uid,
@@ -107,6 +115,95 @@ def test_list_users_to_notify_from_ical_until_terminated_event(
     assert users_on_call == []
 
 
+@pytest.mark.django_db
+def test_ical_users_resolver(django_assert_num_queries, make_organization_and_user, make_user_for_organization):
+    organization, user = make_organization_and_user()
+    other_user = make_user_for_organization(organization, email="Other.User@test.com")
+    viewer = make_user_for_organization(organization, role=LegacyAccessControlRole.VIEWER)
+
+    events = []
+    for summary, description in [
+        (user.username, None),
+        ("[L1] other.user@test.com", user.username),
+        (viewer.username, None),
+        ("unknown", other_user.username),
+    ]:
+        event = Event()
+        event.add("summary", summary)
+        if description is not None:
+            event.add("description", description)
+        events.append(event)
+
+    with django_assert_num_queries(1):
+        users_resolver = IcalUsersResolver(events, organization)
+    assert [users_resolver.get_users_from_ical_event(event) for event in events] == [
+        [user],
+        sorted([user, other_user], key=lambda u: u.pk),
+        [],
+        [other_user],
+    ]
+    assert [users_resolver.get_missing_users_from_ical_event(event) for event in events] == [
+        [],
+        [],
+        [viewer.username],
+        ["unknown"],
+    ]
+
+    users_resolver = IcalUsersResolver(events, organization, include_viewers=True)
+    assert users_resolver.get_users_from_ical_event(events[2]) == [viewer]
+
+
+@pytest.mark.django_db
+def test_get_oncall_users_for_multiple_schedules_at(
+    make_organization, make_user_for_organization, make_schedule, make_on_call_shift
+):
+    organization = make_organization()
+    users = [make_user_for_organization(organization) for _ in range(3)]
+    today = timezone.now().replace(hour=0, minute=0, second=0, microsecond=0)
+
+    schedules = []
+    for i, user in enumerate(users):
+        schedule = make_schedule(organization, schedule_class=OnCallScheduleWeb)
+        on_call_shift = make_on_call_shift(
+            organization=organization,
+            shift_type=CustomOnCallShift.TYPE_ROLLING_USERS_EVENT,
+            start=today + timezone.timedelta(hours=i * 4),
+            rotation_start=today + timezone.timedelta(hours=i * 4),
+            duration=timezone.timedelta(hours=6),
+            priority_level=1,
+            frequency=CustomOnCallShift.FREQUENCY_DAILY,
+            schedule=schedule,
+        )
+        on_call_shift.add_rolling_users([[user]])
+        schedules.append(schedule)
+    override = make_on_call_shift(
+        organization=organization,
+        shift_type=CustomOnCallShift.TYPE_OVERRIDE,
+        start=today + timezone.timedelta(hours=2),
+        rotation_start=today + timezone.timedelta(hours=2),
+        duration=timezone.timedelta(hours=1),
+        schedule=schedules[0],
+    )
+    override.add_rolling_users([[users[2]]])
+
+    events_datetimes = [today + timezone.timedelta(hours=hours, minutes=30) for hours in range(0, 24, 2)]
+    expected = {
+        schedule.pk: [list_users_to_notify_from_ical(schedule, dt) for dt in events_datetimes]
+        for schedule in schedules
+    }
+
+    with patch("apps.schedules.ical_utils.users_in_ical", wraps=users_in_ical) as mock_users_in_ical:
+        oncall_users = get_oncall_users_for_multiple_schedules_at(
+            OnCallScheduleWeb.objects.filter(pk__in=[s.pk for s in schedules]), events_datetimes
+        )
+    # users of all schedules are fetched at once
+    assert mock_users_in_ical.call_count == 1
+    assert {pk: [set(u) for u in users] for pk, users in oncall_users.items()} == {
+        pk: [set(u) for u in users] for pk, users in expected.items()
+    }
+    assert oncall_users[schedules[0].pk][:2] == [[users[0]], [users[2]]]
+
+
 @pytest.mark.django_db
 def test_shifts_dict_all_day_middle_event(make_organization, make_schedule, get_ical):
     calendar = get_ical("calendar_with_all_day_event.ics")
@@ -153,3 +250,73 @@ def test_parse_event_uid_fallback():
     pk, source = parse_event_uid(event_uid)
     assert pk == event_uid
     assert source is None
+
+
+@pytest.fixture
+def ical_server():
+    """Local stand-in for a calendar host, responds 304 to requests with the current ETag"""
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            server.received_headers.append(dict(self.headers))
+            if self.headers.get("If-None-Match") == server.etag:
+                self.send_response(304)
+                self.end_headers()
+                return
+            body = server.ical_file.encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "text/calendar")
+            self.send_header("Content-Length", str(len(body)))
+            self.send_header("ETag", server.etag)
+            self.send_header("Set-Cookie", "session=calendar-session; Path=/")
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    server.received_headers = []
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def test_fetch_ical_file_not_modified(ical_server, get_ical):
+    cache.clear()
+    url = f"http://127.0.0.1:{ical_server.server_port}/calendar.ics"
+    ical_server.ical_file = get_ical("calendar_with_recurring_event.ics").to_ical().decode()
+    ical_server.etag = '"v1"'
+
+    ical_file, error = fetch_ical_file_or_get_error(url)
+    assert error is None
+    assert ical_file == ical_server.ical_file
+    assert "If-None-Match" not in ical_server.received_headers[-1]
+
+    # not modified, cached file is returned as is without parsing
+    with patch("apps.schedules.ical_utils.Calendar.from_ical") as mock_from_ical:
+        assert fetch_ical_file_or_get_error(url, ical_file) == (ical_file, None)
+    assert ical_server.received_headers[-1]["If-None-Match"] == '"v1"'
+    assert not mock_from_ical.called
+
+    # validators are not sent if the cached file is not the last downloaded one
+    fetch_ical_file_or_get_error(url, "other ical")
+    assert "If-None-Match" not in ical_server.received_headers[-1]
+
+    ical_server.ical_file = get_ical("calendar_with_all_day_event.ics").to_ical().decode()
+    ical_server.etag = '"v2"'
+    assert fetch_ical_file_or_get_error(url, ical_file) == (ical_server.ical_file, None)
+    assert ical_server.received_headers[-1]["If-None-Match"] == '"v1"'
+
+
+def test_fetch_ical_file_does_not_keep_cookies(ical_server, get_ical):
+    cache.clear()
+    url = f"http://127.0.0.1:{ical_server.server_port}/calendar.ics"
+    ical_server.ical_file = get_ical("calendar_with_recurring_event.ics").to_ical().decode()
+    ical_server.etag = '"v1"'
+
+    fetch_ical_file_or_get_error(url)
+    fetch_ical_file_or_get_error(url)
+    assert "Cookie" not in ical_server.received_headers[-1]
@@ -1,7 +1,9 @@
 import datetime
+from unittest.mock import patch
 
 import pytest
 import pytz
+from django.core.cache import cache
 from django.utils import timezone
 
 from apps.api.permissions import LegacyAccessControlRole
@@ -997,3 +999,49 @@ def test_schedules_ical_shift_cache(make_organization, make_schedule):
     # after the refresh, cached value is updated
     # (not None means no need to refresh cached value)
     assert schedule.cached_ical_file_primary == ""
+
+
+@pytest.mark.django_db
+def test_generate_ical_file_converts_changed_shifts_only(
+    make_organization, make_user_for_organization, make_schedule, make_on_call_shift
+):
+    cache.clear()
+    organization = make_organization()
+    user = make_user_for_organization(organization)
+    schedule = make_schedule(organization, schedule_class=OnCallScheduleWeb)
+    start_date = timezone.now().replace(hour=0, minute=0, second=0, microsecond=0)
+
+    shifts = []
+    for i in range(3):
+        on_call_shift = make_on_call_shift(
+            organization=organization,
+            shift_type=CustomOnCallShift.TYPE_ROLLING_USERS_EVENT,
+            start=start_date + timezone.timedelta(hours=i * 8),
+            rotation_start=start_date + timezone.timedelta(hours=i * 8),
+            duration=timezone.timedelta(hours=8),
+            frequency=CustomOnCallShift.FREQUENCY_DAILY,
+            schedule=schedule,
+        )
+        on_call_shift.add_rolling_users([[user]])
+        shifts.append(on_call_shift)
+
+    ical_file = schedule._generate_ical_file_primary()
+    assert ical_file.count("BEGIN:VEVENT") == 3
+
+    with patch.object(
+        CustomOnCallShift, "convert_to_ical", autospec=True, side_effect=CustomOnCallShift.convert_to_ical
+    ) as mock_convert_to_ical:
+        assert schedule._generate_ical_file_primary() == ical_file
+        assert mock_convert_to_ical.call_count == 0
+
+        shifts[1].duration = timezone.timedelta(hours=4)
+        shifts[1].save(update_fields=["duration"])
+        user.username = "renamed"
+        updated_ical_file = schedule._generate_ical_file_primary()
+        assert mock_convert_to_ical.call_count == 1
+        assert updated_ical_file != ical_file
+
+        user.save(update_fields=["username"])
+        updated_ical_file = schedule._generate_ical_file_primary()
+        assert mock_convert_to_ical.call_count == 4
+        assert updated_ical_file.count("SUMMARY:renamed") == 3
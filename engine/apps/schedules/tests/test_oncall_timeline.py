@@ -0,0 +1,179 @@
+import datetime
+import random
+from unittest.mock import patch
+
+import pytest
+import pytz
+from django.core.cache import cache
+from django.utils import timezone
+
+from apps.schedules.ical_utils import list_of_gaps_in_schedule, list_users_to_notify_from_ical
+from apps.schedules.models import CustomOnCallShift, OnCallSchedule, OnCallScheduleWeb
+from apps.schedules import oncall_timeline
+from apps.schedules.oncall_timeline import (
+    CalendarTimeline,
+    TimelineEntry,
+    build_schedule_timeline,
+    get_schedule_timeline,
+    refresh_schedule_timeline,
+)
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    cache.clear()
+    oncall_timeline._local_timelines.clear()
+
+
+def test_calendar_timeline_between():
+    base = datetime.datetime(2023, 1, 1, tzinfo=pytz.UTC)
+    base_timestamp = base.timestamp()
+    rnd = random.Random(42)
+    entries = []
+    for i in range(200):
+        start = rnd.randrange(0, 1000)
+        end = start + rnd.choice([0, 1, 5, 30, 300])
+        entries.append(TimelineEntry(base_timestamp + start, base_timestamp + end, None, None, False, 0, (str(i),)))
+    calendar_timeline = CalendarTimeline(entries, pytz.UTC)
+
+    def contains(entry, start, end):
+        # recurring_ical_events.time_span_contains_event
+        if entry.match_start == entry.match_end:
+            if start == end:
+                return entry.match_start == start
+            return start <= entry.match_start < end
+        if start == end:
+            return entry.match_start <= start < entry.match_end
+        return entry.match_start < end and start < entry.match_end
+
+    for _ in range(500):
+        start = rnd.randrange(-10, 1400)
+        end = start + rnd.choice([0, 0, 1, 10, 100])
+        found = calendar_timeline.between(
+            base + datetime.timedelta(seconds=start), base + datetime.timedelta(seconds=end)
+        )
+        expected = [e for e in entries if contains(e, base_timestamp + start, base_timestamp + end)]
+        assert sorted(e.usernames for e in found) == sorted(e.usernames for e in expected)
+
+
+def _make_web_schedule(make_organization, make_user_for_organization, make_schedule, make_on_call_shift):
+    organization = make_organization()
+    schedule = make_schedule(organization, schedule_class=OnCallScheduleWeb)
+    user = make_user_for_organization(organization)
+    other_user = make_user_for_organization(organization)
+    today = timezone.now().replace(hour=0, minute=0, second=0, microsecond=0)
+
+    on_call_shift = make_on_call_shift(
+        organization=organization,
+        shift_type=CustomOnCallShift.TYPE_ROLLING_USERS_EVENT,
+        start=today + timezone.timedelta(hours=10),
+        rotation_start=today + timezone.timedelta(hours=10),
+        duration=timezone.timedelta(hours=8),
+        priority_level=1,
+        frequency=CustomOnCallShift.FREQUENCY_DAILY,
+        schedule=schedule,
+    )
+    on_call_shift.add_rolling_users([[user]])
+    override = make_on_call_shift(
+        organization=organization,
+        shift_type=CustomOnCallShift.TYPE_OVERRIDE,
+        start=today + timezone.timedelta(days=1, hours=12),
+        rotation_start=today + timezone.timedelta(days=1, hours=12),
+        duration=timezone.timedelta(hours=2),
+        schedule=schedule,
+    )
+    override.add_rolling_users([[other_user]])
+    return OnCallSchedule.objects.get(pk=schedule.pk), today, user, other_user
+
+
+@pytest.mark.django_db
+def test_list_users_to_notify_from_timeline(
+    make_organization, make_user_for_organization, make_schedule, make_on_call_shift
+):
+    schedule, today, user, other_user = _make_web_schedule(
+        make_organization, make_user_for_organization, make_schedule, make_on_call_shift
+    )
+    checked_at = [today + timezone.timedelta(days=days, hours=hours) for days in range(3) for hours in (9, 11, 13, 18)]
+    expected = [set(list_users_to_notify_from_ical(schedule, dt)) for dt in checked_at]
+    assert expected[4:8] == [set(), {user}, {other_user}, set()]
+
+    build_schedule_timeline(schedule)
+    with patch.object(OnCallScheduleWeb, "get_icalendars", side_effect=AssertionError("iCal is parsed")):
+        assert [set(list_users_to_notify_from_ical(schedule, dt)) for dt in checked_at] == expected
+
+
+@pytest.mark.django_db
+def test_list_of_gaps_in_schedule_from_timeline(
+    make_organization, make_user_for_organization, make_schedule, make_on_call_shift
+):
+    schedule, today, _, _ = _make_web_schedule(
+        make_organization, make_user_for_organization, make_schedule, make_on_call_shift
+    )
+    expected = list_of_gaps_in_schedule(schedule, today.date(), today.date() + timezone.timedelta(days=7))
+    assert len(expected) > 0
+
+    build_schedule_timeline(schedule)
+    with patch.object(OnCallScheduleWeb, "get_icalendars", side_effect=AssertionError("iCal is parsed")):
+        assert list_of_gaps_in_schedule(schedule, today.date(), today.date() + timezone.timedelta(days=7)) == expected
+
+
+@pytest.mark.django_db
+def test_timeline_is_not_used_after_ical_change(
+    make_organization, make_user_for_organization, make_schedule, make_on_call_shift
+):
+    schedule, today, user, _ = _make_web_schedule(
+        make_organization, make_user_for_organization, make_schedule, make_on_call_shift
+    )
+    now = timezone.now()
+    build_schedule_timeline(schedule)
+    assert get_schedule_timeline(schedule, now, now) is not None
+    # outside of the horizon
+    assert get_schedule_timeline(schedule, now + timezone.timedelta(days=60), now + timezone.timedelta(days=60)) is None
+
+    schedule.custom_shifts.filter(type=CustomOnCallShift.TYPE_OVERRIDE).delete()
+    schedule.refresh_ical_file()
+    schedule = OnCallSchedule.objects.get(pk=schedule.pk)
+    assert get_schedule_timeline(schedule, now, now) is None
+    # override is gone
+    assert list_users_to_notify_from_ical(schedule, today + timezone.timedelta(days=1, hours=13)) == [user]
+
+    assert refresh_schedule_timeline(schedule) is True
+    assert refresh_schedule_timeline(schedule) is False
+    assert get_schedule_timeline(schedule, now, now) is not None
+
+
+@pytest.mark.django_db
+def test_timeline_lookup_uses_stored_version_and_process_copy(
+    make_organization, make_user_for_organization, make_schedule, make_on_call_shift
+):
+    schedule, _, _, _ = _make_web_schedule(
+        make_organization, make_user_for_organization, make_schedule, make_on_call_shift
+    )
+    now = timezone.now()
+    timeline = build_schedule_timeline(schedule)
+    schedule = OnCallSchedule.objects.get(pk=schedule.pk)
+    assert schedule.ical_files_version == timeline.version
+
+    with patch("apps.schedules.oncall_timeline.compute_ical_files_version") as mock_compute_version:
+        with patch("apps.schedules.oncall_timeline.cache.get") as mock_cache_get:
+            assert get_schedule_timeline(schedule, now, now) is timeline
+    assert not mock_compute_version.called
+    assert not mock_cache_get.called
+
+    # another process reads the timeline from cache once
+    oncall_timeline._local_timelines.clear()
+    assert get_schedule_timeline(schedule, now, now) == timeline
+    with patch("apps.schedules.oncall_timeline.cache.get") as mock_cache_get:
+        assert get_schedule_timeline(schedule, now, now) == timeline
+    assert not mock_cache_get.called
+
+
+@pytest.mark.django_db
+def test_timeline_disabled(settings, make_organization, make_user_for_organization, make_schedule, make_on_call_shift):
+    settings.SCHEDULE_TIMELINE_HORIZON_DAYS = 0
+    schedule, _, _, _ = _make_web_schedule(
+        make_organization, make_user_for_organization, make_schedule, make_on_call_shift
+    )
+    now = timezone.now()
+    assert refresh_schedule_timeline(schedule) is False
+    assert get_schedule_timeline(schedule, now, now) is None
@@ -1,9 +1,11 @@
+import datetime
+
 import pytest
 from rest_framework import status
 from rest_framework.reverse import reverse
 from rest_framework.test import APIClient
 
-from apps.schedules.ical_utils import memoized_users_in_ical
+from apps.schedules.ical_utils import get_schedule_event_columns, memoized_users_in_ical
 from apps.schedules.models import OnCallScheduleICal
 
 
@@ -16,7 +18,7 @@ def get_schedule_quality_response(
     make_schedule,
     make_user_auth_headers,
 ):
-    def _get_schedule_quality_response(date, days):
+    def _get_schedule_quality_response(date, days, **params):
         # clear cache
         memoized_users_in_ical.cache_clear()
 
@@ -38,7 +40,7 @@ def get_schedule_quality_response(
 
         url = reverse("api-internal:schedule-quality", kwargs={"pk": schedule.public_primary_key})
         response = client.get(
-            url + f"?date={date}&days={days}",
+            url + f"?date={date}&days={days}" + "".join(f"&{key}={value}" for key, value in params.items()),
             **make_user_auth_headers(user1, token),
         )
         return response, user1, user2
@@ -82,7 +84,7 @@ def test_get_schedule_score_09_09(get_schedule_quality_response):
     assert response.status_code == status.HTTP_200_OK
 
     assert response.json() == {
-        "total_score": 51,
+        "total_score": 49,
         "comments": [
             {"type": "warning", "text": "Schedule has gaps"},
             {"type": "info", "text": "Schedule is well-balanced, but still can be improved"},
@@ -118,3 +120,58 @@ def test_get_schedule_score_09_19(get_schedule_quality_response):
         ],
         "overloaded_users": [],
     }
+
+
+@pytest.mark.django_db
+def test_get_schedule_score_load_distribution(get_schedule_quality_response):
+    response, user1, user2 = get_schedule_quality_response("2022-09-09", 1, with_load_distribution="true")
+    assert response.status_code == status.HTTP_200_OK
+
+    assert response.json()["total_score"] == 49
+    assert response.json()["load_distribution"] == [
+        {"user": user2.public_primary_key, "duration": 3 * 60 * 60, "share": 55},
+        {"user": user1.public_primary_key, "duration": int(2.5 * 60 * 60), "share": 45},
+    ]
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize(
+    "days,expected_status",
+    [
+        (365, status.HTTP_200_OK),
+        (0, status.HTTP_400_BAD_REQUEST),
+        (367, status.HTTP_400_BAD_REQUEST),
+        ("x", status.HTTP_400_BAD_REQUEST),
+    ],
+)
+def test_get_schedule_score_days(get_schedule_quality_response, days, expected_status):
+    response, _, _ = get_schedule_quality_response("2022-01-01", days)
+    assert response.status_code == expected_status
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("date,days", [("2022-08-01", 60), ("2022-09-05", 7), ("2022-09-09", 1), ("2022-09-19", 1)])
+def test_get_schedule_event_columns(
+    get_ical, make_organization, make_user_for_organization, make_schedule, date, days
+):
+    memoized_users_in_ical.cache_clear()
+    organization = make_organization()
+    make_user_for_organization(organization, username="user1")
+    make_user_for_organization(organization, username="user2")
+    schedule = make_schedule(
+        organization,
+        schedule_class=OnCallScheduleICal,
+        cached_ical_file_primary=get_ical("quality.ics").to_ical().decode(),
+    )
+
+    date = datetime.date.fromisoformat(date)
+    events = schedule.filter_events("UTC", date, days=days, with_empty=True, with_gap=True)
+    columns = get_schedule_event_columns(schedule, date, "UTC", days=days)
+
+    assert columns.events_count == len(events)
+    # one row per event user, a single row for events without users
+    assert len(columns) == sum(max(len(event["users"]), 1) for event in events)
+    assert [columns.users[user_id] for user_id in columns.user_ids if user_id != -1] == [
+        user["pk"] for event in events for user in event["users"]
+    ]
+    assert list(columns.is_gap) == [event["is_gap"] for event in events for _ in event["users"] or [None]]
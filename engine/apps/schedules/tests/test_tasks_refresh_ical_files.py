@@ -1,9 +1,17 @@
-from unittest.mock import patch
+from unittest.mock import call, patch
 
 import pytest
+from django.core.cache import cache
+from django.utils import timezone
 
-from apps.schedules.models import OnCallScheduleICal
-from apps.schedules.tasks.refresh_ical_files import refresh_ical_file
+from apps.schedules.models import CustomOnCallShift, OnCallScheduleICal, OnCallScheduleWeb
+from apps.schedules.oncall_timeline import build_schedule_timeline
+from apps.schedules.refresh_scheduler import (
+    SCHEDULE_REFRESH_DUE_AT_CACHE_KEY,
+    get_next_refresh_at,
+    mark_schedule_dirty,
+)
+from apps.schedules.tasks.refresh_ical_files import refresh_ical_file, start_refresh_ical_files
 
 
 @pytest.mark.django_db
@@ -45,7 +53,7 @@ def test_refresh_ical_file_trigger_run(
         # patch schedule refresh to avoid changing schedule status (keep as defined above)
         with patch("apps.schedules.models.OnCallSchedule.refresh_ical_file", return_value=None):
             # do not trigger tasks for real
-            with patch("apps.schedules.tasks.refresh_ical_files.notify_ical_schedule_shift"):
+            with patch("apps.schedules.tasks.refresh_ical_files.schedule_notify_ical_schedule_shift"):
                 with patch(
                     "apps.schedules.tasks.refresh_ical_files.notify_about_empty_shifts_in_schedule"
                 ) as mock_notify_empty:
@@ -56,3 +64,99 @@ def test_refresh_ical_file_trigger_run(
 
         assert mock_notify_empty.apply_async.called == run_task
         assert mock_notify_gaps.apply_async.called == run_task
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("is_dirty", [True, False])
+def test_refresh_ical_file_notifies_about_changes_of_dirty_schedule(is_dirty, make_organization, make_schedule):
+    cache.clear()
+    organization = make_organization()
+    # iCal files are already regenerated after the change, so they are the same as on the previous refresh
+    schedule = make_schedule(
+        organization,
+        schedule_class=OnCallScheduleICal,
+        channel="channel",
+        cached_ical_file_primary="ical data",
+        prev_ical_file_primary="ical data",
+    )
+    if is_dirty:
+        mark_schedule_dirty(schedule.pk)
+
+    with patch("apps.schedules.tasks.refresh_ical_files.is_icals_equal", side_effect=lambda a, b: a == b):
+        with patch("apps.schedules.models.OnCallSchedule.refresh_ical_file", return_value=None):
+            with patch("apps.schedules.tasks.refresh_ical_files.refresh_schedule_timeline"):
+                with patch(
+                    "apps.schedules.tasks.refresh_ical_files.schedule_notify_ical_schedule_shift"
+                ) as mock_schedule_notify:
+                    refresh_ical_file(schedule.pk)
+
+    assert mock_schedule_notify.call_args.kwargs["schedule_changed"] == is_dirty
+
+
+@pytest.mark.django_db
+def test_start_refresh_ical_files_refreshes_due_schedules(make_organization, make_schedule):
+    cache.clear()
+    organization = make_organization()
+    never_refreshed, dirty, overdue, due_soon, not_due = [
+        make_schedule(organization, schedule_class=OnCallScheduleWeb) for _ in range(5)
+    ]
+    now = timezone.now()
+    for schedule, due_at in (
+        (dirty, now + timezone.timedelta(hours=1)),
+        (overdue, now - timezone.timedelta(minutes=1)),
+        (due_soon, now + timezone.timedelta(minutes=5)),
+        (not_due, now + timezone.timedelta(hours=1)),
+    ):
+        cache.set(SCHEDULE_REFRESH_DUE_AT_CACHE_KEY.format(schedule.pk), due_at)
+    mark_schedule_dirty(dirty.pk)
+
+    with patch("apps.schedules.tasks.refresh_ical_files.refresh_ical_file") as mock_refresh:
+        with patch("apps.schedules.tasks.refresh_ical_files.start_update_slack_user_group_for_schedules"):
+            start_refresh_ical_files()
+            mock_refresh.apply_async.assert_has_calls(
+                [
+                    call((never_refreshed.pk,)),
+                    call((dirty.pk,)),
+                    call((overdue.pk,)),
+                    call((due_soon.pk,), eta=now + timezone.timedelta(minutes=5)),
+                ],
+                any_order=True,
+            )
+            assert mock_refresh.apply_async.call_count == 4
+
+            # schedule refreshed at eta is not scheduled twice
+            mock_refresh.reset_mock()
+            start_refresh_ical_files()
+            scheduled = {c.args[0][0] for c in mock_refresh.apply_async.call_args_list}
+            assert due_soon.pk not in scheduled
+            assert not_due.pk not in scheduled
+
+
+@pytest.mark.django_db
+def test_refresh_ical_file_sets_next_refresh_at_shift_boundary(
+    make_organization, make_user_for_organization, make_schedule, make_on_call_shift
+):
+    cache.clear()
+    organization = make_organization()
+    schedule = make_schedule(organization, schedule_class=OnCallScheduleWeb)
+    user = make_user_for_organization(organization)
+    now = timezone.now().replace(microsecond=0)
+    on_call_shift = make_on_call_shift(
+        organization=organization,
+        shift_type=CustomOnCallShift.TYPE_ROLLING_USERS_EVENT,
+        start=now + timezone.timedelta(minutes=20),
+        rotation_start=now + timezone.timedelta(minutes=20),
+        duration=timezone.timedelta(hours=8),
+        priority_level=1,
+        frequency=CustomOnCallShift.FREQUENCY_DAILY,
+        schedule=schedule,
+    )
+    on_call_shift.add_rolling_users([[user]])
+    schedule.refresh_ical_file()
+
+    # no timeline, refreshed every cycle
+    assert get_next_refresh_at(schedule, now) == now
+
+    build_schedule_timeline(schedule)
+    assert get_next_refresh_at(schedule, now) == now + timezone.timedelta(minutes=20)
+    assert get_next_refresh_at(schedule, now + timezone.timedelta(minutes=30)) == now + timezone.timedelta(minutes=90)
@@ -7,11 +7,14 @@ from django.apps import apps
 from django.conf import settings
 from django.core.validators import MinLengthValidator
 from django.db import models
+from django.db.models.signals import post_save
+from django.dispatch import receiver
 from django.utils import timezone
 from mirage import fields as mirage_fields
 
 from apps.alerts.models import MaintainableObject
 from apps.alerts.tasks import disable_maintenance
+from apps.integrations.channel_resolver import invalidate_organization_channel_records
 from apps.slack.utils import post_message_to_channel
 from apps.user_management.subscription_strategy import FreePublicBetaSubscriptionStrategy
 from common.insight_log import ChatOpsEvent, ChatOpsType, write_chatops_insight_log
@@ -52,7 +55,9 @@ class OrganizationQuerySet(models.QuerySet):
 
     def delete(self):
         # Be careful with deleting via queryset - it doesn't delete chatops-proxy connectors.
+        organization_ids = list(self.values_list("pk", flat=True))
         self.update(deleted_at=timezone.now())
+        invalidate_organization_channel_records(organization_ids)
 
     def hard_delete(self):
         super().delete()
@@ -339,3 +344,12 @@ class Organization(MaintainableObject):
     @property
     def is_moved(self):
         return self.migration_destination_id is not None
+
+
+@receiver(post_save, sender=Organization)
+def listen_for_organization_model_save(sender, instance, created, update_fields=None, *args, **kwargs):
+    # cached token resolution of integrations keeps organization moved and deleted states
+    if created:
+        return
+    if update_fields is None or {"deleted_at", "migration_destination"} & set(update_fields):
+        invalidate_organization_channel_records([instance.pk])
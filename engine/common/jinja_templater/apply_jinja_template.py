@@ -1,10 +1,12 @@
 import logging
+from contextlib import contextmanager
 
 from django.conf import settings
 from jinja2 import TemplateAssertionError, TemplateSyntaxError, UndefinedError
 from jinja2.exceptions import SecurityError
 
 from .jinja_template_env import jinja_template_env
+from .template_cache import CompiledTemplateCache
 
 logger = logging.getLogger(__name__)
 
@@ -19,15 +21,14 @@ class JinjaTemplateWarning(Exception):
         self.fallback_message = f"Template Warning: {fallback_message}"
 
 
-def apply_jinja_template(template, payload=None, result_length_limit=settings.JINJA_RESULT_MAX_LENGTH, **kwargs):
-    if len(template) > settings.JINJA_TEMPLATE_MAX_LENGTH:
-        raise JinjaTemplateError(
-            f"Template exceeds length limit ({len(template)} > {settings.JINJA_TEMPLATE_MAX_LENGTH})"
-        )
+# Shared by all callers of apply_jinja_template, so each template is compiled once per worker process
+compiled_template_cache = CompiledTemplateCache(jinja_template_env, maxsize=settings.JINJA_TEMPLATE_CACHE_SIZE)
 
+
+@contextmanager
+def _translate_jinja_errors(template, payload=None):
     try:
-        compiled_template = jinja_template_env.from_string(template)
-        result = compiled_template.render(payload=payload, **kwargs)
+        yield
     except SecurityError as e:
         logger.warning(f"SecurityError process template={template} payload={payload}")
         raise JinjaTemplateError(str(e))
@@ -39,4 +40,30 @@ def apply_jinja_template(template, payload=None, result_length_limit=settings.JI
         logger.error(f"Unexpected template error: {str(e)} template={template} payload={payload}")
         raise JinjaTemplateError(str(e))
 
+
+def compile_jinja_template(template):
+    """
+    Compile template once to render it with render_compiled_jinja_template many times.
+    Raises the same errors as apply_jinja_template does for templates which can't be compiled.
+    """
+    if len(template) > settings.JINJA_TEMPLATE_MAX_LENGTH:
+        raise JinjaTemplateError(
+            f"Template exceeds length limit ({len(template)} > {settings.JINJA_TEMPLATE_MAX_LENGTH})"
+        )
+
+    with _translate_jinja_errors(template):
+        return compiled_template_cache.get(template)
+
+
+def render_compiled_jinja_template(
+    compiled_template, template, payload=None, result_length_limit=settings.JINJA_RESULT_MAX_LENGTH, **kwargs
+):
+    with _translate_jinja_errors(template, payload):
+        result = compiled_template.render(payload=payload, **kwargs)
+
     return (result[:result_length_limit] + "..") if len(result) > result_length_limit else result
+
+
+def apply_jinja_template(template, payload=None, result_length_limit=settings.JINJA_RESULT_MAX_LENGTH, **kwargs):
+    compiled_template = compile_jinja_template(template)
+    return render_compiled_jinja_template(compiled_template, template, payload, result_length_limit, **kwargs)
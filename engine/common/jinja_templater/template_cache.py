@@ -0,0 +1,64 @@
+import hashlib
+import threading
+import typing
+from collections import OrderedDict
+
+from jinja2 import Environment, Template
+
+
+class CacheInfo(typing.NamedTuple):
+    hits: int
+    misses: int
+    evictions: int
+    maxsize: int
+    currsize: int
+
+
+class CompiledTemplateCache:
+    """
+    Bounded LRU cache of compiled jinja templates keyed by the hash of the template source.
+    Compilation errors are not cached, they are raised to the caller on every call.
+    """
+
+    def __init__(self, env: Environment, maxsize: int = 1000):
+        self.env = env
+        self.maxsize = maxsize
+        self._templates: OrderedDict[str, Template] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def make_key(template: str) -> str:
+        return hashlib.sha256(template.encode("utf-8", "surrogatepass")).hexdigest()
+
+    def get(self, template: str) -> Template:
+        key = self.make_key(template)
+        with self._lock:
+            compiled_template = self._templates.get(key)
+            if compiled_template is not None:
+                self._templates.move_to_end(key)
+                self.hits += 1
+                return compiled_template
+            self.misses += 1
+
+        # compile outside of the lock, worst case the same template is compiled twice by concurrent threads
+        compiled_template = self.env.from_string(template)
+
+        with self._lock:
+            self._templates[key] = compiled_template
+            self._templates.move_to_end(key)
+            while len(self._templates) > self.maxsize:
+                self._templates.popitem(last=False)
+                self.evictions += 1
+        return compiled_template
+
+    def info(self) -> CacheInfo:
+        with self._lock:
+            return CacheInfo(self.hits, self.misses, self.evictions, self.maxsize, len(self._templates))
+
+    def clear(self) -> None:
+        with self._lock:
+            self._templates.clear()
+            self.hits = self.misses = self.evictions = 0
@@ -0,0 +1,55 @@
+import pytest
+from jinja2 import TemplateSyntaxError
+
+from common.jinja_templater import jinja_template_env
+from common.jinja_templater.template_cache import CompiledTemplateCache
+
+
+def test_compiled_template_cache_hit_and_miss():
+    cache = CompiledTemplateCache(jinja_template_env, maxsize=10)
+
+    first = cache.get("{{ payload.name }}")
+    second = cache.get("{{ payload.name }}")
+
+    assert first is second
+    assert first.render(payload={"name": "test"}) == "test"
+    info = cache.info()
+    assert (info.hits, info.misses, info.evictions, info.currsize) == (1, 1, 0, 1)
+
+
+def test_compiled_template_cache_lru_eviction():
+    cache = CompiledTemplateCache(jinja_template_env, maxsize=2)
+
+    cache.get("a")
+    cache.get("b")
+    cache.get("a")  # "b" becomes least recently used
+    cache.get("c")
+
+    info = cache.info()
+    assert info.evictions == 1
+    assert info.currsize == 2
+
+    cache.get("a")
+    assert cache.info().hits == 2
+    cache.get("b")
+    assert cache.info().misses == 4
+
+
+def test_compiled_template_cache_does_not_cache_errors():
+    cache = CompiledTemplateCache(jinja_template_env, maxsize=10)
+
+    for _ in range(2):
+        with pytest.raises(TemplateSyntaxError):
+            cache.get("{{%")
+
+    info = cache.info()
+    assert info.misses == 2
+    assert info.currsize == 0
+
+
+def test_compiled_template_cache_clear():
+    cache = CompiledTemplateCache(jinja_template_env, maxsize=10)
+    cache.get("a")
+    cache.clear()
+
+    assert cache.info() == (0, 0, 0, 10, 0)
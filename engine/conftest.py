@@ -22,6 +22,7 @@ from apps.alerts.models import (
     listen_for_alertgrouplogrecord,
     listen_for_alertreceivechannel_model_save,
 )
+from apps.alerts.models.alert_group_counter import alert_group_number_allocator
 from apps.alerts.signals import user_notification_action_triggered_signal
 from apps.alerts.tests.factories import (
     AlertFactory,
@@ -149,6 +150,12 @@ def mock_telegram_bot_username(monkeypatch):
     monkeypatch.setattr(Bot, "username", mock_username)
 
 
+@pytest.fixture(autouse=True)
+def reset_alert_group_number_allocator():
+    # reserved blocks would outlive DB rollback between tests
+    alert_group_number_allocator.reset()
+
+
 @pytest.fixture
 def make_organization():
     def _make_organization(**kwargs):
@@ -0,0 +1,143 @@
+import multiprocessing
+import time
+from contextlib import nullcontext
+from unittest import mock
+from uuid import uuid4
+
+from django.core.management import BaseCommand
+from django.db import connections
+from django.db.models.signals import post_save
+
+from apps.alerts.models import (
+    AlertGroup,
+    AlertGroupCounter,
+    AlertReceiveChannel,
+    listen_for_alertreceivechannel_model_save,
+)
+from apps.alerts.models.alert_group_counter import AlertGroupCounterQuerySet, alert_group_number_allocator
+from apps.alerts.tests.factories import AlertReceiveChannelFactory
+from apps.user_management.tests.factories import OrganizationFactory
+
+
+STRATEGY_CAS = "cas"
+STRATEGY_BLOCKS = "blocks"
+
+
+def _make_cas_get_value(conflicts):
+    """
+    Allocation used before AlertGroupNumberAllocator: optimistic locking of the counter row.
+    A conflict raised ConcurrentUpdateError and the whole task was retried, here only the allocation is retried.
+    """
+
+    def get_value(queryset, organization):
+        counter, _ = AlertGroupCounter.objects.get_or_create(organization=organization)
+        while not AlertGroupCounter.objects.filter(organization=organization, value=counter.value).update(
+            value=counter.value + 1
+        ):
+            with conflicts.get_lock():
+                conflicts.value += 1
+            counter = AlertGroupCounter.objects.get(organization=organization)
+        return counter.value + 1
+
+    return get_value
+
+
+def _create_alert_groups(alert_receive_channel_pk, count, strategy, max_block_size, conflicts):
+    # every worker process gets its own allocator state and DB connection, as celery workers do
+    connections.close_all()
+    alert_group_number_allocator.reset()
+    alert_group_number_allocator.max_block_size = max_block_size
+
+    alert_receive_channel = AlertReceiveChannel.objects_with_deleted.select_related("organization").get(
+        pk=alert_receive_channel_pk
+    )
+    get_value = _make_cas_get_value(conflicts) if strategy == STRATEGY_CAS else None
+    with mock.patch.object(AlertGroupCounterQuerySet, "get_value", get_value) if get_value else nullcontext():
+        for _ in range(count):
+            AlertGroup.all_objects.create(channel=alert_receive_channel, distinction=uuid4().hex)
+    connections.close_all()
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure AlertGroup creation throughput for a single organization under N concurrent worker processes, "
+        "comparing block allocation of inside_organization_number's with the previous optimistic locking. "
+        "Creates a temporary organization which is deleted afterwards. Not intended to be run against production DB."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--workers", type=int, nargs="+", default=[1, 4, 16], help="Numbers of workers to try.")
+        parser.add_argument("--alert-groups", type=int, default=200, help="Alert groups created by each worker.")
+        parser.add_argument(
+            "--max-block-size",
+            type=int,
+            nargs="+",
+            default=[1, 100],
+            help="ALERT_GROUP_COUNTER_MAX_BLOCK_SIZE values to compare, 1 disables block allocation.",
+        )
+        parser.add_argument(
+            "--skip-cas",
+            action="store_true",
+            help="Don't measure the previous optimistic locking allocation.",
+        )
+
+    def handle(self, *args, **options):
+        post_save.disconnect(listen_for_alertreceivechannel_model_save, sender=AlertReceiveChannel)
+        organization = OrganizationFactory()
+        alert_receive_channel = AlertReceiveChannelFactory(
+            organization=organization, integration=AlertReceiveChannel.INTEGRATION_WEBHOOK
+        )
+        post_save.connect(listen_for_alertreceivechannel_model_save, sender=AlertReceiveChannel)
+
+        context = multiprocessing.get_context("fork")
+        # optimistic locking doesn't use blocks, block size is not applicable to it
+        runs = [] if options["skip_cas"] else [(STRATEGY_CAS, None)]
+        runs += [(STRATEGY_BLOCKS, max_block_size) for max_block_size in options["max_block_size"]]
+        try:
+            self.stdout.write(
+                f"{'strategy':>8} {'workers':>8} {'max block':>10} {'groups':>8} {'seconds':>8} {'groups/s':>10} "
+                f"{'conflicts':>10}"
+            )
+            for strategy, max_block_size in runs:
+                for workers in options["workers"]:
+                    AlertGroup.all_objects.filter(channel=alert_receive_channel).delete()
+                    connections.close_all()
+
+                    conflicts = context.Value("i", 0)
+                    processes = [
+                        context.Process(
+                            target=_create_alert_groups,
+                            args=(
+                                alert_receive_channel.pk,
+                                options["alert_groups"],
+                                strategy,
+                                max_block_size or 1,
+                                conflicts,
+                            ),
+                        )
+                        for _ in range(workers)
+                    ]
+                    started_at = time.perf_counter()
+                    for process in processes:
+                        process.start()
+                    for process in processes:
+                        process.join()
+                    elapsed = time.perf_counter() - started_at
+
+                    created = options["alert_groups"] * sum(process.exitcode == 0 for process in processes)
+                    numbers = list(
+                        AlertGroup.all_objects.filter(channel=alert_receive_channel).values_list(
+                            "inside_organization_number", flat=True
+                        )
+                    )
+                    if len(numbers) != len(set(numbers)):
+                        self.stderr.write("Duplicate inside_organization_number's detected!")
+
+                    self.stdout.write(
+                        f"{strategy:>8} {workers:>8} {max_block_size or '-':>10} {created:>8} {elapsed:>8.2f} "
+                        f"{created / elapsed:>10.1f} {conflicts.value:>10}"
+                    )
+        finally:
+            AlertGroup.all_objects.filter(channel=alert_receive_channel).delete()
+            alert_receive_channel.hard_delete()
+            organization.hard_delete()
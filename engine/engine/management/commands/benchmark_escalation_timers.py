@@ -0,0 +1,110 @@
+import datetime
+import heapq
+import math
+import random
+
+import pytz
+from django.core.management import BaseCommand
+from django.test import override_settings
+
+from apps.alerts.constants import NEXT_ESCALATION_DELAY
+from apps.alerts.tasks.escalate_alert_group import (
+    ESCALATION_TIMERS_DISPATCH_BATCH_SIZE,
+    ESCALATION_TIMERS_DISPATCH_INTERVAL,
+    is_escalation_step_for_timer,
+)
+
+# delays before the next step: notify steps are followed by NEXT_ESCALATION_DELAY, wait steps by their wait delay
+STEP_DELAYS = [datetime.timedelta(seconds=NEXT_ESCALATION_DELAY)] * 3 + [
+    datetime.timedelta(minutes=minutes) for minutes in (1, 5, 15, 30, 60)
+]
+
+STEP, DISPATCH = 0, 1
+
+
+class Command(BaseCommand):
+    help = (
+        "Simulate concurrent escalations and report ETA messages held by Celery workers when every escalation step "
+        "is an escalate_alert_group task with ETA and when later steps are stored as escalation timers. "
+        "Doesn't touch the DB or the broker."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--escalations", type=int, default=10000, help="Number of concurrent escalations.")
+        parser.add_argument("--minutes", type=int, default=120, help="Simulated period.")
+        parser.add_argument("--seed", type=int, default=42)
+
+    def handle(self, *args, **options):
+        with override_settings(ESCALATION_TIMER_WHEEL_ENABLED=True):
+            self._benchmark(options)
+
+    def _benchmark(self, options):
+        rnd = random.Random(options["seed"])
+        started_at = datetime.datetime(2023, 1, 2, tzinfo=pytz.UTC)
+        finished_at = started_at + datetime.timedelta(minutes=options["minutes"])
+
+        # escalations start during the first dispatch intervals, like during an alert storm
+        events = [
+            (started_at + datetime.timedelta(seconds=rnd.uniform(0, 600)), STEP, escalation, None)
+            for escalation in range(options["escalations"])
+        ]
+        dispatch_at = started_at
+        while dispatch_at < finished_at:
+            events.append((dispatch_at, DISPATCH, -1, None))
+            dispatch_at += ESCALATION_TIMERS_DISPATCH_INTERVAL
+        heapq.heapify(events)
+
+        timers = {}  # escalation -> eta of its stored timer
+        eta_messages = {}  # escalation -> eta of its task sent to the broker
+        steps = 0
+        late_steps = 0
+        held_messages = []
+        dispatched_per_run = []
+        max_timers = 0
+        while events:
+            now, kind, escalation, eta = heapq.heappop(events)
+            if now >= finished_at:
+                break
+
+            if kind == DISPATCH:
+                dispatch_until = now + ESCALATION_TIMERS_DISPATCH_INTERVAL
+                due = [(escalation, eta) for escalation, eta in timers.items() if eta <= dispatch_until]
+                for escalation, eta in due:
+                    del timers[escalation]
+                    eta_messages[escalation] = eta
+                    heapq.heappush(events, (max(eta, now), STEP, escalation, eta))
+                    late_steps += eta < now
+                dispatched_per_run.append(len(due))
+                held_messages.append(len(eta_messages))
+                continue
+
+            eta_messages.pop(escalation, None)
+            steps += 1
+            next_step_eta = now + rnd.choice(STEP_DELAYS)
+            if is_escalation_step_for_timer(next_step_eta, now):
+                timers[escalation] = next_step_eta
+            else:
+                eta_messages[escalation] = next_step_eta
+                heapq.heappush(events, (next_step_eta, STEP, escalation, next_step_eta))
+            max_timers = max(max_timers, len(timers))
+
+        # a select and a delete per batch of dispatch_escalation_timers
+        queries_per_run = [
+            2 * (dispatched // ESCALATION_TIMERS_DISPATCH_BATCH_SIZE + 1) for dispatched in dispatched_per_run
+        ]
+        self.stdout.write(
+            f"{options['escalations']} escalations, {options['minutes']} minutes, {steps} escalation steps, "
+            f"dispatch every {ESCALATION_TIMERS_DISPATCH_INTERVAL.total_seconds():.0f}s"
+        )
+        self.stdout.write(f"{'strategy':>18} {'held ETA messages: mean':>24} {'max':>8}")
+        self.stdout.write(f"{'tasks with ETA':>18} {options['escalations']:>24} {options['escalations']:>8}")
+        self.stdout.write(
+            f"{'escalation timers':>18} {sum(held_messages) / len(held_messages):>24.1f} {max(held_messages):>8}"
+        )
+        self.stdout.write(
+            f"timers stored: max {max_timers}; steps dispatched per run: max {max(dispatched_per_run)}, "
+            f"mean {sum(dispatched_per_run) / len(dispatched_per_run):.1f}; "
+            f"DB queries per run: max {max(queries_per_run)}; "
+            f"dispatch runs per hour: {math.ceil(datetime.timedelta(hours=1) / ESCALATION_TIMERS_DISPATCH_INTERVAL)}; "
+            f"steps sent late: {late_steps}"
+        )
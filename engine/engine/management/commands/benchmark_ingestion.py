@@ -0,0 +1,240 @@
+import json
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+
+from celery.signals import task_postrun, task_prerun
+from django.core.management import BaseCommand
+from django.db import connection
+from django.db.models.signals import post_save
+from django.test import override_settings
+from django.urls import resolve
+from rest_framework.test import APIRequestFactory
+
+from apps.alerts.models import (
+    Alert,
+    AlertGroup,
+    AlertReceiveChannel,
+    ChannelFilter,
+    listen_for_alertreceivechannel_model_save,
+)
+from apps.alerts.tests.factories import AlertReceiveChannelFactory, ChannelFilterFactory
+from apps.user_management.tests.factories import OrganizationFactory
+from engine.celery import app as celery_app
+
+INTEGRATIONS = {
+    "alertmanager": AlertReceiveChannel.INTEGRATION_ALERTMANAGER,
+    "grafana": AlertReceiveChannel.INTEGRATION_GRAFANA,
+    "webhook": AlertReceiveChannel.INTEGRATION_WEBHOOK,
+    "formatted_webhook": AlertReceiveChannel.INTEGRATION_FORMATTED_WEBHOOK,
+}
+
+# grouping templates picking the synthetic group key, so group cardinality doesn't depend on default templates
+GROUPING_ID_TEMPLATES = {
+    "alertmanager": "{{ payload.labels.group }}",
+    "grafana": "{{ payload.ruleId }}",
+    "webhook": "{{ payload.group }}",
+    "formatted_webhook": "{{ payload.group }}",
+}
+
+STAGE_VIEW = "view"
+STAGE_ALERT_CREATE = "Alert.create"
+
+
+def make_payload(integration, index, groups, routes, alerts_per_request):
+    group = index % groups
+    # every (routes + 1)th payload doesn't match any regex route and goes to the default one
+    route = f"route-{index % (routes + 1)}"
+    if integration == "alertmanager":
+        return {
+            "alerts": [
+                {
+                    "status": "firing",
+                    "labels": {"alertname": "HighCPUUsage", "group": str(group), "route": route, "n": str(n)},
+                    "annotations": {"summary": "CPU usage is above 90% for the last 5 minutes"},
+                    "startsAt": "2023-03-01T00:00:00Z",
+                    "endsAt": "0001-01-01T00:00:00Z",
+                    "generatorURL": "http://prometheus.example.com/graph",
+                    "fingerprint": f"{group:016x}",
+                }
+                for n in range(alerts_per_request)
+            ],
+            "status": "firing",
+            "receiver": "oncall",
+            "groupLabels": {"group": str(group)},
+            "externalURL": "http://alertmanager.example.com",
+            "version": "4",
+        }
+    if integration == "grafana":
+        return {
+            "evalMatches": [{"value": 100, "metric": "High value", "tags": {"route": route}}],
+            "message": "CPU usage is above 90% for the last 5 minutes",
+            "ruleId": group,
+            "ruleName": "High CPU usage",
+            "ruleUrl": "http://grafana.example.com/",
+            "state": "alerting",
+            "title": "[Alerting] High CPU usage",
+        }
+    return {
+        "alert_uid": f"{index:032x}",
+        "title": "High CPU usage",
+        "message": "CPU usage is above 90% for the last 5 minutes",
+        "state": "alerting",
+        "group": group,
+        "route": route,
+    }
+
+
+def percentile(values, q):
+    values = sorted(values)
+    return values[round(q * (len(values) - 1))]
+
+
+class StageTimer:
+    """
+    Collects inclusive durations and DB queries of stages. Celery tasks run eagerly inside the view,
+    so the view stage includes all the tasks it has triggered.
+    """
+
+    def __init__(self):
+        self.durations = defaultdict(list)
+        self.queries = defaultdict(int)
+        self.total_queries = 0
+        self._running_tasks = {}
+
+    def count_query(self, execute, sql, params, many, context):
+        self.total_queries += 1
+        return execute(sql, params, many, context)
+
+    @contextmanager
+    def stage(self, name):
+        started_at, started_queries = time.perf_counter(), self.total_queries
+        try:
+            yield
+        finally:
+            self.durations[name].append(time.perf_counter() - started_at)
+            self.queries[name] += self.total_queries - started_queries
+
+    def on_task_prerun(self, task_id=None, task=None, **kwargs):
+        self._running_tasks[task_id] = (task.name.rsplit(".", 1)[-1], time.perf_counter(), self.total_queries)
+
+    def on_task_postrun(self, task_id=None, **kwargs):
+        name, started_at, started_queries = self._running_tasks.pop(task_id)
+        self.durations[name].append(time.perf_counter() - started_at)
+        self.queries[name] += self.total_queries - started_queries
+
+    @contextmanager
+    def timed_alert_create(self):
+        original_create = Alert.__dict__["create"]
+
+        def create(cls, *args, **kwargs):
+            with self.stage(STAGE_ALERT_CREATE):
+                return original_create.__func__(cls, *args, **kwargs)
+
+        Alert.create = classmethod(create)
+        try:
+            yield
+        finally:
+            Alert.create = original_create
+
+
+class Command(BaseCommand):
+    help = (
+        "Replay synthetic AlertManager, Grafana, webhook and formatted_webhook payloads through the integration views "
+        "with Celery in eager mode and report p50/p99 latency and DB queries per stage. "
+        "Creates a temporary organization which is deleted afterwards. Not intended to be run against production DB."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--integrations",
+            nargs="+",
+            choices=list(INTEGRATIONS),
+            default=list(INTEGRATIONS),
+            help="Payloads to replay.",
+        )
+        parser.add_argument("--requests", type=int, default=200, help="Requests sent to each integration.")
+        parser.add_argument("--rate", type=float, default=0, help="Requests per second, 0 sends them back to back.")
+        parser.add_argument("--groups", type=int, default=10, help="Number of distinct alert groups per integration.")
+        parser.add_argument("--routes", type=int, default=10, help="Number of regex routes per integration.")
+        parser.add_argument("--alerts-per-request", type=int, default=1, help="Alerts in each AlertManager payload.")
+
+    def handle(self, *args, **options):
+        organization = OrganizationFactory()
+        post_save.disconnect(listen_for_alertreceivechannel_model_save, sender=AlertReceiveChannel)
+        alert_receive_channels = {}
+        try:
+            for integration in options["integrations"]:
+                alert_receive_channel = AlertReceiveChannelFactory(
+                    organization=organization,
+                    integration=INTEGRATIONS[integration],
+                    grouping_id_template=GROUPING_ID_TEMPLATES[integration],
+                )
+                for i in range(options["routes"]):
+                    ChannelFilterFactory(
+                        alert_receive_channel=alert_receive_channel,
+                        filtering_term=f'"route": "route-{i}"',
+                        filtering_term_type=ChannelFilter.FILTERING_TERM_TYPE_REGEX,
+                    )
+                ChannelFilterFactory(alert_receive_channel=alert_receive_channel, is_default=True)
+                alert_receive_channels[integration] = alert_receive_channel
+        finally:
+            post_save.connect(listen_for_alertreceivechannel_model_save, sender=AlertReceiveChannel)
+
+        eager_settings = (celery_app.conf.task_always_eager, celery_app.conf.task_eager_propagates)
+        celery_app.conf.task_always_eager = True
+        celery_app.conf.task_eager_propagates = True
+        try:
+            with override_settings(RATELIMIT_ENABLE=False):
+                for integration, alert_receive_channel in alert_receive_channels.items():
+                    self._benchmark(integration, alert_receive_channel, options)
+        finally:
+            celery_app.conf.task_always_eager, celery_app.conf.task_eager_propagates = eager_settings
+            for alert_receive_channel in alert_receive_channels.values():
+                AlertGroup.all_objects.filter(channel=alert_receive_channel).delete()
+                alert_receive_channel.hard_delete()
+            organization.hard_delete()
+
+    def _benchmark(self, integration, alert_receive_channel, options):
+        factory = APIRequestFactory()
+        path = f"/integrations/v1/{alert_receive_channel.config.slug}/{alert_receive_channel.token}/"
+        match = resolve(path)
+        alerts_per_request = options["alerts_per_request"] if integration == "alertmanager" else 1
+
+        timer = StageTimer()
+        task_prerun.connect(timer.on_task_prerun, weak=False)
+        task_postrun.connect(timer.on_task_postrun, weak=False)
+        started_at = time.perf_counter()
+        try:
+            with connection.execute_wrapper(timer.count_query), timer.timed_alert_create():
+                for index in range(options["requests"]):
+                    if options["rate"]:
+                        # keep the schedule, requests which are late are sent right away
+                        delay = started_at + index / options["rate"] - time.perf_counter()
+                        if delay > 0:
+                            time.sleep(delay)
+
+                    payload = make_payload(integration, index, options["groups"], options["routes"], alerts_per_request)
+                    request = factory.post(path, data=json.dumps(payload), content_type="application/json")
+                    with timer.stage(STAGE_VIEW):
+                        response = match.func(request, *match.args, **match.kwargs)
+                    if response.status_code != 200:
+                        self.stderr.write(f"{integration}: unexpected response {response.status_code}")
+        finally:
+            task_prerun.disconnect(timer.on_task_prerun)
+            task_postrun.disconnect(timer.on_task_postrun)
+        elapsed = time.perf_counter() - started_at
+
+        alerts = Alert.objects.filter(group__channel=alert_receive_channel).count()
+        alert_groups = AlertGroup.all_objects.filter(channel=alert_receive_channel).count()
+        queries_per_alert = timer.total_queries / max(alerts, 1)
+        self.stdout.write(
+            f"\n{integration}: {options['requests']} requests, {alerts} alerts, {alert_groups} alert groups "
+            f"in {elapsed:.2f}s, {alerts / elapsed:.1f} alerts/s, {queries_per_alert:.1f} queries/alert"
+        )
+        self.stdout.write(f"{'stage':>40} {'count':>7} {'p50 ms':>8} {'p99 ms':>8} {'queries/run':>12}")
+        for stage, durations in sorted(timer.durations.items(), key=lambda item: -sum(item[1])):
+            self.stdout.write(
+                f"{stage:>40} {len(durations):>7} {percentile(durations, 0.5) * 1000:>8.2f} "
+                f"{percentile(durations, 0.99) * 1000:>8.2f} {timer.queries[stage] / len(durations):>12.1f}"
+            )
@@ -0,0 +1,86 @@
+import re
+import time
+
+from django.core.management import BaseCommand
+
+from apps.alerts.models import ChannelFilter
+from apps.alerts.route_matcher import RegexRoutePrefilter, Route, RouteMatcher
+
+DEFAULT_ROUTE_PK = 0
+
+
+def _make_payload(service):
+    return {
+        "alerts": [
+            {
+                "status": "firing",
+                "labels": {
+                    "alertname": "HighCPUUsage",
+                    "service": service,
+                    "instance": f"host-{i}:9100",
+                    "severity": "critical",
+                },
+                "annotations": {"summary": "CPU usage is above 90% for the last 5 minutes"},
+            }
+            for i in range(3)
+        ],
+        "status": "firing",
+    }
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare regex routing strategies on synthetic integrations with one route per service label. "
+        "Doesn't touch the DB."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--routes", type=int, nargs="+", default=[10, 100, 1000], help="Numbers of routes to try.")
+        parser.add_argument("--iterations", type=int, default=1000, help="Payloads routed per measurement.")
+
+    def _measure(self, select, payload, iterations):
+        started_at = time.perf_counter()
+        for _ in range(iterations):
+            select(payload)
+        return (time.perf_counter() - started_at) / iterations * 1e6
+
+    def handle(self, *args, **options):
+        self.stdout.write(
+            f"{'routes':>7} {'matching route':>15} {'per-route loop':>15} {'compiled loop':>14} {'prefilter':>10}  (us)"
+        )
+        for routes_count in options["routes"]:
+            filtering_terms = [f'"service": "svc-{i}"' for i in range(routes_count)]
+
+            # loop over model instances as ChannelFilter.select_filter did before routes were precompiled
+            channel_filters = [
+                ChannelFilter(pk=i + 1, filtering_term=filtering_term)
+                for i, filtering_term in enumerate(filtering_terms)
+            ] + [ChannelFilter(pk=DEFAULT_ROUTE_PK, is_default=True)]
+
+            def select_per_route(payload):
+                for channel_filter in channel_filters:
+                    if channel_filter.is_satisfying(payload):
+                        return channel_filter.pk
+
+            routes = [
+                Route(i + 1, False, filtering_term, ChannelFilter.FILTERING_TERM_TYPE_REGEX, re.compile(filtering_term))
+                for i, filtering_term in enumerate(filtering_terms)
+            ] + [Route(DEFAULT_ROUTE_PK, True, None, ChannelFilter.FILTERING_TERM_TYPE_REGEX, None)]
+            compiled_matcher = RouteMatcher(None, None, routes)
+            prefiltered_matcher = RouteMatcher(None, None, routes, RegexRoutePrefilter(routes))
+
+            cases = [
+                ("first", _make_payload("svc-0"), 1),
+                ("last", _make_payload(f"svc-{routes_count - 1}"), routes_count),
+                ("none", _make_payload("unknown"), DEFAULT_ROUTE_PK),
+            ]
+            for case, payload, expected_pk in cases:
+                for select in (select_per_route, compiled_matcher.match, prefiltered_matcher.match):
+                    assert select(payload) == expected_pk, f"{select} selected a wrong route"
+
+                self.stdout.write(
+                    f"{routes_count:>7} {case:>15} "
+                    f"{self._measure(select_per_route, payload, options['iterations']):>15.1f} "
+                    f"{self._measure(compiled_matcher.match, payload, options['iterations']):>14.1f} "
+                    f"{self._measure(prefiltered_matcher.match, payload, options['iterations']):>10.1f}"
+                )
@@ -0,0 +1,125 @@
+import datetime
+import random
+import types
+
+import pytz
+from django.core.cache import cache
+from django.core.management import BaseCommand
+from django.test import override_settings
+
+from apps.schedules.oncall_timeline import (
+    SCHEDULE_TIMELINE_CACHE_KEY,
+    CalendarTimeline,
+    ScheduleTimeline,
+    TimelineEntry,
+    get_ical_files_version,
+)
+from apps.schedules.refresh_scheduler import (
+    REFRESH_CYCLE_INTERVAL,
+    clear_schedule_dirty,
+    get_schedules_to_refresh,
+    mark_schedule_dirty,
+    set_next_refresh_at,
+)
+
+SHIFT_DURATIONS = [datetime.timedelta(hours=hours) for hours in (8, 12, 24, 24 * 7)]
+BENCHMARK_CACHES = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+
+
+def percentile(values, q):
+    values = sorted(values)
+    return values[round(q * (len(values) - 1))]
+
+
+def make_timeline(schedule, rnd, horizon_start, horizon_end):
+    """Timeline of a rotation of back to back shifts with a random duration and a random first handover"""
+    duration = rnd.choice(SHIFT_DURATIONS)
+    shift_start = horizon_start - datetime.timedelta(seconds=rnd.randrange(int(duration.total_seconds())))
+    entries = []
+    while shift_start < horizon_end:
+        shift_end = shift_start + duration
+        usernames = (f"user-{len(entries)}",)
+        entries.append(
+            TimelineEntry(shift_start.timestamp(), shift_end.timestamp(), shift_start, shift_end, False, 1, usernames)
+        )
+        shift_start = shift_end
+    return ScheduleTimeline(
+        version=get_ical_files_version(schedule),
+        built_at=horizon_start,
+        horizon_start=horizon_start,
+        horizon_end=horizon_end,
+        calendars=(CalendarTimeline(entries, pytz.UTC), None),
+    )
+
+
+class Command(BaseCommand):
+    help = (
+        "Simulate refresh cycles of start_refresh_ical_files on synthetic schedules and report refresh_ical_file "
+        "tasks per cycle of the full sweep and of the change-driven scheduler. "
+        "Uses in-memory cache only, doesn't touch the DB."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--schedules", type=int, default=5000, help="Number of schedules.")
+        parser.add_argument("--cycles", type=int, default=144, help="Refresh cycles simulated, 144 cycles is a day.")
+        parser.add_argument("--remote-ratio", type=float, default=0.05, help="Share of schedules with iCal URLs.")
+        parser.add_argument("--edits-per-cycle", type=int, default=10, help="Schedules edited between cycles.")
+        parser.add_argument("--seed", type=int, default=42)
+
+    def handle(self, *args, **options):
+        with override_settings(CACHES=BENCHMARK_CACHES):
+            self._benchmark(options)
+
+    def _benchmark(self, options):
+        rnd = random.Random(options["seed"])
+        started_at = datetime.datetime(2023, 1, 2, tzinfo=pytz.UTC)
+        horizon_start = started_at - datetime.timedelta(days=1)
+        horizon_end = started_at + REFRESH_CYCLE_INTERVAL * options["cycles"] + datetime.timedelta(days=1)
+
+        schedules = {}
+        for pk in range(1, options["schedules"] + 1):
+            remote = rnd.random() < options["remote_ratio"]
+            schedule = types.SimpleNamespace(
+                pk=pk,
+                ical_url_primary=f"https://calendar.example.com/{pk}.ics" if remote else None,
+                ical_url_overrides=None,
+                _ical_file_primary=f"schedule {pk}",
+                _ical_file_overrides=None,
+            )
+            schedules[pk] = schedule
+            cache.set(SCHEDULE_TIMELINE_CACHE_KEY.format(pk), make_timeline(schedule, rnd, horizon_start, horizon_end))
+
+        tasks_per_cycle = []
+        eta_tasks_per_cycle = []
+        for cycle in range(options["cycles"]):
+            now = started_at + REFRESH_CYCLE_INTERVAL * cycle
+            for pk in rnd.sample(list(schedules), min(options["edits_per_cycle"], len(schedules))):
+                mark_schedule_dirty(pk)
+
+            refresh_now, refresh_at = get_schedules_to_refresh(schedules, now)
+            # run refresh_ical_file tasks at their eta, refreshes of the cycle don't overlap with the next one
+            for pk, refreshed_at in [(pk, now) for pk in refresh_now] + refresh_at:
+                clear_schedule_dirty(pk)
+                set_next_refresh_at(schedules[pk], refreshed_at)
+            tasks_per_cycle.append(len(refresh_now) + len(refresh_at))
+            eta_tasks_per_cycle.append(len(refresh_at))
+
+        # the first cycle refreshes every schedule, since none of them was refreshed before
+        steady_tasks = tasks_per_cycle[1:] or tasks_per_cycle
+        self.stdout.write(
+            f"{options['schedules']} schedules, {options['cycles']} cycles, "
+            f"{options['edits_per_cycle']} edits per cycle, {options['remote_ratio']:.0%} with iCal URLs"
+        )
+        self.stdout.write(
+            f"{'strategy':>14} {'first cycle':>12} {'mean':>8} {'p50':>8} {'p99':>8} {'max':>8} {'total':>9}"
+        )
+        self.stdout.write(
+            f"{'full sweep':>14} {options['schedules']:>12} {options['schedules']:>8} {options['schedules']:>8} "
+            f"{options['schedules']:>8} {options['schedules']:>8} {options['schedules'] * options['cycles']:>9}"
+        )
+        self.stdout.write(
+            f"{'change-driven':>14} {tasks_per_cycle[0]:>12} {sum(steady_tasks) / len(steady_tasks):>8.1f} "
+            f"{percentile(steady_tasks, 0.5):>8} {percentile(steady_tasks, 0.99):>8} {max(steady_tasks):>8} "
+            f"{sum(tasks_per_cycle):>9}"
+        )
+        self.stdout.write(f"tasks scheduled with eta at shift boundaries: {sum(eta_tasks_per_cycle)}")
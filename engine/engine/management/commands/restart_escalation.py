@@ -4,7 +4,7 @@ from django.db.models import Q
 from django.utils import timezone
 
 from apps.alerts.models import AlertGroup, AlertReceiveChannel
-from apps.alerts.tasks import escalate_alert_group, unsilence_task
+from apps.alerts.tasks import schedule_escalate_alert_group, unsilence_task
 
 
 class Command(BaseCommand):
@@ -39,6 +39,7 @@ class Command(BaseCommand):
             return
 
         tasks = []
+        escalations = []
         alert_groups_to_update = []
         now = timezone.now()
 
@@ -71,14 +72,7 @@ class Command(BaseCommand):
                     alert_group.active_escalation_id = task_id
                     alert_groups_to_update.append(alert_group)
 
-                    tasks.append(
-                        escalate_alert_group.signature(
-                            args=(alert_group.pk,),
-                            immutable=True,
-                            task_id=task_id,
-                            eta=alert_group.next_step_eta,
-                        )
-                    )
+                    escalations.append((alert_group.pk, task_id, alert_group.next_step_eta))
 
         AlertGroup.all_objects.bulk_update(
             alert_groups_to_update,
@@ -88,6 +82,8 @@ class Command(BaseCommand):
 
         for task in tasks:
             task.apply_async()
+        for alert_group_pk, task_id, eta in escalations:
+            schedule_escalate_alert_group(alert_group_pk, task_id, eta=eta)
 
         restarted_alert_group_ids = ", ".join(str(alert_group.pk) for alert_group in alert_groups)
         self.stdout.write("Escalations restarted for alert groups: {}".format(restarted_alert_group_ids))
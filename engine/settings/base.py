@@ -404,6 +404,11 @@ CELERY_BEAT_SCHEDULE = {
         "schedule": 10 * 60,
         "args": (),
     },
+    "dispatch_escalation_timers": {
+        "task": "apps.alerts.tasks.escalate_alert_group.dispatch_escalation_timers",
+        "schedule": 30,
+        "args": (),
+    },
     "start_refresh_ical_files": {
         "task": "apps.schedules.tasks.refresh_ical_files.start_refresh_ical_files",
         "schedule": 10 * 60,
@@ -591,6 +596,28 @@ DATA_UPLOAD_MAX_MEMORY_SIZE = getenv_integer("DATA_UPLOAD_MAX_MEMORY_SIZE", 1_04
 JINJA_TEMPLATE_MAX_LENGTH = 50000
 JINJA_RESULT_TITLE_MAX_LENGTH = 500
 JINJA_RESULT_MAX_LENGTH = 50000
+# Max number of compiled jinja templates kept in memory per process
+JINJA_TEMPLATE_CACHE_SIZE = getenv_integer("JINJA_TEMPLATE_CACHE_SIZE", 1000)
+
+# Max number of inside_organization_number's reserved at once by a worker during alert storms
+ALERT_GROUP_COUNTER_MAX_BLOCK_SIZE = getenv_integer("ALERT_GROUP_COUNTER_MAX_BLOCK_SIZE", 100)
+
+# Alerts joining an existing alert group within this number of seconds are distributed by a single task
+ALERT_DISTRIBUTION_COALESCE_WINDOW = getenv_integer("ALERT_DISTRIBUTION_COALESCE_WINDOW", 3)
+
+# Integrations with at least this number of regex routes find candidate routes by a single scan of the payload
+# instead of evaluating every regex, 0 disables it
+ROUTE_REGEX_PREFILTER_MIN_ROUTES = getenv_integer("ROUTE_REGEX_PREFILTER_MIN_ROUTES", 50)
+
+# Number of days ahead covered by the materialized on-call timeline of each schedule, 0 disables it
+SCHEDULE_TIMELINE_HORIZON_DAYS = getenv_integer("SCHEDULE_TIMELINE_HORIZON_DAYS", 30)
+# Approximate size in bytes of iCal files (and their expanded events) parsed calendars are kept in memory for per process
+ICAL_CALENDAR_CACHE_MAX_SIZE = getenv_integer("ICAL_CALENDAR_CACHE_MAX_SIZE", 10_000_000)
+# Max interval in seconds between refreshes of a schedule if it's not changed and no shift starts or ends meanwhile
+SCHEDULE_REFRESH_MAX_INTERVAL = getenv_integer("SCHEDULE_REFRESH_MAX_INTERVAL", 60 * 60)
+
+# Store escalation steps due later than the next escalation timers dispatch in the DB instead of Celery tasks with ETA
+ESCALATION_TIMER_WHEEL_ENABLED = getenv_boolean("ESCALATION_TIMER_WHEEL_ENABLED", default=True)
 
 # Log inbound/outbound calls as slow=1 if they exceed threshold
 SLOW_THRESHOLD_SECONDS = 2.0
@@ -80,8 +80,10 @@ CELERY_TASK_ROUTES = {
     "apps.alerts.tasks.acknowledge_reminder.acknowledge_reminder_task": {"queue": "critical"},
     "apps.alerts.tasks.acknowledge_reminder.unacknowledge_timeout_task": {"queue": "critical"},
     "apps.alerts.tasks.distribute_alert.distribute_alert": {"queue": "critical"},
+    "apps.alerts.tasks.distribute_alert.distribute_grouped_alerts": {"queue": "critical"},
     "apps.alerts.tasks.distribute_alert.send_alert_create_signal": {"queue": "critical"},
     "apps.alerts.tasks.escalate_alert_group.escalate_alert_group": {"queue": "critical"},
+    "apps.alerts.tasks.escalate_alert_group.dispatch_escalation_timers": {"queue": "critical"},
     "apps.alerts.tasks.invite_user_to_join_incident.invite_user_to_join_incident": {"queue": "critical"},
     "apps.alerts.tasks.maintenance.check_maintenance_finished": {"queue": "critical"},
     "apps.alerts.tasks.maintenance.disable_maintenance": {"queue": "critical"},
@@ -89,6 +91,7 @@ CELERY_TASK_ROUTES = {
     "apps.alerts.tasks.notify_group.notify_group_task": {"queue": "critical"},
     "apps.alerts.tasks.notify_ical_schedule_shift.notify_ical_schedule_shift": {"queue": "critical"},
     "apps.alerts.tasks.notify_user.notify_user_task": {"queue": "critical"},
+    "apps.alerts.tasks.notify_user.notify_users_task": {"queue": "critical"},
     "apps.alerts.tasks.notify_user.perform_notification": {"queue": "critical"},
     "apps.alerts.tasks.notify_user.send_user_notification_signal": {"queue": "critical"},
     "apps.alerts.tasks.resolve_alert_group_by_source_if_needed.resolve_alert_group_by_source_if_needed": {
@@ -104,6 +107,7 @@ CELERY_TASK_ROUTES = {
     "apps.email.tasks.notify_user_async": {"queue": "critical"},
     "apps.integrations.tasks.create_alert": {"queue": "critical"},
     "apps.integrations.tasks.create_alertmanager_alerts": {"queue": "critical"},
+    "apps.integrations.tasks.create_alertmanager_alerts_batch": {"queue": "critical"},
     "apps.integrations.tasks.start_notify_about_integration_ratelimit": {"queue": "critical"},
     "apps.mobile_app.tasks.notify_user_async": {"queue": "critical"},
     "apps.schedules.tasks.drop_cached_ical.drop_cached_ical_for_custom_events_for_organization": {"queue": "critical"},